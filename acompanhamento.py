@@ -0,0 +1,139 @@
+import os
+import time
+import threading
+import utils
+import filtros
+import ingestao
+import preparacao
+
+# ####################################################################
+# --- ACOMPANHAMENTO DA PLANILHA (NOVAS LINHAS DURANTE A EXECUÇÃO) ---
+# ####################################################################
+#
+# A exportação regrava o atribuicao.xlsx ao longo do turno. Uma thread olha
+# tamanho + mtime a cada INTERVALO_VERIFICACAO (de cada planilha, se a
+# origem for uma pasta ou glob: arquivo novo também conta); quando algo muda e
+# fica ESTABILIDADE segundos sem mudar (o Excel terminou de gravar), relê
+# com os mesmos filtros, prepara a lista e compara pela chave: só as chaves
+# nunca vistas vão para 'ao_encontrar'. A leitura é feita nesta thread,
+# então o envio continua enquanto a planilha nova é lida.
+#
+# Planilha única com o motor de cache: o frame vem do cache (HIT se só o
+# mtime mudou) e, se as linhas já processadas continuam iguais no começo
+# (chave e colunas do filtro, comparadas com o frame da verificação
+# anterior), só as que vieram depois delas são filtradas, preparadas e
+# comparadas. Linhas removidas ou alteradas, várias planilhas ou o motor
+# streaming: relê e filtra tudo, como na primeira verificação.
+
+INTERVALO_VERIFICACAO = 5.0     # Segundos entre olhadas no arquivo
+ESTABILIDADE = 2.0              # Segundos sem mudança antes de ler (arquivo ainda sendo gravado)
+
+def _log(msg):
+    return f"[{time.strftime('%H:%M:%S')}] {msg}"
+
+class AcompanhadorPlanilha:
+    """
+    'conhecidas': chaves normalizadas já na fila de trabalho (não voltam).
+    'ao_encontrar(valores, linhas, chaves)': recebe só os registros de chave nova, na ordem da planilha.
+    'assinatura': a do arquivo ANTES da leitura inicial (mudanças durante ela não se perdem).
+    'a_cada_volta()': chamado a cada verificação (a fila compartilhada renova o prazo do acompanhamento).
+    """
+    def __init__(self, arquivo, cidade_filtro, backlog_filtro, conhecidas, ao_encontrar, log_textbox,
+                 assinatura=None, a_cada_volta=None, intervalo=None):
+        self.arquivo = arquivo
+        self.cidade_filtro = cidade_filtro
+        self.backlog_filtro = backlog_filtro
+        self.conhecidas = set(conhecidas)
+        self.ao_encontrar = ao_encontrar
+        self.log_textbox = log_textbox
+        self.a_cada_volta = a_cada_volta
+        self.intervalo = intervalo or INTERVALO_VERIFICACAO
+        self.atualizacoes = 0
+        self.novas = 0
+        self._processadas = None        # Chave e colunas do filtro das linhas já comparadas (frame do cache)
+        self._assinatura = assinatura or ingestao.assinatura(arquivo)
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._rodar, name="acompanhamento-planilha", daemon=True)
+        self._thread.start()
+        self.log_textbox.insert("end", _log(f"👁️ Acompanhando {ingestao.separar(self.arquivo)[0]} (a cada {self.intervalo:g}s).\n"))
+        return self
+
+    def parar(self):
+        """Encerra a thread (uma leitura em andamento termina sozinha: a thread é daemon)."""
+        self._parar.set()
+        if self._thread: self._thread.join(timeout=5)
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _rodar(self):
+        while not self._parar.wait(self.intervalo):
+            if self.a_cada_volta:
+                try: self.a_cada_volta()
+                except Exception as e: self.log_textbox.insert("end", _log(f"⚠️ Acompanhamento: {e}\n"))
+            assinatura = ingestao.assinatura(self.arquivo)
+            if assinatura is None or assinatura == self._assinatura: continue
+
+            # Espera o arquivo parar de mudar antes de ler
+            if self._parar.wait(ESTABILIDADE): break
+            if ingestao.assinatura(self.arquivo) != assinatura: continue
+            try:
+                self.verificar()
+                self._assinatura = assinatura
+            except Exception as e:
+                # Arquivo travado ou incompleto: tenta de novo na próxima volta
+                self.log_textbox.insert("end", _log(f"⚠️ Planilha alterada, mas a leitura falhou ({e}). Nova tentativa em {self.intervalo:g}s.\n"))
+
+    def _ler(self):
+        """
+        (DataFrame filtrado a comparar, primeira linha dele, linhas processadas depois desta verificação).
+        As linhas processadas só são guardadas quando a verificação termina.
+        """
+        if ingestao.varias_planilhas(self.arquivo) or utils.MOTOR_LEITURA != 'cache':
+            dados, _, msg = utils.ler_e_filtrar_dados(self.arquivo, self.cidade_filtro, self.backlog_filtro, None)
+            if msg.startswith("Erro leitura") or msg.startswith("Planilha não encontrada"):
+                raise RuntimeError(msg)
+            return dados, 0, None
+
+        spec = utils.montar_spec_filtro(self.cidade_filtro, self.backlog_filtro)
+        filtros.compilar_filtro(spec)
+        path = utils.get_external_path(self.arquivo)
+        if not os.path.exists(path): raise RuntimeError(f"Planilha não encontrada: {path}")
+        bruto = utils.carregar_planilha_cache(path)
+        if bruto.empty: return bruto, 0, None
+
+        # Só a chave e as colunas do filtro decidem quais chaves saem de uma linha
+        colunas = list(dict.fromkeys([utils.coluna_chave(bruto.columns)] + filtros.colunas_usadas(spec, bruto.columns)))
+        vistas = self._processadas
+        inicio = 0
+        if vistas is not None and len(vistas) <= len(bruto) and bruto[colunas].iloc[:len(vistas)].equals(vistas):
+            inicio = len(vistas)
+        return filtros.aplicar_spec(bruto.iloc[inicio:], spec), inicio, bruto[colunas]
+
+    def verificar(self):
+        """Relê, filtra e devolve quantas chaves novas foram entregues."""
+        inicio = time.perf_counter()
+        dados, primeira, processadas = self._ler()
+        lista = preparacao.preparar_lista(dados)
+
+        valores, linhas, chaves = [], [], []
+        for valor, linha, chave in zip(lista.valores, lista.linhas, lista.chaves):
+            if chave in self.conhecidas: continue
+            self.conhecidas.add(chave)
+            valores.append(valor)
+            linhas.append(linha)
+            chaves.append(chave)
+
+        self._processadas = processadas
+        self.atualizacoes += 1
+        trecho = f" após a linha {primeira + 1}" if primeira else ""
+        self.log_textbox.insert("end", _log(f"🔄 Planilha atualizada: {len(valores)} registro(s) novo(s) de {len(lista)} "
+                                            f"filtrados{trecho} ({time.perf_counter() - inicio:.1f}s).\n"))
+        if valores:
+            self.novas += len(valores)
+            self.ao_encontrar(valores, linhas, chaves)
+        return len(valores)
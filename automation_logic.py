@@ -1,16 +1,19 @@
-import pyautogui
 import time
-import pandas as pd     
-import pyperclip
-import winsound
 import os
 import utils
 import ctypes
+import db_manager
+import radar
+import metricas
+import entrada
+import preparacao
+import ingestao
+from delay_adaptativo import ControladorDelay
+from sessao import SessaoAutomacao
 
 # --- AJUSTES DE SISTEMA ---
 try:
     ctypes.windll.shcore.SetProcessDpiAwareness(1)
-    pyautogui.PAUSE = 0.02 
 except:
     pass
 
@@ -18,23 +21,12 @@ except:
 # --- CONFIGURAÇÃO DE RECURSOS ---
 # ####################################################################
 
-# Carrega imagens da pasta assets
-IMAGENS_DE_EXCECAO = []
-assets_dir = utils.resource_path("assets")
-if os.path.exists(assets_dir):
-    for f in os.listdir(assets_dir):
-        if f.lower().endswith(".png"):
-            IMAGENS_DE_EXCECAO.append(os.path.join("assets", f))
-
 # Palavras-chave de Título (Janelas de Erro)
 PALAVRAS_TITULO_ERRO = [
     "ERRO", "FALHA", "ATENÇÃO", "AVISO", "ERROR", "PROBLEM", "ALERT", 
     "MENSAGEM DA PÁGINA", "CONFIRMAÇÃO"
 ]
 
-CACHE_CAMINHOS = []
-CACHE_CARREGADO = False
-
 def _log(msg):
     return f"[{time.strftime('%H:%M:%S')}] {msg}"
 
@@ -42,23 +34,16 @@ def _log(msg):
 # --- CONTROLE DE JANELAS (SILENCIOSO) ---
 # ####################################################################
 
-def focar_janela_por_titulo(titulo_parcial, log_textbox):
-    try:
-        janelas = pyautogui.getWindowsWithTitle(titulo_parcial)
-        if janelas:
-            janela = janelas[0]
-            if janela.isMinimized: janela.restore()
-            janela.activate()
-            time.sleep(0.1) 
-            return True
-    except: pass
-    return False
+def focar_janela_por_titulo(titulo_parcial, log_textbox, backend):
+    return backend.focar_janela(titulo_parcial) is not None
 
-def garantir_foco_navegador(log_textbox):
-    navegadores = ["Opera", "Google Chrome", "Microsoft Edge", "Firefox", "Brave"]
-    for nav in navegadores:
-        if focar_janela_por_titulo(nav, log_textbox):
+def garantir_foco_navegador(log_textbox, backend):
+    for nav in entrada.NAVEGADORES:
+        janela = backend.focar_janela(nav)
+        if janela:
+            radar.aplicar_config_regiao(janela, backend.estado_radar)
             return True
+    radar.aplicar_config_regiao(None, backend.estado_radar)
     log_textbox.insert("end", _log("⚠️ Aviso: Navegador não detectado (usando janela ativa).\n"))
     return True 
 
@@ -67,26 +52,21 @@ def garantir_foco_navegador(log_textbox):
 # ####################################################################
 
 def carregar_recursos_detecao(log_textbox):
-    global CACHE_CAMINHOS, CACHE_CARREGADO
-    if CACHE_CARREGADO: return
-
-    for caminho_relativo in IMAGENS_DE_EXCECAO:
-        path = utils.resource_path(caminho_relativo)
-        if os.path.exists(path):
-            CACHE_CAMINHOS.append(path)
-        else:
-            path_root = utils.resource_path(os.path.basename(caminho_relativo))
-            if os.path.exists(path_root): CACHE_CAMINHOS.append(path_root)
-            
-    CACHE_CARREGADO = True
+    """Carrega (uma vez) o banco de templates de erro da pasta assets/."""
+    try:
+        banco = radar.carregar_banco()
+        if not banco.templates:
+            log_textbox.insert("end", _log("⚠️ Nenhuma imagem de erro em assets/ (radar só por título).\n"))
+    except Exception as e:
+        log_textbox.insert("end", _log(f"⚠️ Radar visual indisponível: {e}\n"))
 
-def verificar_presenca_erro():
+def verificar_presenca_erro(backend):
     """
     Verifica erro de forma 100% VISUAL e INVISÍVEL.
     """
     # 1. Título da Janela
     try:
-        titulo_ativo = pyautogui.getActiveWindowTitle()
+        titulo_ativo = backend.titulo_ativo()
         if titulo_ativo:
             titulo_upper = titulo_ativo.upper()
             for palavra in PALAVRAS_TITULO_ERRO:
@@ -94,13 +74,12 @@ def verificar_presenca_erro():
                     return True, f"Janela: {palavra}"
     except: pass
 
-    # 2. Imagem (Passivo)
-    for caminho_img in CACHE_CAMINHOS:
-        try:
-            if pyautogui.locateOnScreen(caminho_img, grayscale=True, confidence=0.8):
-                nome_erro = os.path.basename(caminho_img).replace('.png', '')
-                return True, f"Imagem: {nome_erro}"
-        except: pass
+    # 2. Imagem (Passivo): um screenshot por varredura para todos os templates
+    try:
+        nome_erro = backend.varrer_tela()
+        if nome_erro:
+            return True, f"Imagem: {nome_erro}"
+    except: pass
 
     return False, None
 
@@ -108,9 +87,17 @@ def verificar_presenca_erro():
 # --- TRATAMENTO DE PAUSA ---
 # ####################################################################
 
-def lidar_com_erro_e_pausar(log_textbox, motivo, safe_update_gui_cb, safe_configure_buttons_cb):
-    winsound.Beep(800, 500)
-    utils.PARAR_AUTOMACAO = True
+def lidar_com_erro_e_pausar(sessao, backend, log_textbox, motivo, safe_update_gui_cb, safe_configure_buttons_cb, cronometro=None):
+    cronometro = cronometro or metricas.Cronometro()
+    backend.alertar()
+    if not backend.pausar_em_erro and not sessao.pausado:
+        # Alvo simulado sem operador: registra e segue
+        log_textbox.insert("end", _log(f"🧪 Erro simulado ({motivo}) descartado.\n"))
+        backend.erro_resolvido()
+        return not sessao.cancelado
+
+    sessao.pausar()
+    sessao.status = "Pausado"
     
     log_textbox.insert("end", _log(f"🛑 BLOQUEIO DETECTADO ({motivo}).\n"))
     log_textbox.insert("end", "   -> Resolva no navegador e clique em CONTINUAR.\n")
@@ -119,123 +106,357 @@ def lidar_com_erro_e_pausar(log_textbox, motivo, safe_update_gui_cb, safe_config
     safe_update_gui_cb(status="Pausado")
     safe_configure_buttons_cb(iniciar_state="disabled", continuar_state="normal")
     
-    while utils.PARAR_AUTOMACAO:
-        if getattr(utils, 'CANCELAR_AUTOMACAO', False): 
-            return False 
-        time.sleep(0.5)
-    
-    if getattr(utils, 'CANCELAR_AUTOMACAO', False): 
-        return False
+    # Bloqueia sem polling: acorda assim que CONTINUAR/PARAR for acionado
+    with cronometro.fase("pausa"):
+        if not sessao.aguardar_retomada():
+            return False
 
     log_textbox.insert("end", _log("▶️ Retomando operação...\n"))
+    sessao.status = "Rodando"
     safe_update_gui_cb(status="Rodando")
     safe_configure_buttons_cb(iniciar_state="disabled", continuar_state="disabled")
     
-    garantir_foco_navegador(log_textbox)
+    backend.erro_resolvido()
+    with cronometro.fase("foco"):
+        garantir_foco_navegador(log_textbox, backend)
     return True
 
 # ####################################################################
 # --- CORE DA AUTOMAÇÃO ---
 # ####################################################################
 
-def automacao_core(log_textbox, cidade_filtro, backlog_filtro, delay_inicial, safe_configure_buttons_cb, safe_update_gui_cb):
+def enviar_e_verificar(sessao, backend, texto, log_textbox, safe_update_gui_cb, safe_configure_buttons_cb, cronometro=None):
+    """
+    Cola o texto, confirma com ENTER e roda o radar de erro.
+    Retorna 'ok', 'erro' (erro detectado e tratado pelo operador) ou None (cancelado).
+    O tempo de cada fase é acumulado no 'cronometro' (metricas.Cronometro).
+    """
+    cron = cronometro or metricas.Cronometro()
+    while True:
+        if sessao.cancelado: return None
+        
+        if sessao.pausado:
+            if not lidar_com_erro_e_pausar(sessao, backend, log_textbox, "Pausa Manual", safe_update_gui_cb, safe_configure_buttons_cb, cron):
+                return None
+            continue
+
+        # AÇÃO (reservar: no modo paralelo, espera a vez do teclado e foca a própria janela)
+        try:
+            with cron.fase("foco"): backend.reservar()
+            try:
+                with cron.fase("clipboard"): backend.copiar(texto)
+                with cron.fase("colar"): backend.colar()
+                with cron.fase("delay"):
+                    if sessao.delay > 0: time.sleep(sessao.delay)
+                with cron.fase("enter"): backend.confirmar()
+            finally:
+                backend.liberar()
+        except Exception as e:
+            if not lidar_com_erro_e_pausar(sessao, backend, log_textbox, f"Erro Teclado: {e}", safe_update_gui_cb, safe_configure_buttons_cb, cron):
+                return None
+            continue
+
+        # --- RADAR OTIMIZADO (VELOCIDADE MÁXIMA) ---
+        # Reduzido de 2.0s para 0.6s (entrada.JANELA_RADAR; o alvo simulado usa a própria latência).
+        # Se o erro não aparecer nesse tempo, assumimos sucesso.
+        tempo_limite = time.time() + backend.janela_radar
+        radar.reiniciar_portao(backend.estado_radar) # Primeira varredura de cada envio é sempre completa
+        tem_erro = False
+        motivo = None
+        
+        with cron.fase("radar"):
+            while True: # Pelo menos uma verificação, mesmo com janela zero
+                if sessao.pausado: break 
+                
+                tem_erro, motivo = verificar_presenca_erro(backend)
+                restante = tempo_limite - time.time()
+                if tem_erro or restante <= 0: break
+                if sessao.esperar(min(0.05, restante)): break # Polling ultra-rápido (acorda na hora se pausar)
+
+        if tem_erro:
+            if not lidar_com_erro_e_pausar(sessao, backend, log_textbox, motivo, safe_update_gui_cb, safe_configure_buttons_cb, cron):
+                return None
+            return "erro"
+        
+        return "ok"
+
+def _abrir_diario(sessao, lista, arquivo, cidade_filtro, backlog_filtro, execucao_pendente, log_textbox):
+    """
+    Abre o diário da execução: continua a pendente (se a lista inicial dela for a mesma)
+    ou registra uma nova. Ajusta o índice da sessão para o ponto de retomada.
+    Registros acrescentados durante a pendente (planilha acompanhada) voltam na
+    ordem em que foram enviados; os que ainda não foram, e os novos, vêm depois.
+    Se a planilha mudou, os valores já confirmados na pendente saem da lista e
+    vão para o diário novo (índices negativos): nenhum registro é colado de novo.
+    Retorna (diário, lista).
+    """
+    execucao_id = None
+    anterior = None
+
+    if execucao_pendente:
+        anterior = execucao_pendente["id"]
+        antes = len(lista)
+        # Confirmados de execuções anteriores a ela já ficaram fora da lista dela
+        herdados = db_manager.valores_confirmados(anterior, so_herdados=True)
+        if herdados: lista = lista.sem(herdados)
+        base, ultimo = execucao_pendente["total_base"], execucao_pendente["ultimo_indice"]
+        retomada = None
+        if len(lista) >= base and execucao_pendente.get("fingerprint") == lista.fingerprint(base):
+            acrescentados = db_manager.valores_desde(anterior, base)
+            if len(acrescentados) == max(0, ultimo + 1 - base): # Sem buracos no diário depois da lista inicial
+                retomada = lista.retomar(base, acrescentados)
+        if retomada is not None:
+            lista = retomada
+            execucao_id = anterior
+            sessao.indice = ultimo + 1
+            db_manager.atualizar_status_execucao(execucao_id, "rodando")
+            if len(lista) != execucao_pendente["total"]:
+                db_manager.DiarioExecucao(execucao_id).atualizar_total(len(lista))
+            log_textbox.insert("end", _log(f"↩️ Retomando execução #{execucao_id} no registro {sessao.indice + 1}.\n"))
+        else:
+            lista = lista.sem(db_manager.valores_confirmados(anterior))
+            sessao.indice = 0
+            log_textbox.insert("end", _log(f"⚠️ A planilha mudou desde a execução #{anterior}: {antes - len(lista)} registro(s) "
+                                            f"já confirmado(s) serão pulados; {len(lista)} a enviar.\n"))
+
+    if execucao_id is None:
+        execucao_id = db_manager.criar_execucao(arquivo, cidade_filtro, backlog_filtro, lista.fingerprint(), len(lista))
+        if execucao_id and anterior:
+            db_manager.herdar_itens(execucao_id, anterior)
+            db_manager.descartar_execucao(anterior)
+
+    return (db_manager.DiarioExecucao(execucao_id) if execucao_id else None), lista
+
+def _ajustar_delay(sessao, controlador, resultado, diario, log_textbox, safe_update_gui_cb):
+    """Realimenta o controlador adaptativo com o resultado do envio e aplica o novo delay."""
+    if not controlador or resultado is None: return
+    mudou = controlador.registrar_erro() if resultado == "erro" else controlador.registrar_sucesso()
+    if not mudou: return
+    sessao.delay = controlador.atual
+    motivo = controlador.historico[-1][2]
+    log_textbox.insert("end", _log(f"⏱️ Delay ajustado para {controlador.atual:.2f}s ({motivo}).\n"))
+    safe_update_gui_cb(delay_atual=controlador.resumo())
+    if diario: diario.registrar_delay(controlador.atual, motivo)
+
+def _confirmar(itens, resultado, diario, fila, log_textbox):
+    """Grava o resultado no diário (execução local) ou na fila compartilhada."""
+    if diario:
+        for idx, val in itens: diario.confirmar(idx, val, resultado)
+    if fila and fila.concluir(itens, resultado):
+        log_textbox.insert("end", _log("⚠️ Confirmação sem o item em envio na fila (conferir no site).\n"))
+
+PASTA_METRICAS = "metricas"
+ESPERA_NOVAS_LINHAS = 1.0   # Sondagem da lista (planilha acompanhada) depois do último registro
+
+def _publicar_metricas(medidor, sessao, safe_update_gui_cb, estado):
+    """Envia vazão/percentis/ETA para a tela no máximo uma vez por segundo."""
+    agora = time.time()
+    if agora - estado.get("ultimo", 0) < 1.0: return
+    estado["ultimo"] = agora
+    restantes = max(0, sessao.total - (sessao.indice + 1))
+    safe_update_gui_cb(metricas=medidor.texto_resumo(restantes))
+
+def _exportar_metricas(medidor, diario, sessao, backend, log_textbox, sufixo=""):
+    """Grava CSV/JSON da execução em metricas/ (ao lado do executável)."""
     try:
+        execucao = diario.execucao_id if diario else 0
+        nome = f"execucao_{execucao}_{time.strftime('%Y%m%d_%H%M%S')}{sufixo}"
+        extra = {"execucao_id": execucao, "delay_final": sessao.delay, "total_registros": sessao.total,
+                 "backend": backend.nome, "radar": dict(backend.estado_radar.estatisticas if backend.estado_radar else radar.ESTATISTICAS)}
+        csv_path, _ = medidor.exportar(utils.get_external_path(os.path.join(PASTA_METRICAS, nome)), extra)
+        log_textbox.insert("end", _log(f"📊 Métricas exportadas: {os.path.basename(csv_path)} (+ .json)\n"))
+    except Exception as e:
+        log_textbox.insert("end", _log(f"⚠️ Falha ao exportar métricas: {e}\n"))
+
+def automacao_core(log_textbox, cidade_filtro, backlog_filtro, delay_inicial, safe_configure_buttons_cb, safe_update_gui_cb, execucao_pendente=None, tamanho_lote=1, faixa_delay_auto=None, sessao=None, backend=None, arquivo=None, dados=None, chave_diario=None, fila=None, acompanhar_planilha=False):
+    """
+    Executa o envio dos registros filtrados. 'dados' já filtrados (DataFrame ou
+    preparacao.ListaTrabalho) dispensam a leitura da planilha (trabalhadores do
+    modo paralelo recebem a sua fatia da lista);
+    'chave_diario' separa o diário de cada fatia (padrão: o arquivo).
+    Com 'fila' (fila_trabalho.EstacaoFila) os registros vêm da fila compartilhada
+    entre estações, em pedaços reservados, e a própria fila faz o papel do diário.
+    'acompanhar_planilha' (execução local): as linhas novas que aparecerem na
+    planilha entram no fim da lista e, acabada a lista, o motor espera por
+    elas até ser parado (ESC e PARAR).
+    """
+    sessao = sessao or SessaoAutomacao(delay_inicial)
+    backend = backend or entrada.criar_backend()
+    arquivo = arquivo or ingestao.ORIGEM
+    medidor = metricas.MetricasExecucao()
+    estado_painel = {}
+    diario = None
+    acompanhador = None
+    status_diario = "interrompida"
+    try:
+        backend.preparar()
         carregar_recursos_detecao(log_textbox)
-        utils.DELAY_ATUAL = delay_inicial
+        radar.zerar_estatisticas(backend.estado_radar)
+        sessao.delay = delay_inicial
+        if backend.simulado:
+            log_textbox.insert("end", _log(f"🧪 Simulação (backend '{backend.nome}'): nada será digitado e o diário não é gravado.\n"))
         
-        dados, repetir, msg = utils.ler_e_filtrar_dados(utils.NOME_ARQUIVO_ALVO, cidade_filtro, backlog_filtro, log_textbox)
-        log_textbox.insert("end", _log(f"{msg}\n"))
+        if fila:
+            trabalho = fila.iniciar()
+            repetir = trabalho["total"]
+            log_textbox.insert("end", _log(f"🗂️ Fila #{trabalho['id']} ({trabalho['cidade_filtro']}): {fila.feitos()}/{repetir} feitos. Estação {fila.estacao}.\n"))
+        else:
+            if acompanhar_planilha:
+                import acompanhamento
+                assinatura = ingestao.assinatura(arquivo)
+            if dados is None:
+                dados, _, msg = utils.ler_e_filtrar_dados(arquivo, cidade_filtro, backlog_filtro, log_textbox)
+                log_textbox.insert("end", _log(f"{msg}\n"))
+            # Chaves validadas, normalizadas e sem repetição (uma passada vetorizada)
+            if isinstance(dados, preparacao.ListaTrabalho):
+                lista = dados
+            else:
+                lista = preparacao.preparar_lista(dados)
+                preparacao.registrar_rejeitados(lista, log_textbox)
+            repetir = len(lista)
         
-        if repetir == 0:
+        if repetir == 0 and not (acompanhar_planilha or fila): # A fila vazia se resolve no proximo_lote (pode estar acompanhada)
+            status_diario = "finalizada"
             safe_update_gui_cb(status="Finalizado")
             return
 
-        focar_janela_por_titulo("Excel", log_textbox)
-        garantir_foco_navegador(log_textbox)
+        if not fila:
+            conhecidas = lista.chaves # Inclui os já confirmados que o diário tirar da lista
+            if not backend.simulado:
+                diario, lista = _abrir_diario(sessao, lista, chave_diario or arquivo, cidade_filtro, backlog_filtro, execucao_pendente, log_textbox)
+            valores = lista.valores
+            repetir = len(valores)
+            if acompanhar_planilha:
+                acompanhador = acompanhamento.AcompanhadorPlanilha(arquivo, cidade_filtro, backlog_filtro, conhecidas,
+                                                                   lista.acrescentar, log_textbox, assinatura=assinatura).iniciar()
+        sessao.total = repetir
+
+        # Delay automático: começa no valor escolhido e se ajusta dentro da faixa
+        controlador = None
+        if faixa_delay_auto:
+            controlador = ControladorDelay(delay_inicial, *faixa_delay_auto)
+            sessao.delay = controlador.atual
+            if diario: diario.registrar_delay(controlador.atual, "inicial")
+            safe_update_gui_cb(delay_atual=controlador.resumo())
+            log_textbox.insert("end", _log(f"⏱️ Delay automático ({controlador.minimo:.2f}s a {controlador.maximo:.2f}s).\n"))
+
+        focar_janela_por_titulo("Excel", log_textbox, backend)
+        garantir_foco_navegador(log_textbox, backend)
         
         safe_update_gui_cb(status="Rodando", total_ciclos=repetir)
         
-        for i in range(utils.INDICE_ATUAL_DO_CICLO, repetir):
+        tamanho_lote = max(1, int(tamanho_lote or 1))
+        if tamanho_lote > 1:
+            log_textbox.insert("end", _log(f"📦 Modo lote: {tamanho_lote} registros por colagem.\n"))
+
+        i = sessao.indice
+        aguardando = False
+        while True:
             
-            if getattr(utils, 'CANCELAR_AUTOMACAO', False): 
+            if sessao.cancelado: 
                 log_textbox.insert("end", _log("⛔ Operação cancelada.\n"))
                 break
+            if sessao.pausado:
+                aguardando = False # A pausa troca o status; o aviso de espera volta ao retomar
+                if not lidar_com_erro_e_pausar(sessao, backend, log_textbox, "Pausa Manual", safe_update_gui_cb, safe_configure_buttons_cb):
+                    continue # Cancelado durante a pausa
             
-            utils.INDICE_ATUAL_DO_CICLO = i
-            
-            try:
-                linha = dados.iloc[i]
-                val = ""
-                if 'Waybill No' in dados.columns: val = str(linha['Waybill No']).strip()
-                elif 'Motorista ID' in dados.columns: val = str(linha['Motorista ID']).strip()
-                else: val = str(linha.iloc[0]).strip()
-                
-                if val.lower() == 'nan' or val == '' or val.lower() == 'nat':
-                    log_textbox.insert("end", _log(f"⚠️ Linha {i+1} inválida. Pulando.\n"))
+            # Monta o lote (no modo unitário, um único registro)
+            if fila:
+                lote = fila.proximo_lote(tamanho_lote, sessao, log_textbox)
+                if not lote:
+                    if sessao.cancelado or sessao.pausado: continue # Cancelamento/pausa tratados no topo do laço
+                    break
+                # 'enviando' gravado antes da colagem: se esta estação cair, o lote vai para revisão, não para outra colagem
+                lote = fila.enviando(lote)
+                if not lote: continue
+                progresso = fila.feitos() + len(lote)
+                sessao.indice = progresso - 1
+                if fila.total > repetir: # Linhas novas da planilha acompanhada
+                    repetir = sessao.total = fila.total
+                    safe_update_gui_cb(total_ciclos=repetir)
+            else:
+                if len(valores) > repetir:
+                    # A planilha acompanhada trouxe linhas novas (acrescentadas pela thread do acompanhamento)
+                    log_textbox.insert("end", _log(f"➕ {len(valores) - repetir} registro(s) novo(s) na lista ({len(valores)} no total).\n"))
+                    repetir = sessao.total = len(valores)
+                    if diario: diario.atualizar_total(repetir)
+                    if aguardando: safe_update_gui_cb(status="Rodando")
+                    safe_update_gui_cb(total_ciclos=repetir)
+                    aguardando = False
+                if i >= repetir:
+                    if not acompanhador: break
+                    if not aguardando:
+                        log_textbox.insert("end", _log("⏳ Lista concluída. Aguardando linhas novas da planilha (ESC e PARAR encerram).\n"))
+                        safe_update_gui_cb(status="Aguardando")
+                        aguardando = True
+                    sessao.esperar(ESPERA_NOVAS_LINHAS)
                     continue
-            except Exception as e:
-                log_textbox.insert("end", _log(f"⚠️ Erro dados linha {i+1}: {e}\n"))
-                continue
+                fim = min(i + tamanho_lote, repetir)
+                lote = list(zip(range(i, fim), valores[i:fim]))
+                i, sessao.indice = fim, fim - 1
+                progresso = fim
 
-            log_textbox.insert("end", _log(f"Ciclo {i+1}/{repetir}: {val}\n"))
+            if len(lote) == 1:
+                log_textbox.insert("end", _log(f"Ciclo {lote[0][0]+1}/{repetir}: {lote[0][1]}\n"))
+            else:
+                log_textbox.insert("end", _log(f"Lote {lote[0][0]+1}-{lote[-1][0]+1}/{repetir} ({len(lote)} itens)\n"))
             log_textbox.see("end")
-            safe_update_gui_cb(ciclo_atual=i+1)
+            safe_update_gui_cb(ciclo_atual=progresso)
 
-            while True:
-                if getattr(utils, 'CANCELAR_AUTOMACAO', False): break
-                
-                if utils.PARAR_AUTOMACAO:
-                    if not lidar_com_erro_e_pausar(log_textbox, "Pausa Manual", safe_update_gui_cb, safe_configure_buttons_cb):
-                        break
-                    continue
-
-                # AÇÃO
-                try:
-                    pyperclip.copy(val)
-                    pyautogui.hotkey('ctrl', 'v')
-                    time.sleep(utils.DELAY_ATUAL)
-                    pyautogui.press('enter')
-                except Exception as e:
-                    if not lidar_com_erro_e_pausar(log_textbox, f"Erro Teclado: {e}", safe_update_gui_cb, safe_configure_buttons_cb):
-                        break
-                    continue
+            cron = medidor.novo_ciclo()
+            resultado = enviar_e_verificar(sessao, backend, "\n".join(v for _, v in lote), log_textbox, safe_update_gui_cb, safe_configure_buttons_cb, cron)
+            if resultado is None: break
+            # Lote rejeitado conta o tempo, mas nenhum item: os itens entram no reenvio um a um
+            medidor.registrar(cron, 0 if resultado == "erro" and len(lote) > 1 else len(lote))
+            _publicar_metricas(medidor, sessao, safe_update_gui_cb, estado_painel)
 
-                # --- RADAR OTIMIZADO (VELOCIDADE MÁXIMA) ---
-                # Reduzido de 2.0s para 0.6s. 
-                # Se o erro não aparecer em meio segundo, assumimos sucesso.
-                tempo_limite = time.time() + 0.6
-                tem_erro = False
-                motivo = None
-                
-                while time.time() < tempo_limite:
-                    if utils.PARAR_AUTOMACAO: break 
-                    
-                    tem_erro, motivo = verificar_presenca_erro()
-                    if tem_erro: break
-                    time.sleep(0.05) # Polling ultra-rápido
-
-                if tem_erro:
-                    sucesso_retomada = lidar_com_erro_e_pausar(log_textbox, motivo, safe_update_gui_cb, safe_configure_buttons_cb)
-                    if sucesso_retomada:
-                        log_textbox.insert("end", _log("▶️ Erro tratado. Próximo registro.\n"))
-                        break 
-                    else:
-                        break 
-                
-                break 
+            if resultado == "erro" and len(lote) > 1:
+                # A tela rejeita o lote inteiro: reenvia item a item para isolar o registro com problema
+                log_textbox.insert("end", _log("🔎 Lote com erro. Reenviando item a item para isolar o registro.\n"))
+                for idx, val in lote:
+                    log_textbox.insert("end", _log(f"Ciclo {idx+1}/{repetir}: {val}\n"))
+                    cron = medidor.novo_ciclo()
+                    r = enviar_e_verificar(sessao, backend, val, log_textbox, safe_update_gui_cb, safe_configure_buttons_cb, cron)
+                    if r is None: break
+                    medidor.registrar(cron)
+                    if r == "erro": log_textbox.insert("end", _log(f"▶️ Erro tratado no registro {val}.\n"))
+                    _confirmar([(idx, val)], r, diario, fila, log_textbox)
+                    _ajustar_delay(sessao, controlador, r, diario, log_textbox, safe_update_gui_cb)
+                continue
 
+            if resultado == "erro":
+                log_textbox.insert("end", _log("▶️ Erro tratado. Próximo registro.\n"))
+            _confirmar(lote, resultado, diario, fila, log_textbox)
+            _ajustar_delay(sessao, controlador, resultado, diario, log_textbox, safe_update_gui_cb)
             # Sem sleep extra no final para maximizar velocidade
 
-        if not getattr(utils, 'CANCELAR_AUTOMACAO', False):
+        if not sessao.cancelado:
             log_textbox.insert("end", _log("✅ Finalizado com Sucesso.\n"))
             safe_update_gui_cb(status="Finalizado")
+            status_diario = "finalizada"
         else:
             safe_update_gui_cb(status="Parado")
+            status_diario = "cancelada"
 
     except Exception as e:
         log_textbox.insert("end", _log(f"❌ ERRO CRÍTICO: {e}\n"))
         safe_update_gui_cb(status="Erro")
     finally:
-        focar_janela_por_titulo("Atribuidor", log_textbox)
-        utils.INDICE_ATUAL_DO_CICLO = 0
-        safe_configure_buttons_cb(iniciar_state="normal", continuar_state="disabled")
\ No newline at end of file
+        estatisticas = backend.estado_radar.estatisticas if backend.estado_radar else radar.ESTATISTICAS
+        if estatisticas["varreduras"]:
+            log_textbox.insert("end", _log(f"📡 {radar.resumo_estatisticas(backend.estado_radar)}\n"))
+        if medidor.total_ciclos:
+            safe_update_gui_cb(metricas=medidor.texto_resumo(0))
+            # Trabalhadores paralelos: '_1de4', '_2de4'... (mesmo segundo, arquivos distintos)
+            sufixo = "_" + chave_diario.rsplit("#", 1)[-1].replace("/", "de") if chave_diario and "#" in chave_diario else ""
+            _exportar_metricas(medidor, diario, sessao, backend, log_textbox, sufixo)
+        if acompanhador: acompanhador.parar()
+        if diario: diario.encerrar(status_diario)
+        if fila:
+            try: fila.encerrar()
+            except Exception as e: log_textbox.insert("end", _log(f"⚠️ Falha ao devolver reservas à fila: {e}\n"))
+        db_manager.fechar_conexao() # Conexão desta thread (a thread termina aqui)
+        focar_janela_por_titulo("Atribuidor", log_textbox, backend)
+        sessao.status = {"finalizada": "Finalizado", "cancelada": "Parado"}.get(status_diario, "Erro")
+        safe_configure_buttons_cb(iniciar_state="normal", continuar_state="disabled")
@@ -0,0 +1,11 @@
+"""
+Benchmarks do Atribuidor (rodam sem interface gráfica, inclusive em Linux).
+
+    python -m bench                          # tamanhos padrão, salva em bench_resultados.json
+    python -m bench --linhas 10000,1000000   # tamanhos de planilha
+    python -m bench --comparar base.json     # marca regressões em relação a uma execução anterior
+    python -m bench --somente loop           # vazão máxima do motor contra o alvo simulado (entrada.BackendSimulado)
+    python -m bench --somente fila           # várias estações (processos) na fila compartilhada, sem repetição
+    python -m bench --somente acompanhamento # linhas novas na planilha durante a execução (local e fila)
+    python -m bench --somente inicio         # perfil de importação e tempo até a janela de login (falha acima do orçamento)
+"""
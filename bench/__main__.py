@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+# Roda a partir da raiz do projeto (python -m bench) sem precisar instalar nada
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+# ####################################################################
+# --- EXECUÇÃO E COMPARAÇÃO DOS BENCHMARKS ---
+# ####################################################################
+
+PASTA_DADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados")
+ARQUIVO_RESULTADOS = "bench_resultados.json"
+TAMANHOS_PADRAO = "10000,100000"
+TOLERANCIA_PADRAO = 0.20     # 20% mais lento que a base = regressão
+MINIMO_ABSOLUTO = 0.0005     # Diferenças menores que 0,5 ms são ruído
+
+GRUPOS = ("leitura", "radar", "db", "loop", "fila", "acompanhamento", "inicio")
+
+def _maquina():
+    return {
+        "python": platform.python_version(), "sistema": platform.platform(),
+        "processador": platform.processor() or platform.machine(), "cpus": os.cpu_count(),
+    }
+
+def executar(args):
+    grupos = [g.strip() for g in args.somente.split(",")] if args.somente else list(GRUPOS)
+    saida = {
+        "versao": utils.VERSAO_SISTEMA,
+        "data": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "maquina": _maquina(),
+        "parametros": vars(args),
+        "resultados": {},
+        "detalhes": {},
+    }
+
+    for grupo in grupos:
+        inicio = time.perf_counter()
+        print(f"▶ {grupo}...", flush=True)
+        if grupo == "leitura":
+            from bench import bench_leitura
+            tamanhos = [int(t) for t in args.linhas.split(",") if t.strip()]
+            resultados, detalhes = bench_leitura.executar(args.dados, tamanhos, args.repeticoes)
+        elif grupo == "radar":
+            from bench import bench_radar
+            resultados, detalhes = bench_radar.executar(args.capturas, args.repeticoes * 5)
+        elif grupo == "db":
+            from bench import bench_db
+            resultados, detalhes = bench_db.executar(args.cidades, args.usuarios)
+        elif grupo == "loop":
+            from bench import bench_loop
+            resultados, detalhes = bench_loop.executar(args.dados, args.linhas_loop)
+        elif grupo == "fila":
+            from bench import bench_fila
+            resultados, detalhes = bench_fila.executar(args.dados, args.linhas_loop)
+        elif grupo == "acompanhamento":
+            from bench import bench_acompanhamento
+            resultados, detalhes = bench_acompanhamento.executar(args.dados, args.linhas_loop)
+        elif grupo == "inicio":
+            from bench import bench_inicio
+            resultados, detalhes = bench_inicio.executar(args.aberturas, args.orcamento_inicio)
+        else:
+            print(f"⚠️ Grupo desconhecido: {grupo}")
+            continue
+        saida["resultados"].update(resultados)
+        saida["detalhes"][grupo] = detalhes
+        for nome, valor in sorted(resultados.items()):
+            print(f"   {nome:<45} {valor * 1000:10.2f} ms")
+        print(f"   ({time.perf_counter() - inicio:.1f}s)")
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(saida, f, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados em {args.saida}")
+    return saida
+
+def comparar(base, atual, tolerancia=TOLERANCIA_PADRAO, minimo=MINIMO_ABSOLUTO):
+    """Lista de (nome, base, atual, variação) das medidas que pioraram além da tolerância."""
+    regressoes = []
+    for nome, valor in atual.get("resultados", {}).items():
+        anterior = base.get("resultados", {}).get(nome)
+        if not anterior: continue
+        if valor > anterior * (1 + tolerancia) and valor - anterior > minimo:
+            regressoes.append((nome, anterior, valor, valor / anterior - 1))
+    return regressoes
+
+def imprimir_comparacao(base, atual, tolerancia, minimo):
+    comuns = sorted(set(base.get("resultados", {})) & set(atual.get("resultados", {})))
+    print(f"\n📊 Comparação com {base.get('data', '?')} ({len(comuns)} medidas em comum)")
+    for nome in comuns:
+        a, b = base["resultados"][nome], atual["resultados"][nome]
+        variacao = (b / a - 1) * 100 if a else 0.0
+        print(f"   {nome:<45} {a * 1000:10.2f} → {b * 1000:10.2f} ms ({variacao:+.0f}%)")
+
+    regressoes = comparar(base, atual, tolerancia, minimo)
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} regressão(ões) acima de {tolerancia * 100:.0f}%:")
+        for nome, a, b, v in regressoes:
+            print(f"   {nome}: {a * 1000:.2f} → {b * 1000:.2f} ms (+{v * 100:.0f}%)")
+    else:
+        print("\n✅ Nenhuma regressão.")
+    return regressoes
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench", description="Benchmarks do Atribuidor (sem interface gráfica).")
+    p.add_argument("--linhas", default=TAMANHOS_PADRAO, help="Tamanhos das planilhas sintéticas (ex: 10000,100000,1000000)")
+    p.add_argument("--somente", default="", help=f"Grupos a rodar, separados por vírgula ({', '.join(GRUPOS)})")
+    p.add_argument("--repeticoes", type=int, default=3)
+    p.add_argument("--capturas", default=None, help="Pasta com screenshots gravados para o radar (padrão: tela sintética)")
+    p.add_argument("--linhas-loop", type=int, default=10000, help="Tamanho da planilha do teste de vazão do motor (alvo simulado)")
+    p.add_argument("--cidades", type=int, default=2000)
+    p.add_argument("--aberturas", type=int, default=5, help="Quantas vezes abrir o app para medir o tempo até o login")
+    p.add_argument("--orcamento-inicio", type=float, default=None, help="Tempo máximo (s) até a janela de login (padrão: bench_inicio.ORCAMENTO_LOGIN)")
+    p.add_argument("--usuarios", type=int, default=1000)
+    p.add_argument("--dados", default=PASTA_DADOS, help="Onde guardar as planilhas geradas (reaproveitadas entre execuções)")
+    p.add_argument("--saida", default=ARQUIVO_RESULTADOS)
+    p.add_argument("--comparar", default=None, help="JSON de uma execução anterior para marcar regressões")
+    p.add_argument("--so-comparar", default=None, help="Compara este JSON com --comparar sem rodar nada")
+    p.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    p.add_argument("--minimo", type=float, default=MINIMO_ABSOLUTO, help="Diferença mínima (s) para contar como regressão")
+    args = p.parse_args(argv)
+
+    if args.so_comparar:
+        if not args.comparar: p.error("--so-comparar exige --comparar")
+        with open(args.so_comparar, encoding="utf-8") as f: atual = json.load(f)
+    else:
+        atual = executar(args)
+
+    falhou = False
+    inicio = atual.get("detalhes", {}).get("inicio", {})
+    if inicio.get("dentro_do_orcamento") is False:
+        print(f"\n❌ Início acima do orçamento ({inicio.get('orcamento_login')}s) ou com módulos pesados antes do login: "
+              f"{atual['resultados'].get('inicio.janela_login', 0):.2f}s, {inicio.get('pesados_no_inicio')}")
+        falhou = True
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f: base = json.load(f)
+        if imprimir_comparacao(base, atual, args.tolerancia, args.minimo): falhou = True
+    return 1 if falhou else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
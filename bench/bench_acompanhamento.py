@@ -0,0 +1,112 @@
+import os
+import time
+import tempfile
+import threading
+
+import utils
+import preparacao
+import fila_trabalho
+import acompanhamento
+import automation_logic
+from entrada import BackendSimulado
+from log_execucao import FilaLog
+from sessao import SessaoAutomacao
+from bench.gerar_planilha import gerar_dados, gravar_planilha
+
+# ####################################################################
+# --- ACOMPANHAMENTO DA PLANILHA (LINHAS NOVAS DURANTE A EXECUÇÃO) ---
+# ####################################################################
+#
+# O motor roda contra o alvo simulado com a planilha acompanhada. Terminada a
+# lista, a "exportação" regrava o arquivo com linhas novas no fim; mede o
+# tempo até a última linha nova ser enviada (execução local e fila
+# compartilhada) e confere que nada da lista original foi repetido.
+
+CIDADE = "CAMPINAS"
+BACKLOG = ""
+LINHAS_NOVAS = 500
+INTERVALO = 0.2             # Verificação do arquivo (o padrão do app é acompanhamento.INTERVALO_VERIFICACAO)
+ESTABILIDADE = 0.2
+LIMITE = 120.0              # Segundos para cada etapa antes de desistir
+
+def _esperar(condicao, mensagem):
+    limite = time.perf_counter() + LIMITE
+    while not condicao():
+        if time.perf_counter() > limite: raise RuntimeError(mensagem)
+        time.sleep(0.01)
+
+def _chaves(caminho):
+    dados, _, _ = utils.ler_e_filtrar_dados(caminho, CIDADE, BACKLOG, None)
+    return preparacao.preparar_lista(dados).chaves
+
+def _rodar(caminho, base, estendida, esperados, fila=False):
+    """Roda até enviar a lista inicial, regrava a planilha e espera as linhas novas. Retorna (latência, enviados)."""
+    gravar_planilha(caminho, base)
+    iniciais = _chaves(caminho)
+    backend = BackendSimulado(semente=1, janela_radar=0.0)
+    sessao = SessaoAutomacao(0.0)
+    log = FilaLog()
+    comum = (log, CIDADE, BACKLOG, 0.0, lambda *a, **k: None, lambda *a, **k: None)
+    if fila:
+        alvo = fila_trabalho.automacao_estacao
+        args = comum + ([backend],)
+        kwargs = {"carregar": True, "sessao": sessao, "arquivo": caminho, "acompanhar_planilha": True}
+    else:
+        alvo = automation_logic.automacao_core
+        args = comum
+        kwargs = {"sessao": sessao, "backend": backend, "arquivo": caminho, "acompanhar_planilha": True}
+    t = threading.Thread(target=alvo, args=args, kwargs=kwargs, daemon=True)
+    t.start()
+    try:
+        _esperar(lambda: len(backend.enviados) >= len(iniciais), "A lista inicial não terminou.")
+        time.sleep(INTERVALO * 2) # O acompanhamento já olhou o arquivo sem mudança
+
+        gravar_planilha(caminho, estendida)
+        inicio = time.perf_counter() # A partir do arquivo pronto (a gravação é da exportação)
+        _esperar(lambda: len(backend.enviados) >= esperados, "As linhas novas não foram enviadas.")
+        latencia = time.perf_counter() - inicio
+    finally:
+        sessao.cancelar()
+        t.join(LIMITE)
+
+    if len(backend.enviados) != len(set(backend.enviados)):
+        _, texto, _ = log.drenar(max_itens=10 ** 9)
+        raise RuntimeError(f"Acompanhamento enviou registros repetidos:\n{texto[-2000:]}")
+    return latencia, len(backend.enviados) - len(iniciais)
+
+def executar(pasta, linhas=10000, semente=42):
+    base = gerar_dados(linhas, semente)
+    extra = gerar_dados(LINHAS_NOVAS, semente + 1)
+    estendida = {coluna: base[coluna] + extra[coluna] for coluna in base}
+    resultados, detalhes = {}, {}
+
+    originais = (automation_logic.PASTA_METRICAS, preparacao.PASTA_REJEITADOS, fila_trabalho.CAMINHO_FILA,
+                 acompanhamento.INTERVALO_VERIFICACAO, acompanhamento.ESTABILIDADE)
+    with tempfile.TemporaryDirectory(prefix="bench_acompanhamento_") as tmp:
+        automation_logic.PASTA_METRICAS = os.path.join(tmp, "metricas")
+        preparacao.PASTA_REJEITADOS = os.path.join(tmp, "logs")
+        fila_trabalho.CAMINHO_FILA = os.path.join(tmp, "fila.sqlite")
+        acompanhamento.INTERVALO_VERIFICACAO, acompanhamento.ESTABILIDADE = INTERVALO, ESTABILIDADE
+        caminho = os.path.join(tmp, "atribuicao.xlsx")
+        try:
+            # Custo de uma verificação (releitura + diff pela chave) sem nada novo:
+            # arquivo regravado (cache refeito) e só com o mtime mudado (cache vale pelo hash)
+            gravar_planilha(caminho, estendida)
+            valores = _chaves(caminho)
+            verificador = acompanhamento.AcompanhadorPlanilha(caminho, CIDADE, BACKLOG, valores, lambda v, l, c: None, FilaLog())
+            for nome, mudar in (("regravada", lambda: gravar_planilha(caminho, estendida)), ("mesmo_conteudo", lambda: os.utime(caminho))):
+                mudar()
+                inicio = time.perf_counter()
+                if verificador.verificar(): raise RuntimeError("Verificação sem linhas novas entregou registros.")
+                resultados[f"acompanhamento.verificacao.{nome}"] = time.perf_counter() - inicio
+
+            for nome, fila in (("local", False), ("fila", True)):
+                latencia, novos = _rodar(caminho, base, estendida, len(valores), fila)
+                resultados[f"acompanhamento.{nome}.ate_enviar"] = latencia
+                detalhes[f"{nome}.novos"] = novos
+            detalhes["espera_minima"] = INTERVALO + ESTABILIDADE
+        finally:
+            fila_trabalho.fechar_conexao()
+            (automation_logic.PASTA_METRICAS, preparacao.PASTA_REJEITADOS, fila_trabalho.CAMINHO_FILA,
+             acompanhamento.INTERVALO_VERIFICACAO, acompanhamento.ESTABILIDADE) = originais
+    return resultados, detalhes
@@ -0,0 +1,68 @@
+import os
+import time
+import tempfile
+
+import db_manager
+from indice_cidades import IndiceCidades
+
+# ####################################################################
+# --- CRUD DO db_manager (BANCO TEMPORÁRIO) ---
+# ####################################################################
+
+def _por_operacao(funcao, argumentos):
+    """Tempo médio (s) por chamada de 'funcao' sobre a lista de argumentos."""
+    if not argumentos: return 0.0
+    inicio = time.perf_counter()
+    for args in argumentos: funcao(*args)
+    return (time.perf_counter() - inicio) / len(argumentos)
+
+def _cronometrar_leitura(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes): funcao()
+    return (time.perf_counter() - inicio) / repeticoes
+
+def executar(cidades=2000, usuarios=1000, repeticoes=20):
+    resultados = {}
+    nome_anterior = db_manager.DB_NAME
+    with tempfile.TemporaryDirectory(prefix="bench_db_") as pasta:
+        db_manager.DB_NAME = os.path.join(pasta, "bench.sqlite")
+        try:
+            db_manager.setup_database()
+
+            nomes = [f"CIDADE BENCH {i:05d}" for i in range(cidades)]
+            resultados["db.adicionar_cidade"] = _por_operacao(db_manager.adicionar_cidade, [(n,) for n in nomes])
+            resultados["db.adicionar_cidade_duplicada"] = _por_operacao(db_manager.adicionar_cidade, [(n,) for n in nomes[:200]])
+
+            # Importação em lote (uma transação) com metade de nomes repetidos
+            lote = [(nomes[: cidades // 2] + [f"CIDADE LOTE {i:05d}" for i in range(cidades // 2)],)]
+            resultados["db.adicionar_cidades_em_lote.por_cidade"] = _por_operacao(db_manager.adicionar_cidades_em_lote, lote) / cidades
+
+            resultados["db.listar_cidades"] = _cronometrar_leitura(db_manager.listar_cidades, repeticoes)
+            resultados["db.buscar_nomes_cidades"] = _cronometrar_leitura(db_manager.buscar_nomes_cidades, repeticoes)
+            ids = [c[0] for c in db_manager.listar_cidades()]
+            resultados["db.buscar_nome_cidade_por_id"] = _por_operacao(db_manager.buscar_nome_cidade_por_id, [(str(i),) for i in ids[:500]])
+
+            # Recarga da aba Cadastro/Automação como a GUI faz após cada alteração
+            def recarga_tela():
+                db_manager.obter_cidades()
+                db_manager.listar_usuarios()
+            resultados["db.recarga_tela"] = _cronometrar_leitura(recarga_tela, repeticoes)
+
+            # Busca ao digitar do seletor de cidades (índice de prefixos)
+            resultados["db.indice_cidades.construir"] = _cronometrar_leitura(lambda: IndiceCidades(db_manager.obter_cidades()), repeticoes)
+            indice = IndiceCidades(db_manager.obter_cidades())
+            escolhidas = set(indice.buscar("CIDADE", limite=5))
+            digitados = [(p[:k], escolhidas) for p in ("CIDADE BENCH 001", "LOTE 00", "bench") for k in range(1, len(p) + 1)]
+            resultados["db.indice_cidades.buscar"] = _por_operacao(indice.buscar, digitados)
+
+            logins = [(f"usuario{i:05d}", "senha") for i in range(usuarios)]
+            resultados["db.adicionar_usuario"] = _por_operacao(db_manager.adicionar_usuario, logins)
+            resultados["db.listar_usuarios"] = _cronometrar_leitura(db_manager.listar_usuarios, repeticoes)
+            resultados["db.verificar_credenciais"] = _por_operacao(db_manager.verificar_credenciais, logins[:300])
+
+            resultados["db.excluir_cidade"] = _por_operacao(db_manager.excluir_cidade, [(str(i),) for i in ids[:cidades // 2]])
+            resultados["db.excluir_usuario"] = _por_operacao(db_manager.excluir_usuario, [(u,) for u, _ in logins[:usuarios // 2]])
+        finally:
+            db_manager.fechar_conexao() # Libera o arquivo antes de apagar a pasta
+            db_manager.DB_NAME = nome_anterior
+    return resultados, {"cidades": cidades, "usuarios": usuarios}
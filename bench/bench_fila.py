@@ -0,0 +1,125 @@
+import os
+import time
+import tempfile
+import multiprocessing
+
+import utils
+import preparacao
+import fila_trabalho
+from bench.gerar_planilha import obter_planilha
+
+# ####################################################################
+# --- FILA COMPARTILHADA: VÁRIAS ESTAÇÕES (PROCESSOS) NO MESMO ARQUIVO ---
+# ####################################################################
+#
+# Cada estação é um processo separado com o seu alvo simulado, como PCs
+# diferentes apontando para a mesma fila. Mede a vazão com 1, 2 e 4
+# estações, confere que nenhum valor foi enviado duas vezes e simula uma
+# estação que cai com itens reservados (o prazo vence e outra os retoma) e
+# parte deles já em envio (vão para revisão, ninguém cola de novo).
+
+CIDADE = "CAMPINAS"
+BACKLOG = ""
+ESPERA_SITE = 0.005         # Espera fixa pelo "site" em cada envio
+ESTACOES = (1, 2, 4)
+LEASE_CURTO = 0.5           # Prazo da estação que cai (segundos)
+EM_ENVIO_NA_QUEDA = 3       # Itens que a estação caída já tinha marcado como 'enviando'
+
+def _estacao(caminho_fila, trabalho_id, semente, largada, saida):
+    """Processo de uma estação: espera a largada, roda o motor até a fila esvaziar."""
+    import automation_logic
+    from entrada import BackendSimulado
+    from log_execucao import FilaLog
+    from sessao import SessaoAutomacao
+
+    fila_trabalho.CAMINHO_FILA = caminho_fila
+    automation_logic.PASTA_METRICAS = os.path.join(os.path.dirname(caminho_fila), "metricas")
+    backend = BackendSimulado(semente=semente, janela_radar=ESPERA_SITE)
+    estacao = fila_trabalho.EstacaoFila(trabalho_id)
+    sessao = SessaoAutomacao(0.0)
+    saida.put(None) # Pronto (importações feitas)
+    largada.wait()
+    automation_logic.automacao_core(FilaLog(), CIDADE, BACKLOG, 0.0, lambda *a, **k: None, lambda *a, **k: None,
+                                    sessao=sessao, backend=backend, fila=estacao)
+    saida.put((sessao.status, backend.enviados, estacao.retomados))
+
+def _estacao_caida(caminho_fila, trabalho_id, pronto):
+    """Reserva um pedaço, começa a enviar uma parte e morre sem confirmar, devolver nem renovar."""
+    fila_trabalho.CAMINHO_FILA = caminho_fila
+    estacao = fila_trabalho.EstacaoFila(trabalho_id, duracao_lease=LEASE_CURTO)
+    itens = estacao._reservar(fila_trabalho.TAMANHO_RESERVA)
+    estacao.enviando(itens[:EM_ENVIO_NA_QUEDA])
+    pronto.set()
+    os._exit(0)
+
+def _carregar(caminho_planilha):
+    dados, _, _ = utils.ler_e_filtrar_dados(caminho_planilha, CIDADE, BACKLOG, None)
+    itens = preparacao.preparar_lista(dados).itens()
+    # Fingerprint único por rodada: cada medida abre um trabalho novo
+    trabalho_id, inseridos, _, _ = fila_trabalho.carregar_trabalho(itens, caminho_planilha, CIDADE, BACKLOG, f"bench-{time.time_ns()}")
+    return trabalho_id, inseridos
+
+def _rodar(contexto, caminho_fila, trabalho_id, estacoes, com_queda=False):
+    largada, saida = contexto.Event(), contexto.Queue()
+    if com_queda:
+        pronto = contexto.Event()
+        p = contexto.Process(target=_estacao_caida, args=(caminho_fila, trabalho_id, pronto))
+        p.start()
+        pronto.wait(60)
+        p.join(60)
+    processos = [contexto.Process(target=_estacao, args=(caminho_fila, trabalho_id, k, largada, saida)) for k in range(estacoes)]
+    for p in processos: p.start()
+    for _ in processos: saida.get(timeout=120) # Importações de cada processo fora da medida
+    inicio = time.perf_counter()
+    largada.set()
+    retornos = [saida.get(timeout=600) for _ in processos]
+    duracao = time.perf_counter() - inicio
+    for p in processos: p.join(60)
+
+    enviados = [v for _, env, _ in retornos for v in env]
+    if any(status != "Finalizado" for status, _, _ in retornos):
+        raise RuntimeError(f"Estação terminou como {[s for s, _, _ in retornos]}.")
+    if len(enviados) != len(set(enviados)):
+        raise RuntimeError(f"Fila com {estacoes} estações enviou {len(enviados) - len(set(enviados))} valor(es) repetido(s).")
+    pendentes = fila_trabalho.progresso_trabalho(trabalho_id)
+    if pendentes["livre"] or pendentes["reservado"] or pendentes["enviando"]:
+        raise RuntimeError(f"Itens sobrando na fila: {pendentes}.")
+    revisao = {v for _, v, _ in fila_trabalho.itens_em_revisao(trabalho_id)}
+    if revisao & set(enviados):
+        raise RuntimeError(f"{len(revisao & set(enviados))} item(ns) em revisão foram colados de novo.")
+    return duracao, len(enviados), sum(r for _, _, r in retornos), len(revisao)
+
+def executar(pasta, linhas=10000, semente=42):
+    caminho_planilha = obter_planilha(pasta, linhas, semente)
+    utils.ler_e_filtrar_dados(caminho_planilha, CIDADE, BACKLOG, None) # Aquece o cache da planilha
+    contexto = multiprocessing.get_context("spawn") # Igual ao Windows: processos sem nada herdado
+    resultados, detalhes = {}, {}
+
+    caminho_anterior = fila_trabalho.CAMINHO_FILA
+    with tempfile.TemporaryDirectory(prefix="bench_fila_") as tmp:
+        fila_trabalho.CAMINHO_FILA = os.path.join(tmp, "fila.sqlite")
+        try:
+            base = None
+            for n in ESTACOES:
+                trabalho_id, total = _carregar(caminho_planilha)
+                duracao, enviados, _, _ = _rodar(contexto, fila_trabalho.CAMINHO_FILA, trabalho_id, n)
+                if enviados != total: raise RuntimeError(f"{enviados} de {total} itens enviados com {n} estações.")
+                vazao = enviados / duracao
+                base = base or vazao
+                resultados[f"fila.estacoes{n}.por_item"] = duracao / max(1, enviados)
+                detalhes[f"estacoes{n}.itens_por_segundo"] = round(vazao, 1)
+                detalhes[f"estacoes{n}.escala"] = round(vazao / base, 2)
+
+            # Estação que cai com um pedaço reservado: as outras retomam depois do prazo o que não
+            # chegou a ser colado; o que estava em envio vai para revisão
+            trabalho_id, total = _carregar(caminho_planilha)
+            duracao, enviados, retomados, revisao = _rodar(contexto, fila_trabalho.CAMINHO_FILA, trabalho_id, 2, com_queda=True)
+            if revisao != EM_ENVIO_NA_QUEDA or enviados != total - revisao:
+                raise RuntimeError(f"{enviados} de {total} itens enviados e {revisao} em revisão após a queda de uma estação.")
+            detalhes["queda.retomados"] = retomados
+            detalhes["queda.revisao"] = revisao
+            detalhes["itens"] = total
+        finally:
+            fila_trabalho.fechar_conexao()
+            fila_trabalho.CAMINHO_FILA = caminho_anterior
+    return resultados, detalhes
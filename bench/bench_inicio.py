@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+import subprocess
+
+# ####################################################################
+# --- INÍCIO DO APLICATIVO (PERFIL DE IMPORTAÇÃO E TEMPO ATÉ O LOGIN) ---
+# ####################################################################
+#
+# - Perfil: 'python -X importtime -c "import gui"' num processo limpo; lista
+#   os módulos mais caros e acusa se algum módulo pesado (motor, pandas,
+#   pyautogui...) voltou a ser importado antes do login.
+# - Tempo até o login: abre o main.py com ATRIBUIDOR_MEDIR_INICIO=<arquivo>; o app
+#   grava o marcador assim que a janela de login é desenhada e fecha.
+#   Mede do disparo do processo até o marcador (inclui o interpretador).
+#   Sem monitor no Linux, usa o xvfb-run se existir; senão a medida é pulada.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARCADOR_LOGIN = "JANELA_LOGIN_PRONTA"
+ORCAMENTO_LOGIN = 2.5       # Segundos até a janela de login (mediana das aberturas)
+TEMPO_LIMITE = 60           # Segundos antes de desistir de uma abertura travada
+INTERVALO_SONDAGEM = 0.005 # Segundos entre verificações do arquivo do marcador
+TOP_PERFIL = 15
+
+# Módulos que só podem carregar no caminho da automação (primeiro INICIAR)
+PESADOS_NO_INICIO = ("pandas", "numpy", "cv2", "openpyxl", "pyarrow", "pyautogui",
+                     "pyperclip", "keyboard", "automation_logic", "radar", "entrada")
+
+def perfil_importacao(alvo="gui"):
+    """Lista (módulo, próprio_s, acumulado_s) de 'import <alvo>' e o tempo total (s)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {alvo}"],
+                          cwd=RAIZ, capture_output=True, text=True, timeout=TEMPO_LIMITE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"'import {alvo}' falhou:\n{proc.stderr[-2000:]}")
+
+    # Os filhos aparecem antes do pai: o bloco do alvo vai da última linha de
+    # primeiro nível anterior (fim da inicialização do interpretador) até ele
+    bloco = []
+    for linha in proc.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha: continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|", 2)
+        bloco.append((nome.strip(), int(proprio) / 1e6, int(acumulado) / 1e6))
+        if not nome.startswith("  "):
+            if nome.strip() == alvo: return bloco, bloco[-1][2]
+            bloco = []
+    raise RuntimeError(f"'{alvo}' não aparece no perfil de importação.")
+
+def pesados_importados(modulos):
+    """Módulos pesados (ou submódulos deles) presentes no perfil."""
+    nomes = {m for m, _, _ in modulos}
+    return sorted(p for p in PESADOS_NO_INICIO if p in nomes or any(n.startswith(p + ".") for n in nomes))
+
+def comando_inicio(comando=None):
+    """Comando para abrir o app (main.py por padrão) e, no Linux sem monitor, o prefixo do Xvfb."""
+    comando = list(comando or [sys.executable, os.path.join(RAIZ, "main.py")])
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        xvfb = shutil.which("xvfb-run")
+        if not xvfb: return None, "sem monitor (DISPLAY) e sem xvfb-run"
+        comando = [xvfb, "-a"] + comando
+    return comando, ""
+
+def tempo_ate_login(comando=None, cwd=RAIZ):
+    """
+    Abre o app uma vez e devolve (segundos_ate_o_marcador, segundos_internos).
+    'segundos_internos' é o que o próprio processo mediu desde a primeira linha do main.
+    O marcador vai para um arquivo (o executável '--windowed' não tem stdout).
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_inicio_") as pasta:
+        marcador = os.path.join(pasta, "marcador.txt")
+        env = dict(os.environ, ATRIBUIDOR_MEDIR_INICIO=marcador)
+        with open(os.path.join(pasta, "saida.txt"), "w+", encoding="utf-8", errors="replace") as saida:
+            inicio = time.perf_counter()
+            proc = subprocess.Popen(comando, cwd=cwd, env=env, stdout=saida, stderr=subprocess.STDOUT)
+            try:
+                while time.perf_counter() - inicio < TEMPO_LIMITE:
+                    if os.path.exists(marcador):
+                        externo = time.perf_counter() - inicio
+                        proc.wait(TEMPO_LIMITE) # O app fecha sozinho depois de gravar o marcador
+                        with open(marcador, encoding="utf-8") as f: partes = f.read().split()
+                        return externo, float(partes[1]) if len(partes) > 1 else None
+                    if proc.poll() is not None: break
+                    time.sleep(INTERVALO_SONDAGEM)
+                saida.seek(0)
+                raise RuntimeError(f"O app não chegou à janela de login:\n{saida.read()[-2000:]}")
+            finally:
+                if proc.poll() is None: proc.kill()
+                proc.wait()
+
+def medir_aberturas(comando, aberturas, cwd=RAIZ):
+    """Abre o app 'aberturas' vezes; devolve a lista de tempos externos (s)."""
+    return [tempo_ate_login(comando, cwd)[0] for _ in range(aberturas)]
+
+def executar(aberturas=5, orcamento=None):
+    orcamento = ORCAMENTO_LOGIN if orcamento is None else orcamento
+    resultados, detalhes = {}, {"orcamento_login": orcamento}
+
+    modulos, total = perfil_importacao("gui")
+    resultados["inicio.importar_gui"] = total
+    caros = sorted(modulos, key=lambda m: m[2], reverse=True)[:TOP_PERFIL]
+    detalhes["perfil_importacao"] = [{"modulo": m, "proprio": round(p, 4), "acumulado": round(a, 4)} for m, p, a in caros]
+    detalhes["pesados_no_inicio"] = pesados_importados(modulos)
+    print(f"   Perfil de 'import gui' ({total * 1000:.0f} ms, {len(modulos)} módulos):")
+    for m, p, a in caros:
+        print(f"      {a * 1000:8.1f} ms acum. {p * 1000:8.1f} ms próprio  {m}")
+    if detalhes["pesados_no_inicio"]:
+        print(f"   ⚠️ Importados antes do login: {', '.join(detalhes['pesados_no_inicio'])}")
+
+    comando, motivo = comando_inicio()
+    if comando is None:
+        print(f"   ⚠️ Tempo até o login não medido: {motivo}")
+        detalhes["login_pulado"] = motivo
+    else:
+        tempos = medir_aberturas(comando, aberturas)
+        resultados["inicio.janela_login"] = statistics.median(tempos)
+        detalhes["login_tempos"] = [round(t, 3) for t in tempos]
+
+    detalhes["dentro_do_orcamento"] = (resultados.get("inicio.janela_login", 0.0) <= orcamento
+                                       and not detalhes["pesados_no_inicio"])
+    return resultados, detalhes
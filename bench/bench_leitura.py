@@ -0,0 +1,87 @@
+import os
+import shutil
+
+import utils
+import filtros
+import ingestao
+from bench.comum import cronometrar
+from bench.gerar_planilha import obter_planilha, gerar_planilha
+
+# ####################################################################
+# --- LEITURA E FILTRAGEM (ler_e_filtrar_dados NOS DOIS MOTORES) ---
+# ####################################################################
+
+FILTROS = [
+    ("cidade", "SAO PAULO", ""),
+    ("cidade_backlog", "CAMPINAS", "1,2,>=7"),
+    ("exclusao", "!SAO PAULO", "0-3"),
+]
+
+# Pasta com uma exportação por rota (ingestao.py): sequencial x um processo por arquivo
+PLANILHAS_PASTA = 4
+
+def _ler(caminho, cidade, backlog, motor):
+    df, total, msg = utils.ler_e_filtrar_dados(caminho, cidade, backlog, None, motor=motor)
+    if msg.startswith("Erro") or msg.startswith("Planilha"):
+        raise RuntimeError(msg)
+    return total
+
+def executar(pasta, tamanhos, repeticoes=3, semente=42):
+    resultados, detalhes = {}, {}
+    for linhas in tamanhos:
+        caminho = obter_planilha(pasta, linhas, semente)
+        pasta_cache = os.path.join(os.path.dirname(caminho), utils.PASTA_CACHE)
+        detalhes[f"tamanho_arquivo.{linhas}"] = os.path.getsize(caminho)
+
+        # Cache frio: cada repetição apaga o cache e lê o Excel inteiro
+        def frio():
+            shutil.rmtree(pasta_cache, ignore_errors=True)
+            return _ler(caminho, *FILTROS[0][1:], "cache")
+        resultados[f"leitura.cache_frio.{linhas}"], _ = cronometrar(frio, 1 if linhas >= 500000 else repeticoes)
+
+        for nome, cidade, backlog in FILTROS:
+            t, total = cronometrar(lambda: _ler(caminho, cidade, backlog, "cache"), repeticoes)
+            resultados[f"leitura.cache_quente.{nome}.{linhas}"] = t
+            detalhes[f"registros.{nome}.{linhas}"] = total
+
+        # Streaming relê o Excel a cada chamada: uma repetição basta nos tamanhos grandes
+        nome, cidade, backlog = FILTROS[1]
+        t, total = cronometrar(lambda: _ler(caminho, cidade, backlog, "streaming"), 1 if linhas >= 100000 else repeticoes)
+        resultados[f"leitura.streaming.{nome}.{linhas}"] = t
+        if total != detalhes[f"registros.{nome}.{linhas}"]:
+            raise RuntimeError(f"Motores divergem em {linhas} linhas: streaming={total}, cache={detalhes[f'registros.{nome}.{linhas}']}")
+
+        # Só o filtro, com o DataFrame já em memória
+        df = utils.carregar_planilha_cache(caminho)
+        for nome, cidade, backlog in FILTROS:
+            mascara = filtros.compilar_filtro(filtros.montar_spec(cidade, backlog))
+            resultados[f"filtro.{nome}.{linhas}"], _ = cronometrar(lambda: filtros.aplicar_spec(df, mascara), repeticoes)
+
+    _pasta(pasta, min(tamanhos), semente, resultados, detalhes)
+    return resultados, detalhes
+
+def _pasta(pasta, linhas, semente, resultados, detalhes):
+    """Cache frio em todas: mede o parse dos arquivos, que é o que se divide entre os núcleos."""
+    pasta_rotas = os.path.join(pasta, f"rotas_{PLANILHAS_PASTA}x{linhas}_{semente}")
+    for k in range(PLANILHAS_PASTA):
+        caminho = os.path.join(pasta_rotas, f"rota_{k + 1:02d}.xlsx")
+        if not os.path.exists(caminho): gerar_planilha(caminho, linhas, semente + k)
+    spec = filtros.montar_spec(*FILTROS[1][1:])
+    processos = max(2, min(PLANILHAS_PASTA, os.cpu_count() or 1)) # Pelo menos 2: o pool é exercitado mesmo com 1 núcleo
+
+    def ler(n):
+        shutil.rmtree(os.path.join(pasta_rotas, utils.PASTA_CACHE), ignore_errors=True)
+        df, msg = ingestao.ler_origem(pasta_rotas, spec, None, processos=n)
+        if msg.startswith("Erro") or msg.startswith("Planilha"): raise RuntimeError(msg)
+        return df
+    t_seq, seq = cronometrar(lambda: ler(1), 1)
+    t_par, par = cronometrar(lambda: ler(processos), 1)
+    if not seq.equals(par):
+        raise RuntimeError(f"Leitura da pasta diverge: sequencial={len(seq)}, {processos} processos={len(par)} registros.")
+    resultados[f"leitura.pasta.sequencial.{PLANILHAS_PASTA}x{linhas}"] = t_seq
+    resultados[f"leitura.pasta.paralela.{PLANILHAS_PASTA}x{linhas}"] = t_par
+    detalhes["pasta.processos"] = processos
+    detalhes["pasta.processos_auto"] = ingestao._numero_processos(PLANILHAS_PASTA) # O que o app escolheria aqui
+    detalhes["pasta.cpus"] = os.cpu_count()
+    detalhes["pasta.registros"] = len(par)
+    detalhes["pasta.aceleracao"] = round(t_seq / t_par, 2) if t_par else 0
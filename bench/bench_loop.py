@@ -0,0 +1,104 @@
+import os
+import time
+import shutil
+import tempfile
+
+import utils
+import radar
+import paralelo
+import preparacao
+import automation_logic
+from entrada import BackendSimulado, DisplaysVirtuais
+from log_execucao import FilaLog
+from sessao import SessaoAutomacao
+from bench.gerar_planilha import obter_planilha
+
+# ####################################################################
+# --- VAZÃO MÁXIMA DO MOTOR (automacao_core CONTRA O ALVO SIMULADO) ---
+# ####################################################################
+#
+# Delay zero e janela de radar zero: o que sobra é o custo do próprio
+# motor (lote, diário, métricas, log, verificação de erro).
+
+CIDADE = "SAO PAULO"
+BACKLOG = ""
+
+# Modo paralelo: cidade menor e uma espera fixa pelo "site" em cada envio
+CIDADE_PARALELO = "CAMPINAS"
+ESPERA_SITE = 0.005
+TRABALHADORES = (1, 2, 4)
+
+def _rodar(caminho, tamanho_lote, taxa_erro, radar_visual):
+    backend = BackendSimulado(taxa_erro=taxa_erro, semente=1, radar_visual=radar_visual, janela_radar=0.0)
+    sessao = SessaoAutomacao(0.0)
+    log = FilaLog()
+    inicio = time.perf_counter()
+    automation_logic.automacao_core(log, CIDADE, BACKLOG, 0.0, lambda *a, **k: None, lambda *a, **k: None,
+                                    tamanho_lote=tamanho_lote, sessao=sessao, backend=backend, arquivo=caminho)
+    duracao = time.perf_counter() - inicio
+    if sessao.status != "Finalizado":
+        _, texto, _ = log.drenar(max_itens=10 ** 9)
+        raise RuntimeError(f"Execução simulada terminou como '{sessao.status}':\n{texto[-2000:]}")
+    return duracao, backend
+
+def _rodar_paralelo(caminho, backends):
+    sessao = SessaoAutomacao(0.0)
+    log = FilaLog()
+    inicio = time.perf_counter()
+    paralelo.automacao_paralela(log, CIDADE_PARALELO, BACKLOG, 0.0, lambda *a, **k: None, lambda *a, **k: None,
+                                backends, sessao=sessao, arquivo=caminho)
+    duracao = time.perf_counter() - inicio
+    if sessao.status != "Finalizado":
+        _, texto, _ = log.drenar(max_itens=10 ** 9)
+        raise RuntimeError(f"Execução paralela terminou como '{sessao.status}':\n{texto[-2000:]}")
+    return duracao
+
+def _paralelo(caminho, resultados, detalhes):
+    """Vazão com N alvos simulados (escala com N enquanto a espera pelo site domina o ciclo)."""
+    base = None
+    for n in TRABALHADORES:
+        backends = paralelo.criar_backends("simulado", n, {"janela_radar": ESPERA_SITE})
+        duracao = _rodar_paralelo(caminho, backends)
+        enviados = [v for b in backends for v in b.enviados]
+        if len(enviados) != len(set(enviados)):
+            raise RuntimeError(f"Modo paralelo ({n}) enviou registros repetidos.")
+        vazao = len(enviados) / duracao
+        base = base or vazao
+        resultados[f"loop.paralelo{n}.por_item"] = duracao / max(1, len(enviados))
+        detalhes[f"paralelo{n}.itens_por_segundo"] = round(vazao, 1)
+        detalhes[f"paralelo{n}.escala"] = round(vazao / base, 2)
+
+    # Mesmo teste com displays virtuais de verdade (Linux com Xvfb + xdotool)
+    if shutil.which("Xvfb") and shutil.which("xdotool"):
+        n = max(TRABALHADORES)
+        with DisplaysVirtuais(n) as displays:
+            backends = paralelo.criar_backends("xdotool", n, {"janela_radar": ESPERA_SITE}, displays=displays)
+            duracao = _rodar_paralelo(caminho, backends)
+        detalhes[f"xvfb{n}.segundos"] = round(duracao, 2)
+    else:
+        detalhes["xvfb"] = "Xvfb/xdotool não instalados"
+
+def executar(pasta, linhas=10000, semente=42):
+    caminho = obter_planilha(pasta, linhas, semente)
+    utils.ler_e_filtrar_dados(caminho, CIDADE, BACKLOG, None) # Aquece o cache da planilha
+    resultados, detalhes = {}, {}
+
+    pasta_metricas, pasta_rejeitados = automation_logic.PASTA_METRICAS, preparacao.PASTA_REJEITADOS
+    with tempfile.TemporaryDirectory(prefix="bench_loop_") as tmp:
+        automation_logic.PASTA_METRICAS = os.path.join(tmp, "metricas")
+        preparacao.PASTA_REJEITADOS = os.path.join(tmp, "logs")
+        try:
+            for nome, lote, taxa, visual in [("unitario", 1, 0.0, False), ("lote10", 10, 0.0, False),
+                                             ("erros", 1, 0.02, False), ("radar_visual", 1, 0.02, True)]:
+                duracao, backend = _rodar(caminho, lote, taxa, visual)
+                enviados = len(backend.enviados)
+                resultados[f"loop.{nome}.por_item"] = duracao / max(1, enviados)
+                detalhes[f"{nome}.itens_por_segundo"] = round(enviados / duracao, 1) if duracao else 0
+                detalhes[f"{nome}.enviados"] = enviados
+                detalhes[f"{nome}.erros"] = len(backend.erros)
+            _paralelo(caminho, resultados, detalhes)
+        finally:
+            automation_logic.PASTA_METRICAS = pasta_metricas
+            preparacao.PASTA_REJEITADOS = pasta_rejeitados
+            radar.reiniciar_portao()
+    return resultados, detalhes
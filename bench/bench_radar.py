@@ -0,0 +1,205 @@
+import os
+import itertools
+import numpy as np
+
+import utils
+import radar
+import entrada
+from bench.comum import cronometrar
+
+# ####################################################################
+# --- RADAR (CAPTURA SIMULADA COM TELAS GRAVADAS) ---
+# ####################################################################
+#
+# O radar.capturar_tela é trocado por uma "tela gravada" que devolve
+# screenshots do disco (ou telas sintéticas), então a mesma varredura do
+# radar.varrer() roda sem monitor. O template erro_baixada.png pode ser
+# plantado na tela para medir o caminho com detecção.
+#
+# O radar por título do modo paralelo (popup dono da janela alvo, lido pelo
+# user32) roda com um user32 simulado cujo popup aparece e some junto com o
+# do entrada.BackendSimulado, passando pelo verificar_presenca_erro do motor.
+
+TEMPLATE_ERRO = "erro_baixada.png"
+TITULO_JANELA = "Sistema - Google Chrome"
+TITULO_POPUP = "Mensagem da página da web"
+RESOLUCAO_PADRAO = (1080, 1920)
+POSICOES_POR_TELA = 8       # Posições sorteadas para o template em cada tela
+
+def tela_sintetica(altura, largura, semente=7):
+    """Tela parecida com um navegador: barras, painéis, linhas de tabela e texto (ruído)."""
+    rng = np.random.default_rng(semente)
+    tela = np.full((altura, largura), 243, dtype=np.uint8)
+    tela[:90, :] = 60                                        # Barra do navegador
+    tela[90:, :260] = 225                                    # Menu lateral
+    for y in range(140, altura - 40, 36):                    # Linhas de tabela
+        tela[y, 280:largura - 40] = 200
+        for x in range(300, largura - 200, 180):
+            w = int(rng.integers(40, 150))
+            tela[y + 10:y + 24, x:x + w] = rng.integers(40, 120, size=(14, w), dtype=np.uint8)
+    return tela
+
+def carregar_telas(pasta=None, resolucao=RESOLUCAO_PADRAO):
+    """Screenshots gravados (PNG/JPG da pasta, em cinza) ou uma tela sintética."""
+    telas = []
+    if pasta and os.path.isdir(pasta):
+        for nome in sorted(os.listdir(pasta)):
+            if nome.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")):
+                img = radar._ler_cinza(os.path.join(pasta, nome))
+                if img is not None: telas.append(img)
+    return telas or [tela_sintetica(*resolucao)]
+
+def plantar(tela, template, semente=3):
+    """Cópia da tela com o template colado em uma posição aleatória."""
+    rng = np.random.default_rng(semente)
+    th, tw = template.shape
+    y = int(rng.integers(0, tela.shape[0] - th))
+    x = int(rng.integers(0, tela.shape[1] - tw))
+    copia = tela.copy()
+    copia[y:y + th, x:x + tw] = template
+    return copia
+
+class TelaGravada:
+    """Substitui radar.capturar_tela, devolvendo os quadros em sequência (em loop)."""
+    def __init__(self, quadros):
+        self._ciclo = itertools.cycle(quadros)
+        self._original = None
+
+    def capturar(self, regiao=None):
+        tela = next(self._ciclo)
+        if regiao:
+            x, y, w, h = regiao
+            tela = tela[y:y + h, x:x + w]
+        return tela
+
+    def __enter__(self):
+        self._original = radar.capturar_tela
+        radar.capturar_tela = self.capturar
+        return self
+
+    def __exit__(self, *exc):
+        radar.capturar_tela = self._original
+
+class User32Simulado:
+    """
+    GetWindow/IsWindowVisible/GetWindowText* como no user32 do Windows, para uma
+    janela 'hwnd' cujo popup habilitado existe enquanto o do 'alvo' está visível.
+    """
+    def __init__(self, alvo, hwnd):
+        self.alvo, self.hwnd, self.popup = alvo, hwnd, hwnd + 1
+
+    def GetWindow(self, hwnd, comando):
+        if comando != entrada.GW_ENABLEDPOPUP or hwnd != self.hwnd: return None
+        return self.popup if self.alvo._popup_visivel() else hwnd # Sem popup habilitado: a própria janela
+
+    def IsWindowVisible(self, hwnd):
+        return hwnd == self.popup and self.alvo._popup_visivel()
+
+    def GetWindowTextLengthW(self, hwnd):
+        return len(TITULO_POPUP) if hwnd == self.popup else 0
+
+    def GetWindowTextW(self, hwnd, buffer, tamanho):
+        buffer.value = (TITULO_POPUP if hwnd == self.popup else "")[:tamanho - 1]
+        return len(buffer.value)
+
+class _DesktopSoTitulo(entrada._BackendDesktop):
+    """Backend de desktop do modo paralelo com o radar visual desligado (só o título conta)."""
+    def varrer_tela(self):
+        return None
+
+def _titulo_popup(repeticoes):
+    """Popup da janela alvo detectado pelo título (sem popup, nada é acusado). Retorna (tempo por leitura, detalhes)."""
+    import automation_logic
+    alvo = entrada.BackendSimulado(taxa_erro=1.0)
+    janela = entrada.JanelaSimulada(TITULO_JANELA, *RESOLUCAO_PADRAO[::-1])
+    janela._hWnd = 0x1000
+    backend = _DesktopSoTitulo(janela_alvo=janela)
+
+    anterior = entrada.USER32
+    entrada.USER32 = User32Simulado(alvo, janela._hWnd)
+    try:
+        antes = automation_logic.verificar_presenca_erro(backend)
+        alvo.copiar("BR123"); alvo.colar(); alvo.confirmar() # O site abre o alerta
+        durante = automation_logic.verificar_presenca_erro(backend)
+        t, titulo = cronometrar(backend.titulo_ativo, repeticoes)
+        alvo.erro_resolvido()
+        depois = automation_logic.verificar_presenca_erro(backend)
+    finally:
+        entrada.USER32 = anterior
+
+    if antes[0] or depois[0] or not durante[0] or titulo != TITULO_POPUP:
+        raise RuntimeError(f"Radar por título do popup: antes={antes}, durante={durante}, depois={depois}, título={titulo!r}.")
+    return t, {"titulo_popup.detectou": durante[1]}
+
+def _varrer_com_portao_reiniciado():
+    radar.reiniciar_portao() # Como em enviar_e_verificar: primeira varredura após o ENTER
+    return radar.varrer()
+
+def _busca_ingenua(tela, template, confianca):
+    """Referência: matchTemplate em resolução cheia (o que o locateOnScreen fazia por imagem)."""
+    import cv2
+    return np.nanmax(cv2.matchTemplate(tela, template, cv2.TM_CCOEFF_NORMED)) >= confianca
+
+def executar(pasta_capturas=None, repeticoes=20):
+    banco = radar.BancoTemplates([utils.resource_path("assets")])
+    if TEMPLATE_ERRO not in banco.templates:
+        raise RuntimeError(f"Template '{TEMPLATE_ERRO}' não encontrado em assets/.")
+    tpl = banco.templates[TEMPLATE_ERRO]
+    template = tpl.niveis[0]
+
+    limpas = carregar_telas(pasta_capturas)
+    com_erro = [plantar(t, template, semente=k) for t in limpas for k in range(POSICOES_POR_TELA)]
+    resultados, detalhes = {}, {"telas": len(limpas), "resolucao": "x".join(map(str, limpas[0].shape[::-1]))}
+
+    radar_anterior = (radar.BANCO, radar.REGIAO_RADAR, radar.PORTAO_ATIVO)
+    radar.BANCO, radar.REGIAO_RADAR = banco, None
+    try:
+        for portao in (True, False):
+            radar.PORTAO_ATIVO = portao
+            sufixo = "portao" if portao else "sem_portao"
+
+            # Tela limpa e parada (caso comum: ENTER aceito, nada mudou)
+            with TelaGravada(limpas):
+                radar.reiniciar_portao()
+                radar.varrer()
+                t, achou = cronometrar(radar.varrer, repeticoes)
+            resultados[f"radar.limpa_estatica.{sufixo}"] = t
+            detalhes[f"falso_positivo.{sufixo}"] = achou is not None
+
+            # Primeira varredura depois do envio (portão sem referência = busca completa)
+            with TelaGravada(limpas):
+                t, achou = cronometrar(_varrer_com_portao_reiniciado, repeticoes)
+            resultados[f"radar.limpa_primeira.{sufixo}"] = t
+
+            # Popup de erro aparecendo sobre uma tela que estava limpa
+            def aparece_erro():
+                with TelaGravada(limpas):
+                    radar.reiniciar_portao()
+                    radar.varrer()
+                with TelaGravada(com_erro):
+                    return radar.varrer()
+            t, _ = cronometrar(aparece_erro, repeticoes)
+            resultados[f"radar.erro_aparece.{sufixo}"] = t
+
+            # Taxa de detecção em todas as posições plantadas
+            achados = 0
+            for i, tela in enumerate(com_erro):
+                radar.reiniciar_portao()
+                radar.varrer_imagem(limpas[i // POSICOES_POR_TELA], banco)
+                achados += radar.varrer_imagem(tela, banco) == TEMPLATE_ERRO
+            detalhes[f"detectou.{sufixo}"] = achados / len(com_erro)
+
+        resultados["radar.ingenua.limpa"], _ = cronometrar(lambda: _busca_ingenua(limpas[0], template, tpl.confianca), repeticoes)
+        resultados["radar.ingenua.erro"], _ = cronometrar(lambda: _busca_ingenua(com_erro[0], template, tpl.confianca), repeticoes)
+        resultados["radar.titulo_popup"], extra = _titulo_popup(repeticoes)
+        detalhes.update(extra)
+    finally:
+        radar.BANCO, radar.REGIAO_RADAR, radar.PORTAO_ATIVO = radar_anterior
+        radar.reiniciar_portao()
+        radar.zerar_estatisticas()
+
+    if any(v < 1.0 for k, v in detalhes.items() if k.startswith("detectou.")):
+        raise RuntimeError(f"Radar não detectou o template plantado: {detalhes}")
+    if any(v for k, v in detalhes.items() if k.startswith("falso_positivo.")):
+        raise RuntimeError(f"Radar acusou erro em tela limpa: {detalhes}")
+    return resultados, detalhes
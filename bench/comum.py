@@ -0,0 +1,10 @@
+import time
+
+def cronometrar(funcao, repeticoes=3):
+    """Executa 'funcao' N vezes e retorna (melhor tempo em segundos, último retorno)."""
+    melhor, retorno = float("inf"), None
+    for _ in range(max(1, repeticoes)):
+        inicio = time.perf_counter()
+        retorno = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, retorno
@@ -0,0 +1,99 @@
+import os
+import numpy as np
+
+# ####################################################################
+# --- GERADOR DE PLANILHAS SINTÉTICAS (MESMO LAYOUT DO atribuicao.xlsx) ---
+# ####################################################################
+#
+# Distribuições aproximadas de um relatório real:
+#  - Cidades com cauda longa (Zipf): poucas cidades concentram a maioria.
+#  - Backlog quase sempre baixo (geométrica), com alguns atrasos grandes.
+#  - Maioria "recebido no DS", o resto em outros status.
+#  - Uma fração pequena de Waybills vazios e duplicados.
+
+COLUNAS = [
+    "Waybill No", "Scan Type", "Destination City", "Backlog", "Station",
+    "Service Type", "Weight(kg)", "Scan Time", "Operator", "Remark",
+]
+
+CIDADES_BASE = [
+    "SAO PAULO", "CAMPINAS", "SANTOS", "GUARULHOS", "OSASCO", "SOROCABA", "JUNDIAI",
+    "RIBEIRAO PRETO", "PIRACICABA", "BAURU", "LIMEIRA", "FRANCA", "TAUBATE", "MARILIA",
+    "SAO CARLOS", "ARARAQUARA", "AMERICANA", "INDAIATUBA", "BARUERI", "COTIA",
+    "ITU", "SUMARE", "HORTOLANDIA", "PRAIA GRANDE", "SAO VICENTE", "GUARUJA",
+    "MOGI DAS CRUZES", "SAO JOSE DOS CAMPOS", "JACAREI", "SANTO ANDRE",
+]
+SCAN_TYPES = ["recebido no DS", "(recebido no DS)", "saiu para entrega", "devolvido", "em transferencia"]
+PESOS_SCAN = [0.62, 0.08, 0.18, 0.05, 0.07]
+SERVICOS = ["STANDARD", "EXPRESSO", "ECONOMICO"]
+
+PROPORCAO_VAZIOS = 0.005
+PROPORCAO_DUPLICADOS = 0.003
+
+def nomes_cidades(quantidade):
+    """As cidades base seguidas de nomes sintéticos até completar 'quantidade'."""
+    nomes = list(CIDADES_BASE[:quantidade])
+    nomes += [f"CIDADE {i:04d}" for i in range(len(nomes), quantidade)]
+    return nomes
+
+def gerar_dados(linhas, semente=42, cidades=200):
+    """Colunas (listas) com 'linhas' registros. Determinístico pela 'semente'."""
+    rng = np.random.default_rng(semente)
+    nomes = np.array(nomes_cidades(cidades), dtype=object)
+
+    pesos = 1.0 / np.arange(1, cidades + 1) ** 1.1
+    idx_cidade = rng.choice(cidades, size=linhas, p=pesos / pesos.sum())
+    backlog = np.minimum(rng.geometric(0.35, size=linhas) - 1, 60)
+    scan = rng.choice(len(SCAN_TYPES), size=linhas, p=PESOS_SCAN)
+
+    waybills = np.array([f"BR{n:013d}" for n in rng.integers(10 ** 12, 10 ** 13, size=linhas)], dtype=object)
+    dup = rng.random(linhas) < PROPORCAO_DUPLICADOS
+    if dup.any(): waybills[dup] = waybills[rng.integers(0, linhas, size=int(dup.sum()))]
+    waybills[rng.random(linhas) < PROPORCAO_VAZIOS] = None
+
+    # Caixa/espaços variados como no relatório exportado (o filtro normaliza)
+    cidades_txt = nomes[idx_cidade].copy()
+    baguncadas = rng.random(linhas) < 0.1
+    cidades_txt[baguncadas] = [f" {c.title()} " for c in cidades_txt[baguncadas]]
+
+    base_ts = np.datetime64("2025-01-01T06:00:00")
+    horarios = (base_ts + rng.integers(0, 30 * 86400, size=linhas).astype("timedelta64[s]")).astype(str)
+
+    return {
+        "Waybill No": waybills.tolist(),
+        "Scan Type": [SCAN_TYPES[i] for i in scan],
+        "Destination City": cidades_txt.tolist(),
+        "Backlog": backlog.tolist(),
+        "Station": [f"DS-{i % 40:02d}" for i in idx_cidade],
+        "Service Type": [SERVICOS[i] for i in rng.choice(3, size=linhas, p=[0.7, 0.2, 0.1])],
+        "Weight(kg)": np.round(rng.lognormal(0.0, 0.8, size=linhas), 2).tolist(),
+        "Scan Time": [h.replace("T", " ") for h in horarios],
+        "Operator": [f"OP{i:03d}" for i in rng.integers(0, 250, size=linhas)],
+        "Remark": [None] * linhas,
+    }
+
+def gerar_planilha(caminho, linhas, semente=42, cidades=200):
+    """Grava o .xlsx em modo write-only (memória constante, viável para 1M linhas)."""
+    return gravar_planilha(caminho, gerar_dados(linhas, semente, cidades))
+
+def gravar_planilha(caminho, dados):
+    """Grava as colunas 'dados' (mesmo formato de gerar_dados) num .xlsx, trocando o arquivo de uma vez."""
+    from openpyxl import Workbook
+
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(COLUNAS)
+    for linha in zip(*(dados[c] for c in COLUNAS)):
+        ws.append(linha)
+    temporario = caminho + ".tmp"
+    wb.save(temporario)
+    os.replace(temporario, caminho) # Nunca deixa uma planilha pela metade no lugar da final
+    return caminho
+
+def obter_planilha(pasta, linhas, semente=42):
+    """Reaproveita a planilha já gerada para (linhas, semente), se existir."""
+    caminho = os.path.join(pasta, f"atribuicao_{linhas}_{semente}.xlsx")
+    if not os.path.exists(caminho):
+        gerar_planilha(caminho, linhas, semente)
+    return caminho
@@ -1,53 +1,94 @@
 import PyInstaller.__main__
 import os
+import json
+import time
+import argparse
+import statistics
 import customtkinter
 import CTkMessagebox
 
 # --- CONFIGURAÇÕES DO BUILD ---
 NOME_EXECUTAVEL = "Atribuidor"
-SCRIPT_PRINCIPAL = "main.py" 
+SCRIPT_PRINCIPAL = "main.py"
 # Caminho do ícone dentro da pasta assets
-ICONE = os.path.join("assets", "icone.ico") 
+ICONE = os.path.join("assets", "icone.ico")
+# Imagem exibida enquanto o executável descompacta/carrega (PNG; opcional)
+SPLASH = os.path.join("assets", "splash.png")
+PASTA_DIST = "dist"
+RELATORIO = os.path.join(PASTA_DIST, "relatorio_build.json")
+ABERTURAS_PADRAO = 5
+
+# --- PERFIS DE BUILD ---
+# onefile: um único .exe (original). Cada abertura descompacta o pacote inteiro
+#          (OpenCV incluso) numa pasta temporária antes de mostrar o login.
+# onedir:  pasta com o .exe e as bibliotecas já extraídas; abre sem descompactar.
+# rapido:  onedir + exclusões abaixo + dependências pelos hooks do PyInstaller
+#          em vez de '--collect-all' (menos arquivos para o Windows abrir).
+PERFIS = {
+    "onefile": {"modo": "onefile", "enxuto": False},
+    "onedir":  {"modo": "onedir",  "enxuto": False},
+    "rapido":  {"modo": "onedir",  "enxuto": True},
+}
+PERFIL_PADRAO = "onefile"
+
+# Módulos que o app nunca usa: testes, ferramentas de build e backends opcionais
+# de pandas/numpy (gráficos, HTML, SQL) e interfaces Qt puxadas por dependências.
+EXCLUSOES = [
+    "pandas.tests", "numpy.tests", "numpy.f2py", "numpy.distutils",
+    "pandas.plotting._matplotlib", "matplotlib", "scipy",
+    "sqlalchemy", "bs4", "lxml", "html5lib", "jinja2", "IPython",
+    "pytest", "test", "tkinter.test", "lib2to3", "pydoc_data",
+    "PyQt5", "PyQt6", "PySide2", "PySide6",
+]
 
 def obter_caminho_lib(lib):
     """Retorna o diretório de instalação da biblioteca."""
     return os.path.dirname(lib.__file__)
 
-def criar_executavel():
-    print(f"🚀 Build iniciado para '{NOME_EXECUTAVEL}'...")
+def caminho_executavel(perfil):
+    """Onde o PyInstaller deixa o executável do perfil (dist/<perfil>/...)."""
+    nome = NOME_EXECUTAVEL + (".exe" if os.name == 'nt' else "")
+    base = os.path.join(PASTA_DIST, perfil)
+    if PERFIS[perfil]["modo"] == "onedir": base = os.path.join(base, NOME_EXECUTAVEL)
+    return os.path.join(base, nome)
 
-    # Verifica se o ícone existe antes de tentar usar
-    if not os.path.exists(ICONE):
-        print(f"⚠️ Aviso: Ícone não encontrado em {ICONE}. O build seguirá sem ícone personalizado.")
+def tamanho_pacote(perfil):
+    """Bytes do .exe (onefile) ou da pasta inteira (onedir)."""
+    exe = caminho_executavel(perfil)
+    if PERFIS[perfil]["modo"] == "onefile": return os.path.getsize(exe)
+    total = 0
+    for raiz, _, arquivos in os.walk(os.path.dirname(exe)):
+        total += sum(os.path.getsize(os.path.join(raiz, a)) for a in arquivos)
+    return total
+
+def montar_argumentos(perfil, splash=None):
+    config = PERFIS[perfil]
 
     # Localiza caminhos das libs gráficas
     ctk_path = obter_caminho_lib(customtkinter)
     msg_path = obter_caminho_lib(CTkMessagebox)
-    
+
     # Define separador de arquivos (Windows usa ';', Linux usa ':')
     sep = ";" if os.name == 'nt' else ":"
 
     args = [
         SCRIPT_PRINCIPAL,
         f'--name={NOME_EXECUTAVEL}',
-        '--onefile',       # Gera um único arquivo .exe
+        f'--{config["modo"]}',  # onefile: um único .exe / onedir: pasta com o .exe
         '--windowed',      # Executa sem abrir o console preto (CMD)
         '--clean',         # Limpa caches anteriores
         '--noconfirm',     # Sobrescreve sem perguntar
-        
+        f'--distpath={os.path.join(PASTA_DIST, perfil)}',
+        f'--workpath={os.path.join("build", perfil)}',
+
         # --- INCLUSÃO DE ASSETS (Pasta Inteira) ---
         # Copia a pasta 'assets' local para 'assets' dentro do executável
         f'--add-data=assets{sep}assets',
-        
+
         # --- BIBLIOTECAS GRÁFICAS ---
         f'--add-data={ctk_path}{sep}customtkinter',
         f'--add-data={msg_path}{sep}CTkMessagebox',
-        
-        # --- DEPENDÊNCIAS DO RADAR (CRÍTICO) ---
-        # 'collect-all' garante que binários do OpenCV e PyAutoGUI sejam copiados
-        '--collect-all=cv2',
-        '--collect-all=pyautogui',
-        
+
         # --- IMPORTS ESCONDIDOS ---
         # Ajuda o PyInstaller a encontrar módulos importados dinamicamente
         '--hidden-import=PIL._tkinter_finder',
@@ -58,16 +99,100 @@ def criar_executavel():
         '--hidden-import=pyautogui',
     ]
 
+    if config["enxuto"]:
+        # O hook do OpenCV (pyinstaller-hooks-contrib) já copia os binários necessários
+        args += [f'--exclude-module={m}' for m in EXCLUSOES]
+    else:
+        # --- DEPENDÊNCIAS DO RADAR (CRÍTICO) ---
+        # 'collect-all' garante que binários do OpenCV e PyAutoGUI sejam copiados
+        args += ['--collect-all=cv2', '--collect-all=pyautogui']
+
     # Adiciona ícone se existir
     if os.path.exists(ICONE):
         args.append(f'--icon={ICONE}')
+    if splash:
+        args.append(f'--splash={splash}')
+    return args
+
+def criar_executavel(perfil=PERFIL_PADRAO, splash=None):
+    print(f"🚀 Build '{perfil}' iniciado para '{NOME_EXECUTAVEL}'...")
+
+    # Verifica se o ícone existe antes de tentar usar
+    if not os.path.exists(ICONE):
+        print(f"⚠️ Aviso: Ícone não encontrado em {ICONE}. O build seguirá sem ícone personalizado.")
+    if splash and not os.path.exists(splash):
+        print(f"⚠️ Aviso: Splash não encontrado em {splash}. O build seguirá sem splash.")
+        splash = None
 
     print("📦 Empacotando... Isso pode levar alguns minutos.")
-    
+
     # Executa o PyInstaller
-    PyInstaller.__main__.run(args)
-    
-    print(f"✅ Sucesso! Seu executável está na pasta: {os.path.abspath('dist')}")
+    PyInstaller.__main__.run(montar_argumentos(perfil, splash))
+
+    print(f"✅ Sucesso! Seu executável está em: {os.path.abspath(caminho_executavel(perfil))}")
+
+# --- MEDIÇÃO DO PACOTE ---
+
+def medir_inicio(perfil, aberturas=ABERTURAS_PADRAO):
+    """
+    Tempos (s) até a janela de login do executável: a primeira abertura ("fria")
+    e a mediana das seguintes ("quente"). A primeira logo após o build pode já
+    encontrar arquivos no cache do Windows; para a fria real, reinicie o PC e
+    rode 'python build.py --so-medir'.
+    """
+    from bench.bench_inicio import comando_inicio, medir_aberturas
+
+    exe = os.path.abspath(caminho_executavel(perfil))
+    comando, motivo = comando_inicio([exe])
+    if comando is None: return {"pulado": motivo}
+    tempos = medir_aberturas(comando, max(2, aberturas), cwd=os.path.dirname(exe))
+    return {"fria": tempos[0], "quente": statistics.median(tempos[1:]), "tempos": [round(t, 3) for t in tempos]}
+
+def gerar_relatorio(perfis, aberturas=ABERTURAS_PADRAO, medir=True):
+    """Imprime tamanho e tempos de início de cada perfil e acumula em dist/relatorio_build.json."""
+    relatorio = {}
+    if os.path.exists(RELATORIO):
+        try:
+            with open(RELATORIO, encoding="utf-8") as f: relatorio = json.load(f)
+        except Exception: pass
+
+    for perfil in perfis:
+        if not os.path.exists(caminho_executavel(perfil)):
+            print(f"⚠️ Perfil '{perfil}' sem executável em {caminho_executavel(perfil)}.")
+            continue
+        entrada = {"data": time.strftime("%Y-%m-%d %H:%M:%S"), "modo": PERFIS[perfil]["modo"],
+                   "enxuto": PERFIS[perfil]["enxuto"], "bytes": tamanho_pacote(perfil)}
+        if medir:
+            try: entrada.update(medir_inicio(perfil, aberturas))
+            except Exception as e: entrada["erro"] = str(e)
+        relatorio[perfil] = entrada
+
+    os.makedirs(PASTA_DIST, exist_ok=True)
+    with open(RELATORIO, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+    print(f"\n📊 {'Perfil':<10} {'Tamanho':>10} {'Fria':>8} {'Quente':>8}")
+    for perfil, e in sorted(relatorio.items(), key=lambda kv: kv[1].get("quente", float("inf"))):
+        fria = f"{e['fria']:.2f}s" if "fria" in e else "-"
+        quente = f"{e['quente']:.2f}s" if "quente" in e else "-"
+        obs = e.get("pulado") or e.get("erro") or ""
+        print(f"   {perfil:<10} {e['bytes'] / 2**20:8.1f}MB {fria:>8} {quente:>8}  {obs}")
+    print(f"💾 Relatório em {os.path.abspath(RELATORIO)}")
+    return relatorio
 
 if __name__ == "__main__":
-    criar_executavel()
\ No newline at end of file
+    p = argparse.ArgumentParser(description=f"Gera o executável do {NOME_EXECUTAVEL}.")
+    p.add_argument("--perfil", default=PERFIL_PADRAO, help=f"Perfis separados por vírgula ({', '.join(PERFIS)})")
+    p.add_argument("--splash", nargs="?", const=SPLASH, default=None, help=f"Mostra uma imagem durante a abertura (padrão: {SPLASH})")
+    p.add_argument("--aberturas", type=int, default=ABERTURAS_PADRAO, help="Aberturas medidas por perfil")
+    p.add_argument("--sem-medir", action="store_true", help="Só o tamanho no relatório, sem abrir o executável")
+    p.add_argument("--so-medir", action="store_true", help="Não gera nada; mede os executáveis já existentes")
+    args = p.parse_args()
+
+    perfis = [x.strip() for x in args.perfil.split(",") if x.strip()]
+    desconhecidos = [x for x in perfis if x not in PERFIS]
+    if desconhecidos: p.error(f"Perfil desconhecido: {', '.join(desconhecidos)}")
+
+    if not args.so_medir:
+        for perfil in perfis: criar_executavel(perfil, args.splash)
+    gerar_relatorio(perfis, args.aberturas, medir=not args.sem_medir)
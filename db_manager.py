@@ -2,6 +2,10 @@ import sqlite3
 import hashlib
 import json
 import os
+import time
+import unicodedata
+import threading
+from contextlib import contextmanager
 
 # #####################################################################
 # --- CONFIGURAÇÃO E INICIALIZAÇÃO ---
@@ -34,43 +38,204 @@ def obter_nome_banco():
 # Define o nome do banco globalmente
 DB_NAME = obter_nome_banco()
 
+# #####################################################################
+# --- CONEXÃO (UMA POR THREAD) E MIGRAÇÕES ---
+# #####################################################################
+#
+# Cada thread mantém uma única conexão aberta (WAL + pragmas ajustados +
+# cache de statements preparados). O esquema é versionado com
+# PRAGMA user_version: as migrações só rodam quando o banco está atrás
+# da versão do código.
+
+CACHE_STATEMENTS = 256
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # Leitores não bloqueiam o escritor (GUI x automação)
+    "PRAGMA synchronous=NORMAL",    # Seguro com WAL e bem mais barato que FULL
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",      # ~8 MB de cache de páginas
+    "PRAGMA busy_timeout=5000",
+)
+
+MIGRACOES = [
+    # 1. Cidades e Usuários (esquema original)
+    [
+        """CREATE TABLE IF NOT EXISTS cidades (
+            id INTEGER PRIMARY KEY,
+            nome TEXT UNIQUE NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL
+        )""",
+    ],
+    # 2. Diário de Execuções (checkpoint para retomar após queda/fechamento)
+    [
+        """CREATE TABLE IF NOT EXISTS execucoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            iniciada_em TEXT NOT NULL,
+            atualizada_em TEXT,
+            arquivo TEXT,
+            cidade_filtro TEXT,
+            backlog_filtro TEXT,
+            fingerprint TEXT,
+            total INTEGER NOT NULL DEFAULT 0,
+            ultimo_indice INTEGER NOT NULL DEFAULT -1,
+            status TEXT NOT NULL DEFAULT 'rodando'
+        )""",
+        """CREATE TABLE IF NOT EXISTS execucao_itens (
+            execucao_id INTEGER NOT NULL,
+            indice INTEGER NOT NULL,
+            valor TEXT,
+            resultado TEXT,
+            PRIMARY KEY (execucao_id, indice)
+        )""",
+        """CREATE TABLE IF NOT EXISTS execucao_delays (
+            execucao_id INTEGER NOT NULL,
+            registrado_em TEXT NOT NULL,
+            delay REAL NOT NULL,
+            motivo TEXT
+        )""",
+    ],
+    # 3. Índice da busca de execução pendente (mesmos filtros)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_execucoes_filtros ON execucoes (arquivo, cidade_filtro, backlog_filtro)",
+    ],
+    # 4. Tamanho da lista inicial (o fingerprint vale para ela; 'total' cresce com a planilha acompanhada)
+    [
+        "ALTER TABLE execucoes ADD COLUMN total_base INTEGER",
+        "UPDATE execucoes SET total_base = total",
+    ],
+]
+VERSAO_ESQUEMA = len(MIGRACOES)
+
+_LOCAL = threading.local()
+_ESQUEMA_OK = set()             # Bancos (caminho) já conferidos neste processo
+_LOCK_ESQUEMA = threading.Lock()
+
+def _migrar(conn, migracoes=MIGRACOES):
+    """
+    Aplica as migrações pendentes (cada uma na sua transação) e retorna a versão final.
+    BEGIN IMMEDIATE trava a escrita antes de reler a versão: duas estações
+    abrindo o mesmo arquivo não aplicam a mesma migração duas vezes.
+    """
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    while versao < len(migracoes):
+        conn.execute("BEGIN IMMEDIATE") # DDL + user_version na mesma transação: ou aplica tudo, ou nada
+        try:
+            versao = conn.execute("PRAGMA user_version").fetchone()[0]
+            if versao < len(migracoes): # Outra conexão pode ter migrado enquanto esperávamos a trava
+                for sql in migracoes[versao]: conn.execute(sql)
+                versao += 1
+                conn.execute(f"PRAGMA user_version = {versao}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return max(versao, len(migracoes))
+
+def _conexao():
+    """Conexão da thread atual com o banco DB_NAME (aberta e migrada na primeira chamada)."""
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is not None and _LOCAL.nome == DB_NAME:
+        return conn
+    fechar_conexao() # DB_NAME mudou (ex: benchmark com banco temporário)
+
+    conn = sqlite3.connect(DB_NAME, timeout=5, cached_statements=CACHE_STATEMENTS)
+    for pragma in PRAGMAS:
+        try: conn.execute(pragma)
+        except sqlite3.DatabaseError: pass # Ex: WAL indisponível em unidade de rede
+    with _LOCK_ESQUEMA:
+        if DB_NAME not in _ESQUEMA_OK:
+            _migrar(conn)
+            _ESQUEMA_OK.add(DB_NAME)
+    _LOCAL.conn, _LOCAL.nome = conn, DB_NAME
+    return conn
+
+@contextmanager
+def _transacao():
+    """Cursor na conexão da thread: commit ao sair do bloco, rollback se houver exceção."""
+    conn = _conexao()
+    try:
+        yield conn.cursor()
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def fechar_conexao():
+    """Fecha a conexão da thread atual (a próxima chamada abre outra)."""
+    conn = getattr(_LOCAL, "conn", None)
+    _LOCAL.conn = None
+    if conn is not None:
+        try: conn.close()
+        except Exception: pass
+
 def setup_database():
     """
     Inicializa o banco de dados.
-    Cria as tabelas 'cidades' e 'usuarios' e insere o administrador padrão.
+    Aplica as migrações pendentes (só quando PRAGMA user_version estiver atrás
+    de VERSAO_ESQUEMA) e insere o administrador padrão.
     """
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        # 1. Tabela de Cidades
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS cidades (
-                id INTEGER PRIMARY KEY,
-                nome TEXT UNIQUE NOT NULL
-            )
-        """)
-
-        # 2. Tabela de Usuários
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL
-            )
-        """)
-
-        # 3. Cria usuário 'admin' padrão se não existir (Senha: @admin@)
-        cursor.execute("SELECT * FROM usuarios WHERE username = 'admin'")
-        if not cursor.fetchone():
+        conn = _conexao()
+        # Cria usuário 'admin' padrão se não existir (Senha: @admin@)
+        with conn:
             senha_hash = hashlib.sha256("@admin@".encode()).hexdigest()
-            cursor.execute("INSERT INTO usuarios (username, password_hash) VALUES (?, ?)", ('admin', senha_hash))
+            cursor = conn.execute("INSERT OR IGNORE INTO usuarios (username, password_hash) VALUES (?, ?)", ('admin', senha_hash))
+        if cursor.rowcount:
+            invalidar_cache("usuarios")
             print(f"🔧 [DB] Banco '{DB_NAME}' inicializado. Admin padrão criado.")
-            
-        conn.commit()
     except Exception as e:
         print(f"❌ [DB] Erro crítico na inicialização: {e}")
-    finally:
-        conn.close()
+
+# #####################################################################
+# --- CACHE DE LEITURA (CIDADES E USUÁRIOS) ---
+# #####################################################################
+#
+# As listas são lidas do disco uma vez e servidas da memória. Só
+# adicionar_*/excluir_* (ou invalidar_cache) derrubam a cópia em memória.
+
+_CACHE = {}                     # {"cidades": [(id, nome, normalizado)], "usuarios": [username]}
+_CACHE_BANCO = None             # DB_NAME ao qual o cache pertence
+_LOCK_CACHE = threading.Lock()
+
+def normalizar_nome(nome):
+    """'  São Paulo ' -> 'SAO PAULO' (maiúsculas, sem acentos, sem espaços nas pontas)."""
+    texto = unicodedata.normalize("NFKD", str(nome).strip().upper())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+def invalidar_cache(*tabelas):
+    """Descarta as listas em memória ('cidades', 'usuarios'; nenhuma = todas)."""
+    with _LOCK_CACHE:
+        for tabela in (tabelas or list(_CACHE)): _CACHE.pop(tabela, None)
+
+def _em_cache(tabela, carregar):
+    """Lista da 'tabela' em memória; 'carregar(cursor)' só roda quando não há cópia válida."""
+    global _CACHE_BANCO
+    with _LOCK_CACHE:
+        if _CACHE_BANCO != DB_NAME:
+            _CACHE.clear()
+            _CACHE_BANCO = DB_NAME
+        if tabela not in _CACHE:
+            with _transacao() as cursor:
+                _CACHE[tabela] = carregar(cursor)
+        return _CACHE[tabela]
+
+def _carregar_cidades(cursor):
+    cursor.execute("SELECT id, nome FROM cidades ORDER BY nome ASC")
+    return [(id_c, nome, normalizar_nome(nome)) for id_c, nome in cursor.fetchall()]
+
+def _carregar_usuarios(cursor):
+    cursor.execute("SELECT username FROM usuarios ORDER BY username ASC")
+    return [row[0] for row in cursor.fetchall()]
+
+def obter_cidades():
+    """Lista de tuplas (id, nome, nome_normalizado) em ordem alfabética (da memória)."""
+    try:
+        return list(_em_cache("cidades", _carregar_cidades))
+    except Exception:
+        return []
 
 # #####################################################################
 # --- MÓDULO: CIDADES (CRUD) ---
@@ -85,55 +250,53 @@ def adicionar_cidade(nome_cidade):
     if not nome_cidade:
         return "❌ Erro: O nome da cidade não pode ser vazio.", False
         
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("INSERT INTO cidades (nome) VALUES (?)", (nome_cidade,))
-        conn.commit()
+        with _transacao() as cursor:
+            cursor.execute("INSERT INTO cidades (nome) VALUES (?)", (nome_cidade,))
+        invalidar_cache("cidades")
         return f"✅ Cidade '{nome_cidade}' adicionada com sucesso!", True
     except sqlite3.IntegrityError:
         return f"⚠️ A cidade '{nome_cidade}' já está cadastrada.", False
     except Exception as e:
         return f"❌ Erro técnico: {e}", False
-    finally:
-        conn.close()
+
+def adicionar_cidades_em_lote(nomes):
+    """
+    Adiciona várias cidades numa única transação (executemany + INSERT OR IGNORE).
+    Os nomes são normalizados como em adicionar_cidade; repetidos (na lista ou
+    já cadastrados) contam como duplicados.
+    Retorna: (Mensagem, Sucesso[bool])
+    """
+    validos = [str(n).strip().upper() for n in nomes if n is not None and str(n).strip()]
+    if not validos:
+        return "❌ Erro: Nenhum nome de cidade válido para importar.", False
+    unicos = list(dict.fromkeys(validos))
+
+    try:
+        with _transacao() as cursor:
+            cursor.executemany("INSERT OR IGNORE INTO cidades (nome) VALUES (?)", [(n,) for n in unicos])
+            adicionadas = max(0, cursor.rowcount)
+        if adicionadas: invalidar_cache("cidades")
+        duplicadas = len(validos) - adicionadas
+        return f"✅ Importação concluída: {adicionadas} cidade(s) adicionada(s), {duplicadas} duplicada(s).", True
+    except Exception as e:
+        return f"❌ Erro técnico: {e}", False
 
 def buscar_nomes_cidades():
     """Retorna uma lista de strings com os nomes de todas as cidades (Ordem Alfabética)."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT nome FROM cidades ORDER BY nome ASC")
-        return [row[0] for row in cursor.fetchall()]
-    except Exception:
-        return []
-    finally:
-        conn.close()
+    return [nome for _, nome, _ in obter_cidades()]
 
 def listar_cidades():
     """Retorna uma lista de tuplas (id, nome) de todas as cidades."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT id, nome FROM cidades ORDER BY nome ASC")
-        return cursor.fetchall()
-    except Exception:
-        return []
-    finally:
-        conn.close()
+    return [(id_c, nome) for id_c, nome, _ in obter_cidades()]
 
 def buscar_nome_cidade_por_id(cidade_id):
     """Retorna o nome da cidade baseado no ID, ou None se não existir."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT nome FROM cidades WHERE id = ?", (cidade_id,))
-        resultado = cursor.fetchone()
-        return resultado[0] if resultado else None
-    except Exception:
+        cidade_id = int(cidade_id)
+    except (TypeError, ValueError):
         return None
-    finally:
-        conn.close()
+    return next((nome for id_c, nome, _ in obter_cidades() if id_c == cidade_id), None)
 
 def excluir_cidade(cidade_id):
     """
@@ -145,26 +308,22 @@ def excluir_cidade(cidade_id):
     except ValueError:
         return "❌ Erro: O ID deve ser um número inteiro.", False
         
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        # Busca o nome antes para confirmar na mensagem
-        cursor.execute("SELECT nome FROM cidades WHERE id = ?", (cidade_id,))
-        resultado = cursor.fetchone()
-        
-        if not resultado:
-            return f"⚠️ Cidade com ID {cidade_id} não encontrada.", False
-            
-        nome_cidade = resultado[0]
-        
-        cursor.execute("DELETE FROM cidades WHERE id = ?", (cidade_id,))
-        conn.commit()
+        with _transacao() as cursor:
+            # Busca o nome antes para confirmar na mensagem
+            cursor.execute("SELECT nome FROM cidades WHERE id = ?", (cidade_id,))
+            resultado = cursor.fetchone()
+
+            if not resultado:
+                return f"⚠️ Cidade com ID {cidade_id} não encontrada.", False
+
+            nome_cidade = resultado[0]
+
+            cursor.execute("DELETE FROM cidades WHERE id = ?", (cidade_id,))
+        invalidar_cache("cidades")
         return f"✅ Cidade '{nome_cidade}' (ID {cidade_id}) excluída.", True
-        
     except Exception as e:
         return f"❌ Erro ao excluir: {e}", False
-    finally:
-        conn.close()
 
 # #####################################################################
 # --- MÓDULO: USUÁRIOS (AUTH & CRUD) ---
@@ -178,19 +337,16 @@ def verificar_credenciais(username, password):
     username = username.strip().lower()
     password_hash = hashlib.sha256(password.encode()).hexdigest()
     
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT password_hash FROM usuarios WHERE username = ?", (username,))
-        resultado = cursor.fetchone()
-        
-        if resultado and resultado[0] == password_hash:
-            return True
-        return False
+        with _transacao() as cursor:
+            cursor.execute("SELECT password_hash FROM usuarios WHERE username = ?", (username,))
+            resultado = cursor.fetchone()
+
+            if resultado and resultado[0] == password_hash:
+                return True
+            return False
     except Exception:
         return False
-    finally:
-        conn.close()
 
 def adicionar_usuario(username, password):
     """
@@ -202,30 +358,22 @@ def adicionar_usuario(username, password):
         
     password_hash = hashlib.sha256(password.encode()).hexdigest()
     
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("INSERT INTO usuarios (username, password_hash) VALUES (?, ?)", (username, password_hash))
-        conn.commit()
+        with _transacao() as cursor:
+            cursor.execute("INSERT INTO usuarios (username, password_hash) VALUES (?, ?)", (username, password_hash))
+        invalidar_cache("usuarios")
         return f"✅ Usuário '{username}' cadastrado com sucesso!", True
     except sqlite3.IntegrityError:
         return f"⚠️ O usuário '{username}' já existe.", False
     except Exception as e:
         return f"❌ Erro técnico: {e}", False
-    finally:
-        conn.close()
 
 def listar_usuarios():
-    """Retorna lista de todos os usernames."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+    """Retorna lista de todos os usernames (da memória)."""
     try:
-        cursor.execute("SELECT username FROM usuarios ORDER BY username ASC")
-        return [row[0] for row in cursor.fetchall()]
+        return list(_em_cache("usuarios", _carregar_usuarios))
     except Exception:
         return []
-    finally:
-        conn.close()
 
 def excluir_usuario(username):
     """
@@ -236,17 +384,155 @@ def excluir_usuario(username):
     if username == "admin":
         return "⛔ AÇÃO NEGADA: Não é permitido excluir o administrador principal.", False
         
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT username FROM usuarios WHERE username = ?", (username,))
-        if not cursor.fetchone():
-             return f"⚠️ Usuário '{username}' não encontrado.", False
-             
-        cursor.execute("DELETE FROM usuarios WHERE username = ?", (username,))
-        conn.commit()
+        with _transacao() as cursor:
+            cursor.execute("SELECT username FROM usuarios WHERE username = ?", (username,))
+            if not cursor.fetchone():
+                 return f"⚠️ Usuário '{username}' não encontrado.", False
+
+            cursor.execute("DELETE FROM usuarios WHERE username = ?", (username,))
+        invalidar_cache("usuarios")
         return f"✅ Usuário '{username}' removido.", True
     except Exception as e:
         return f"❌ Erro técnico: {e}", False
-    finally:
-        conn.close()
\ No newline at end of file
+
+# #####################################################################
+# --- MÓDULO: DIÁRIO DE EXECUÇÕES (CHECKPOINT) ---
+# #####################################################################
+
+STATUS_NAO_RETOMAVEIS = ('finalizada', 'descartada')
+
+def _agora():
+    return time.strftime('%Y-%m-%d %H:%M:%S')
+
+def criar_execucao(arquivo, cidade_filtro, backlog_filtro, fingerprint, total):
+    """Registra uma nova execução e retorna o ID (ou None em caso de falha)."""
+    try:
+        with _transacao() as cursor:
+            cursor.execute("""
+                INSERT INTO execucoes (iniciada_em, atualizada_em, arquivo, cidade_filtro, backlog_filtro, fingerprint, total, total_base)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (_agora(), _agora(), arquivo, cidade_filtro, str(backlog_filtro or ''), fingerprint, total, total))
+            return cursor.lastrowid
+    except Exception:
+        return None
+
+def buscar_execucao_pendente(arquivo, cidade_filtro, backlog_filtro):
+    """
+    Retorna a última execução inacabada com os mesmos filtros, como dicionário
+    (id, fingerprint, total, total_base, ultimo_indice, atualizada_em), ou None.
+    O fingerprint é o das 'total_base' primeiras chaves (a lista inicial).
+    """
+    try:
+        with _transacao() as cursor:
+            cursor.execute(f"""
+                SELECT id, fingerprint, total, COALESCE(total_base, total), ultimo_indice, atualizada_em FROM execucoes
+                WHERE arquivo = ? AND cidade_filtro = ? AND backlog_filtro = ?
+                  AND status NOT IN ({",".join("?" * len(STATUS_NAO_RETOMAVEIS))})
+                  AND ultimo_indice + 1 < total
+                ORDER BY id DESC LIMIT 1
+            """, (arquivo, cidade_filtro, str(backlog_filtro or ''), *STATUS_NAO_RETOMAVEIS))
+            row = cursor.fetchone()
+            if not row: return None
+            return dict(zip(("id", "fingerprint", "total", "total_base", "ultimo_indice", "atualizada_em"), row))
+    except Exception:
+        return None
+
+def atualizar_status_execucao(execucao_id, status):
+    """Altera o status de uma execução ('finalizada', 'cancelada', 'descartada'...)."""
+    try:
+        with _transacao() as cursor:
+            cursor.execute("UPDATE execucoes SET status = ?, atualizada_em = ? WHERE id = ?", (status, _agora(), execucao_id))
+            return True
+    except Exception:
+        return False
+
+def descartar_execucao(execucao_id):
+    """Marca a execução como descartada (não será mais oferecida para retomada)."""
+    return atualizar_status_execucao(execucao_id, 'descartada')
+
+# Itens com índice negativo: registros confirmados numa execução anterior da
+# mesma planilha, trazidos quando a lista mudou (não voltam a ser enviados).
+
+def valores_confirmados(execucao_id, so_herdados=False):
+    """Valores já confirmados na execução (com 'so_herdados', só os trazidos de execuções anteriores)."""
+    with _transacao() as cursor:
+        cursor.execute(f"SELECT valor FROM execucao_itens WHERE execucao_id = ?{' AND indice < 0' if so_herdados else ''}",
+                       (execucao_id,))
+        return {row[0] for row in cursor.fetchall()}
+
+def valores_desde(execucao_id, indice):
+    """Valores confirmados a partir de 'indice', na ordem do diário."""
+    with _transacao() as cursor:
+        cursor.execute("SELECT valor FROM execucao_itens WHERE execucao_id = ? AND indice >= ? ORDER BY indice",
+                       (execucao_id, indice))
+        return [row[0] for row in cursor.fetchall()]
+
+def herdar_itens(execucao_id, anterior_id):
+    """Copia os itens confirmados da execução anterior para a nova, com índices negativos."""
+    with _transacao() as cursor:
+        cursor.execute("SELECT valor, resultado FROM execucao_itens WHERE execucao_id = ? ORDER BY indice", (anterior_id,))
+        itens = [(execucao_id, -n, valor, resultado) for n, (valor, resultado) in enumerate(cursor.fetchall(), start=1)]
+        cursor.executemany("INSERT INTO execucao_itens (execucao_id, indice, valor, resultado) VALUES (?, ?, ?, ?)", itens)
+        return len(itens)
+
+class DiarioExecucao:
+    """
+    Grava o progresso de uma execução em lotes (poucos commits, baixo custo).
+    Usa a conexão da thread que chama os métodos (a mesma thread da automação).
+    """
+    def __init__(self, execucao_id, tamanho_lote=10, intervalo_max=1.0):
+        self.execucao_id = execucao_id
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_max = intervalo_max
+        self.pendentes = []
+        self.delays_pendentes = []
+        self.ultimo_flush = time.time()
+
+    def confirmar(self, indice, valor, resultado="ok"):
+        """Registra o item como concluído; grava quando o lote enche ou o tempo expira."""
+        self.pendentes.append((self.execucao_id, indice, valor, resultado))
+        if len(self.pendentes) >= self.tamanho_lote or time.time() - self.ultimo_flush >= self.intervalo_max:
+            self.flush()
+
+    def registrar_delay(self, delay, motivo):
+        """Guarda uma mudança do delay efetivo (gravada junto com o próximo lote)."""
+        self.delays_pendentes.append((self.execucao_id, _agora(), delay, motivo))
+
+    def atualizar_total(self, total):
+        """
+        A lista cresceu durante a execução (planilha acompanhada). Só o total muda:
+        o fingerprint continua o da lista inicial, e os acrescentados voltam na retomada pela ordem do diário.
+        """
+        self.flush()
+        try:
+            with _transacao() as cursor:
+                cursor.execute("UPDATE execucoes SET total = ?, atualizada_em = ? WHERE id = ?",
+                               (total, _agora(), self.execucao_id))
+        except Exception as e:
+            print(f"❌ [DB] Falha ao atualizar total do diário: {e}")
+
+    def flush(self):
+        if not self.pendentes and not self.delays_pendentes: return
+        try:
+            with _transacao() as cursor:
+                if self.pendentes:
+                    cursor.executemany("INSERT OR REPLACE INTO execucao_itens (execucao_id, indice, valor, resultado) VALUES (?, ?, ?, ?)", self.pendentes)
+                    cursor.execute("UPDATE execucoes SET ultimo_indice = MAX(ultimo_indice, ?), atualizada_em = ? WHERE id = ?",
+                                   (max(p[1] for p in self.pendentes), _agora(), self.execucao_id))
+                if self.delays_pendentes:
+                    cursor.executemany("INSERT INTO execucao_delays (execucao_id, registrado_em, delay, motivo) VALUES (?, ?, ?, ?)", self.delays_pendentes)
+            self.pendentes = []
+            self.delays_pendentes = []
+        except Exception as e:
+            print(f"❌ [DB] Falha ao gravar diário: {e}")
+        self.ultimo_flush = time.time()
+
+    def encerrar(self, status):
+        """Grava o que falta e define o status final."""
+        try:
+            self.flush()
+            with _transacao() as cursor:
+                cursor.execute("UPDATE execucoes SET status = ?, atualizada_em = ? WHERE id = ?", (status, _agora(), self.execucao_id))
+        except Exception as e:
+            print(f"❌ [DB] Falha ao encerrar diário: {e}")
@@ -0,0 +1,62 @@
+import time
+
+# ####################################################################
+# --- CONTROLE ADAPTATIVO DO DELAY ---
+# ####################################################################
+
+DELAY_MIN_PADRAO = 0.05
+DELAY_MAX_PADRAO = 1.0
+
+class ControladorDelay:
+    """
+    Ajusta o delay entre colar e ENTER conforme o resultado do radar.
+    - Após 'ciclos_estaveis' envios limpos seguidos, reduz (multiplica por 'fator_reducao').
+    - Após um erro detectado, recua multiplicando por 'fator_aumento'.
+    O valor sempre fica entre 'minimo' e 'maximo' (definidos pelo operador).
+    """
+    def __init__(self, inicial, minimo=DELAY_MIN_PADRAO, maximo=DELAY_MAX_PADRAO,
+                 fator_reducao=0.85, fator_aumento=2.0, ciclos_estaveis=5):
+        self.minimo = min(minimo, maximo)
+        self.maximo = max(minimo, maximo)
+        self.fator_reducao = fator_reducao
+        self.fator_aumento = fator_aumento
+        self.ciclos_estaveis = ciclos_estaveis
+        self.atual = self._limitar(inicial)
+        self.sequencia_limpa = 0
+        self.historico = [(time.time(), self.atual, "inicial")]
+
+    def _limitar(self, valor):
+        return round(min(self.maximo, max(self.minimo, valor)), 3)
+
+    def _alterar(self, novo, motivo):
+        novo = self._limitar(novo)
+        if novo == self.atual: return False
+        self.atual = novo
+        self.historico.append((time.time(), novo, motivo))
+        return True
+
+    def registrar_sucesso(self):
+        """Envio sem erro. Retorna True se o delay mudou."""
+        self.sequencia_limpa += 1
+        if self.sequencia_limpa < self.ciclos_estaveis: return False
+        self.sequencia_limpa = 0
+        return self._alterar(self.atual * self.fator_reducao, "estavel")
+
+    def registrar_erro(self):
+        """Erro detectado pelo radar. Retorna True se o delay mudou."""
+        self.sequencia_limpa = 0
+        return self._alterar(self.atual * self.fator_aumento, "erro")
+
+    def resumo(self, ultimos=4):
+        """Texto curto com os últimos valores (ex: '0.20→0.17→0.34')."""
+        return "→".join(f"{d:.2f}" for _, d, _ in self.historico[-ultimos:])
+
+def interpretar_faixa_delay(texto):
+    """Converte '0.05-1.0' em (0.05, 1.0). Valores inválidos usam a faixa padrão."""
+    try:
+        a, b = str(texto).replace(',', '.').split('-', 1)
+        a, b = float(a), float(b)
+        if a < 0 or b <= 0: raise ValueError
+        return (min(a, b), max(a, b))
+    except Exception:
+        return (DELAY_MIN_PADRAO, DELAY_MAX_PADRAO)
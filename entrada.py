@@ -0,0 +1,436 @@
+import os
+import time
+import random
+import shutil
+import threading
+import subprocess
+import radar
+
+# ####################################################################
+# --- BACKENDS DE ENTRADA/SAÍDA (TECLADO, FOCO, RADAR, ALERTA) ---
+# ####################################################################
+#
+# O motor (automation_logic) só fala com o backend:
+#   copiar(texto) -> colar() -> [delay] -> confirmar()   # envio
+#   titulo_ativo() / varrer_tela()                       # radar de erro
+#   focar_janela(titulo), alertar(), erro_resolvido()
+#   reservar() / liberar()                               # em volta do envio (teclado compartilhado)
+#
+# - "pyautogui": o comportamento original (área de transferência + Ctrl+V + ENTER).
+# - "injecao":   digita direto pelo 'keyboard' (SendInput), sem área de transferência
+#                nem a pausa que o pyautogui insere depois de cada comando.
+# - "simulado":  alvo falso em memória. Registra os valores enviados e gera popups
+#                de erro numa taxa configurável. Não toca teclado, tela nem janelas:
+#                roda em Linux sem monitor (dry-run e medição da vazão do motor).
+# - "xdotool":   alvo num display X (Xvfb) pelo xdotool/xclip; cada trabalhador
+#                paralelo pode ter o seu display, sem disputar foco.
+#
+# As dependências de desktop (pyautogui, pyperclip, keyboard, winsound) só são
+# importadas quando um backend real é usado.
+
+BACKEND_PADRAO = "pyautogui"
+JANELA_RADAR = 0.6          # Segundos de espera por um popup depois do ENTER
+PYAUTOGUI_PAUSE = 0.02
+PAUSA_FOCO = 0.05           # Espera depois de ativar a janela de outro trabalhador
+NAVEGADORES = ["Opera", "Google Chrome", "Microsoft Edge", "Firefox", "Brave"]
+
+class BackendEntrada:
+    """Interface comum. 'simulado' indica que nada foi enviado de verdade (sem diário)."""
+    nome = ""
+    simulado = False
+    pausar_em_erro = True   # False: o erro é descartado sem esperar o operador
+    janela_radar = JANELA_RADAR
+    estado_radar = None     # radar.EstadoRadar próprio (None = estado global do radar)
+
+    def preparar(self): pass
+    def reservar(self): pass
+    def liberar(self): pass
+    def focar_janela(self, titulo_parcial): return None
+    def titulo_ativo(self): return None
+    def copiar(self, texto): raise NotImplementedError
+    def colar(self): raise NotImplementedError
+    def confirmar(self): raise NotImplementedError
+    def varrer_tela(self): return None
+    def alertar(self): pass
+    def erro_resolvido(self): pass
+
+# ####################################################################
+# --- DESKTOP (WINDOWS) ---
+# ####################################################################
+
+class TravaTeclado:
+    """
+    Um teclado e um foco para várias janelas: só um trabalhador faz
+    foco+colar+ENTER por vez. A espera pelo site (radar) fica fora da trava,
+    e é ela que os trabalhadores fazem em paralelo.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dono = None
+
+    def adquirir(self, backend):
+        self._lock.acquire()
+        try:
+            if self.dono is not backend or not backend.em_foco():
+                backend.ativar()
+                self.dono = backend
+        except Exception:
+            self._lock.release()
+            raise
+
+    def liberar(self):
+        self._lock.release()
+
+GW_ENABLEDPOPUP = 6
+USER32 = None               # user32 do Windows, carregado no primeiro uso (o bench do radar troca por um simulado)
+
+def _user32():
+    global USER32
+    if USER32 is None:
+        import ctypes
+        from ctypes import wintypes
+        USER32 = ctypes.windll.user32
+        USER32.GetWindow.argtypes = [wintypes.HWND, wintypes.UINT]
+        USER32.GetWindow.restype = wintypes.HWND
+    return USER32
+
+def _titulo_popup(hwnd):
+    """Título do popup visível que pertence à janela (diálogo modal do navegador), ou None."""
+    import ctypes
+    user32 = _user32()
+    popup = user32.GetWindow(hwnd, GW_ENABLEDPOPUP) # Sem popup, devolve a própria janela
+    if not popup or popup == hwnd or not user32.IsWindowVisible(popup): return None
+    tamanho = user32.GetWindowTextLengthW(popup)
+    buffer = ctypes.create_unicode_buffer(tamanho + 1)
+    user32.GetWindowTextW(popup, buffer, tamanho + 1)
+    return buffer.value
+
+class _BackendDesktop(BackendEntrada):
+    """
+    Foco de janelas, título ativo, radar visual e beep da área de trabalho real.
+    Com 'janela_alvo' (modo paralelo) o backend fica preso a essa janela: o foco,
+    a região do radar e os popups são os dela, e a 'trava' serializa o teclado.
+    """
+    def __init__(self, janela_alvo=None, trava=None):
+        self.janela_alvo = janela_alvo
+        self.trava = trava
+        if janela_alvo is not None:
+            self.estado_radar = radar.EstadoRadar(radar.regiao_da_janela(janela_alvo))
+
+    def ativar(self, janela=None, pausa=PAUSA_FOCO):
+        janela = janela or self.janela_alvo
+        if janela.isMinimized: janela.restore()
+        janela.activate()
+        time.sleep(pausa)
+
+    def em_foco(self):
+        import pyautogui
+        try: return pyautogui.getActiveWindow() == self.janela_alvo
+        except Exception: return False
+
+    def focar_janela(self, titulo_parcial):
+        """Foca a primeira janela com o título informado e a retorna (ou None)."""
+        if self.janela_alvo is not None:
+            try:
+                self.ativar(pausa=0.1)
+                return self.janela_alvo
+            except Exception: return None
+        import pyautogui
+        try:
+            janelas = pyautogui.getWindowsWithTitle(titulo_parcial)
+            if janelas:
+                janela = janelas[0]
+                self.ativar(janela, pausa=0.1)
+                return janela
+        except: pass
+        return None
+
+    def titulo_ativo(self):
+        if self.janela_alvo is not None:
+            # O alerta do site ("Mensagem da página") é uma janela à parte, dona = a janela alvo:
+            # o título do popup é o que o radar procura, não o da própria janela
+            try:
+                popup = _titulo_popup(self.janela_alvo._hWnd)
+                return popup if popup is not None else self.janela_alvo.title
+            except Exception:
+                pass
+        import pyautogui
+        return pyautogui.getActiveWindowTitle()
+
+    def reservar(self):
+        if self.trava: self.trava.adquirir(self)
+
+    def liberar(self):
+        if self.trava: self.trava.liberar()
+
+    def varrer_tela(self):
+        return radar.varrer(self.estado_radar)
+
+    def alertar(self):
+        try:
+            import winsound
+            winsound.Beep(800, 500)
+        except Exception: pass
+
+class BackendPyAutoGUI(_BackendDesktop):
+    nome = "pyautogui"
+
+    def preparar(self):
+        import pyautogui
+        pyautogui.PAUSE = PYAUTOGUI_PAUSE
+
+    def copiar(self, texto):
+        import pyperclip
+        pyperclip.copy(texto)
+
+    def colar(self):
+        import pyautogui
+        pyautogui.hotkey('ctrl', 'v')
+
+    def confirmar(self):
+        import pyautogui
+        pyautogui.press('enter')
+
+class BackendInjecao(_BackendDesktop):
+    """
+    Digita o valor com keyboard.write (eventos Unicode via SendInput).
+    Lotes (várias linhas) continuam indo pela área de transferência: digitar
+    a quebra de linha seria um ENTER e enviaria o formulário no meio do lote.
+    """
+    nome = "injecao"
+
+    def __init__(self, janela_alvo=None, trava=None):
+        super().__init__(janela_alvo, trava)
+        self._texto = ""
+
+    def copiar(self, texto):
+        self._texto = texto
+        if "\n" in texto:
+            import pyperclip
+            pyperclip.copy(texto)
+
+    def colar(self):
+        import keyboard
+        if "\n" in self._texto: keyboard.send('ctrl+v')
+        else: keyboard.write(self._texto)
+
+    def confirmar(self):
+        import keyboard
+        keyboard.send('enter')
+
+# ####################################################################
+# --- ALVO SIMULADO (DRY-RUN / HEADLESS) ---
+# ####################################################################
+
+class JanelaSimulada:
+    """Mesmos atributos que o radar lê de uma janela do pygetwindow."""
+    def __init__(self, titulo, largura, altura):
+        self.title, self.left, self.top, self.width, self.height = titulo, 0, 0, largura, altura
+
+class BackendSimulado(BackendEntrada):
+    """
+    Alvo falso: cada ENTER registra as linhas coladas em 'enviados' e, com
+    probabilidade 'taxa_erro', abre um popup 'latencia' segundos depois.
+    Com 'radar_visual' o popup é desenhado numa tela sintética e detectado
+    pelo radar de verdade (mede também o custo da busca de templates);
+    sem ele, o popup aparece só no título da janela ativa.
+    Com 'retomar_sozinho' o erro é descartado sem pausar (execução sem operador).
+    """
+    nome = "simulado"
+    simulado = True
+
+    def __init__(self, taxa_erro=0.0, latencia=0.0, semente=None, radar_visual=False,
+                 retomar_sozinho=True, janela_radar=None, resolucao=(1080, 1920)):
+        self.taxa_erro = taxa_erro
+        self.latencia = latencia
+        self.radar_visual = radar_visual
+        self.pausar_em_erro = not retomar_sozinho
+        self.janela_radar = janela_radar if janela_radar is not None else latencia + 0.02
+        self.resolucao = resolucao
+        self._rng = random.Random(semente)
+        self._area = ""
+        self._campo = ""
+        self._popup_em = None       # Instante em que o popup atual fica visível
+        self._telas = None
+        self.estado_radar = radar.EstadoRadar()
+        self.enviados = []
+        self.erros = []             # Textos (linhas do envio) que geraram popup
+        self.alertas = 0
+
+    def focar_janela(self, titulo_parcial):
+        return JanelaSimulada(titulo_parcial, self.resolucao[1], self.resolucao[0])
+
+    def copiar(self, texto):
+        self._area = texto
+
+    def colar(self):
+        self._campo += self._area
+
+    def confirmar(self):
+        linhas = [l for l in self._campo.split("\n") if l]
+        self._campo = ""
+        self.enviados.extend(linhas)
+        if linhas and self._rng.random() < self.taxa_erro:
+            self._popup_em = time.perf_counter() + self.latencia
+            self.erros.append("\n".join(linhas))
+
+    def _popup_visivel(self):
+        return self._popup_em is not None and time.perf_counter() >= self._popup_em
+
+    def titulo_ativo(self):
+        if not self.radar_visual and self._popup_visivel(): return "ERRO - Mensagem da página (simulado)"
+        return "Navegador (simulado)"
+
+    def _tela(self, com_popup):
+        """Telas sintéticas (limpa e com o primeiro template do banco colado), criadas uma vez."""
+        if self._telas is None:
+            import numpy as np
+            altura, largura = self.resolucao
+            limpa = np.full((altura, largura), 243, dtype=np.uint8)
+            limpa[:90, :] = 60
+            erro = limpa.copy()
+            banco = radar.carregar_banco()
+            if banco.templates:
+                tpl = next(iter(banco.templates.values())).niveis[0]
+                y, x = (altura - tpl.shape[0]) // 2, (largura - tpl.shape[1]) // 2
+                erro[y:y + tpl.shape[0], x:x + tpl.shape[1]] = tpl
+            self._telas = (limpa, erro)
+        return self._telas[1 if com_popup else 0]
+
+    def varrer_tela(self):
+        if not self.radar_visual: return None
+        return radar.varrer_imagem(self._tela(self._popup_visivel()), estado=self.estado_radar)
+
+    def alertar(self):
+        self.alertas += 1
+
+    def erro_resolvido(self):
+        self._popup_em = None
+
+# ####################################################################
+# --- DISPLAY VIRTUAL (XVFB + XDOTOOL) ---
+# ####################################################################
+
+class BackendXdotool(BackendEntrada):
+    """
+    Alvo num display X ('DISPLAY', ex.: ':91' de um Xvfb) sem tocar no display
+    do operador. Sem gerenciador de janelas o foco é dado com 'windowfocus'.
+    Lotes vão pela área de transferência do próprio display (xclip).
+    """
+    nome = "xdotool"
+
+    def __init__(self, display, janela_radar=None):
+        self.display = display
+        self.env = dict(os.environ, DISPLAY=display)
+        if janela_radar is not None: self.janela_radar = janela_radar
+        self.estado_radar = radar.EstadoRadar(capturar=self._capturar)
+        self._texto = ""
+
+    def _xdotool(self, *args):
+        return subprocess.run(["xdotool", *args], env=self.env, capture_output=True, text=True, timeout=5).stdout
+
+    def preparar(self):
+        if not shutil.which("xdotool"):
+            raise RuntimeError("xdotool não encontrado (apt install xdotool xclip).")
+
+    def focar_janela(self, titulo_parcial):
+        ids = self._xdotool("search", "--onlyvisible", "--name", titulo_parcial).split()
+        if not ids: return None
+        self._xdotool("windowfocus", "--sync", ids[0])
+        geo = dict(l.split("=", 1) for l in self._xdotool("getwindowgeometry", "--shell", ids[0]).split() if "=" in l)
+        janela = JanelaSimulada(self._xdotool("getwindowname", ids[0]).strip(), int(geo.get("WIDTH", 0)), int(geo.get("HEIGHT", 0)))
+        janela.left, janela.top = int(geo.get("X", 0)), int(geo.get("Y", 0))
+        return janela
+
+    def titulo_ativo(self):
+        return self._xdotool("getwindowfocus", "getwindowname").strip()
+
+    def copiar(self, texto):
+        self._texto = texto
+        if "\n" in texto:
+            subprocess.run(["xclip", "-selection", "clipboard"], input=texto, env=self.env, text=True, timeout=5)
+
+    def colar(self):
+        if "\n" in self._texto: self._xdotool("key", "--clearmodifiers", "ctrl+v")
+        else: self._xdotool("type", "--delay", "0", "--", self._texto)
+
+    def confirmar(self):
+        self._xdotool("key", "Return")
+
+    def _capturar(self, regiao=None):
+        import numpy as np
+        from PIL import ImageGrab
+        caixa = (regiao[0], regiao[1], regiao[0] + regiao[2], regiao[1] + regiao[3]) if regiao else None
+        return np.array(ImageGrab.grab(bbox=caixa, xdisplay=self.display).convert('L'))
+
+    def varrer_tela(self):
+        return radar.varrer(self.estado_radar)
+
+class DisplaysVirtuais:
+    """
+    Sobe 'quantidade' Xvfb (':base', ':base+1', ...) e os encerra na saída.
+    Uso: with DisplaysVirtuais(2) as displays: [BackendXdotool(d) for d in displays]
+    """
+    def __init__(self, quantidade, base=90, resolucao="1280x800x24"):
+        self.displays = [f":{base + i}" for i in range(quantidade)]
+        self.resolucao = resolucao
+        self._processos = []
+
+    def __enter__(self):
+        if not shutil.which("Xvfb"):
+            raise RuntimeError("Xvfb não encontrado (apt install xvfb).")
+        for d in self.displays:
+            self._processos.append(subprocess.Popen(
+                ["Xvfb", d, "-screen", "0", self.resolucao, "-nolisten", "tcp"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        limite = time.time() + 5
+        for d in self.displays: # O display está pronto quando o socket aparece
+            while not os.path.exists(f"/tmp/.X11-unix/X{d[1:]}") and time.time() < limite: time.sleep(0.05)
+        return self.displays
+
+    def __exit__(self, *exc):
+        for p in self._processos: p.terminate()
+        for p in self._processos: p.wait()
+
+# ####################################################################
+# --- JANELAS DO MODO PARALELO ---
+# ####################################################################
+
+def janelas_navegador():
+    """Janelas de navegador visíveis, de cima para baixo e da esquerda para a direita."""
+    import pyautogui
+    vistas, janelas = set(), []
+    for nav in NAVEGADORES:
+        for j in pyautogui.getWindowsWithTitle(nav):
+            chave = getattr(j, "_hWnd", id(j))
+            if chave in vistas or j.width <= 0 or j.height <= 0: continue
+            vistas.add(chave)
+            janelas.append(j)
+    return sorted(janelas, key=lambda j: (j.top, j.left))
+
+def organizar_janelas(janelas):
+    """Lado a lado numa grade na tela principal: o radar de cada uma só vê a própria janela."""
+    import math
+    import pyautogui
+    largura, altura = pyautogui.size()
+    colunas = math.ceil(math.sqrt(len(janelas)))
+    linhas = math.ceil(len(janelas) / colunas)
+    w, h = largura // colunas, altura // linhas
+    for k, j in enumerate(janelas):
+        if j.isMinimized or j.isMaximized: j.restore()
+        j.moveTo((k % colunas) * w, (k // colunas) * h)
+        j.resizeTo(w, h)
+
+BACKENDS = {
+    "pyautogui": BackendPyAutoGUI,
+    "injecao": BackendInjecao,
+    "simulado": BackendSimulado,
+    "xdotool": BackendXdotool,
+}
+
+def criar_backend(nome=None, **opcoes):
+    """Instancia o backend pelo nome ('pyautogui', 'injecao', 'simulado' ou 'xdotool')."""
+    classe = BACKENDS.get(nome or BACKEND_PADRAO)
+    if classe is None:
+        raise ValueError(f"Backend de entrada desconhecido: '{nome}'")
+    return classe(**opcoes)
@@ -0,0 +1,593 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import itertools
+import threading
+from contextlib import contextmanager
+import utils
+import db_manager
+import preparacao
+import ingestao
+
+# ####################################################################
+# --- FILA DE TRABALHO COMPARTILHADA ENTRE ESTAÇÕES (LEASES) ---
+# ####################################################################
+#
+# Uma estação carrega os registros filtrados num arquivo SQLite que todas
+# enxergam (pasta de rede ou o mesmo PC). Cada automacao_core reserva
+# pedaços pequenos com prazo (lease): a reserva é um BEGIN IMMEDIATE, então
+# duas estações nunca pegam o mesmo item. Enquanto a estação estiver viva,
+# uma thread renova os prazos (inclusive durante uma pausa longa); se ela
+# cair, o prazo vence e os itens voltam para quem pedir primeiro.
+#
+# - Um valor (waybill) entra uma vez por trabalho e não entra num trabalho
+#   novo se já estiver em outro trabalho aberto.
+# - Estados de um item: livre -> reservado -> enviando -> feito. 'enviando' é
+#   gravado ANTES da colagem; se a estação cair depois disso, ninguém sabe se
+#   o site recebeu o valor: vencido o prazo, o item vai para 'revisao'
+#   (conferência manual, listada no log) e nunca é reservado de novo. Só os
+#   itens apenas reservados (nunca colados) voltam para a fila.
+# - Trabalho aberto sem atividade há PRAZO_ABANDONO vira 'abandonado' na
+#   próxima carga: os valores dele deixam de bloquear trabalhos novos, e
+#   recarregar a mesma lista reabre o trabalho de onde parou.
+# - Com a planilha acompanhada (acompanhamento.py) a estação que carregou
+#   acrescenta as linhas novas ao mesmo trabalho e renova 'acompanhado_ate';
+#   enquanto o prazo valer, quem esvazia a fila espera em vez de concluir.
+# - Os prazos usam o relógio de cada PC: mantenha os relógios sincronizados
+#   (o Windows já sincroniza); a folga do lease cobre alguns segundos.
+# - Custo por estação: uma transação por pedaço reservado e uma por lote
+#   colado (grava 'enviando' e as confirmações do lote anterior); a trava de
+#   escrita do arquivo fica livre quase o tempo todo, então a vazão soma
+#   entre estações.
+
+CHAVE_CONFIG_FILA = 'fila_compartilhada'    # Caminho do arquivo em config_cliente.json
+NOME_FILA_PADRAO = 'fila_trabalho.sqlite'
+TAMANHO_RESERVA = 10            # Itens por reserva (pedaços pequenos equilibram as estações)
+DURACAO_LEASE = 120.0           # Segundos sem renovação até os itens voltarem para a fila
+INTERVALO_RENOVACAO = DURACAO_LEASE / 4
+ESPERA_OUTRAS_ESTACOES = 0.2    # Sondagem enquanto só restam itens reservados por outras estações
+INTERVALO_CONFIRMACAO = 1.0     # Confirmações vão junto com a próxima reserva ou, no máximo, a cada 1 s
+PRAZO_ACOMPANHAMENTO = 60.0     # Segundos sem renovação até a fila acompanhada poder ser concluída
+ESPERA_PLANILHA = 2.0           # Sondagem com a fila vazia à espera de linhas novas da planilha
+PRAZO_ABANDONO = 12 * 3600.0    # Segundos sem atividade até um trabalho aberto ser dado como abandonado
+
+def obter_caminho_fila():
+    """Arquivo da fila: 'fila_compartilhada' em config_cliente.json ou fila_trabalho.sqlite ao lado do app."""
+    if os.path.exists(db_manager.CONFIG_FILE):
+        try:
+            with open(db_manager.CONFIG_FILE, 'r', encoding='utf-8') as f:
+                caminho = str(json.load(f).get(CHAVE_CONFIG_FILA, '')).strip()
+                if caminho: return caminho
+        except Exception:
+            pass
+    return utils.get_external_path(NOME_FILA_PADRAO)
+
+CAMINHO_FILA = obter_caminho_fila()
+
+# --- CONEXÃO (UMA POR THREAD) E ESQUEMA ---
+
+# Journal clássico (sem WAL): o WAL exige memória compartilhada e não funciona
+# entre PCs diferentes numa pasta de rede.
+PRAGMAS = (
+    "PRAGMA journal_mode=DELETE",
+    "PRAGMA busy_timeout=15000",
+)
+
+MIGRACOES = [
+    # 1. Trabalhos e itens
+    [
+        """CREATE TABLE IF NOT EXISTS fila_trabalhos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            criado_em TEXT NOT NULL,
+            estacao TEXT,
+            arquivo TEXT,
+            cidade_filtro TEXT,
+            backlog_filtro TEXT,
+            fingerprint TEXT,
+            total INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'aberto'
+        )""",
+        """CREATE TABLE IF NOT EXISTS fila_itens (
+            trabalho_id INTEGER NOT NULL,
+            indice INTEGER NOT NULL,
+            valor TEXT NOT NULL,
+            estado TEXT NOT NULL DEFAULT 'livre',
+            estacao TEXT,
+            lease_ate REAL NOT NULL DEFAULT 0,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            resultado TEXT,
+            concluido_em TEXT,
+            PRIMARY KEY (trabalho_id, indice),
+            UNIQUE (trabalho_id, valor)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_fila_itens_estado ON fila_itens (trabalho_id, estado, lease_ate)",
+        "CREATE INDEX IF NOT EXISTS idx_fila_itens_estacao ON fila_itens (estacao, estado)",
+    ],
+    # 2. Acompanhamento da planilha (prazo renovado pela estação que carregou)
+    [
+        "ALTER TABLE fila_trabalhos ADD COLUMN acompanhado_ate REAL NOT NULL DEFAULT 0",
+    ],
+    # 3. Última atividade do trabalho (expiração dos abandonados)
+    [
+        "ALTER TABLE fila_trabalhos ADD COLUMN atividade_em REAL NOT NULL DEFAULT 0",
+        "UPDATE fila_trabalhos SET atividade_em = CAST(strftime('%s', 'now') AS REAL)",
+    ],
+]
+
+_LOCAL = threading.local()
+_ESQUEMA_OK = set()
+_LOCK_ESQUEMA = threading.Lock()
+
+def _conexao():
+    """Conexão da thread atual com CAMINHO_FILA (autocommit: as transações são explícitas)."""
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is not None and _LOCAL.nome == CAMINHO_FILA:
+        return conn
+    fechar_conexao()
+
+    conn = sqlite3.connect(CAMINHO_FILA, timeout=15, isolation_level=None, cached_statements=db_manager.CACHE_STATEMENTS)
+    for pragma in PRAGMAS:
+        try: conn.execute(pragma)
+        except sqlite3.DatabaseError: pass
+    with _LOCK_ESQUEMA:
+        if CAMINHO_FILA not in _ESQUEMA_OK:
+            db_manager._migrar(conn, MIGRACOES)
+            _ESQUEMA_OK.add(CAMINHO_FILA)
+    _LOCAL.conn, _LOCAL.nome = conn, CAMINHO_FILA
+    return conn
+
+@contextmanager
+def _transacao():
+    """
+    BEGIN IMMEDIATE: trava a escrita já no início, então o SELECT + UPDATE da
+    reserva é atômico entre estações (quem chega depois espera o busy_timeout).
+    """
+    conn = _conexao()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn.cursor()
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+def fechar_conexao():
+    conn = getattr(_LOCAL, "conn", None)
+    _LOCAL.conn = None
+    if conn is not None:
+        try: conn.close()
+        except Exception: pass
+
+_SEQUENCIA = itertools.count(1)
+
+def nome_estacao():
+    """Identificador único desta estação/trabalhador ('PC-07:4120:2')."""
+    return f"{socket.gethostname()}:{os.getpid()}:{next(_SEQUENCIA)}"
+
+# --- TRABALHOS ---
+
+def carregar_trabalho(itens, arquivo, cidade_filtro, backlog_filtro, fingerprint, estacao=None):
+    """
+    Abre um trabalho com os itens (indice, valor) numa única transação.
+    O mesmo conjunto (fingerprint + filtros) já aberto é reaproveitado, então
+    recarregar depois de uma queda não duplica nada.
+    Retorna (trabalho_id, inseridos, repetidos, em_outro_trabalho).
+    """
+    backlog_filtro = str(backlog_filtro or '')
+    with _transacao() as cursor:
+        _expirar_abandonados(cursor)
+        cursor.execute("""
+            SELECT id, total FROM fila_trabalhos
+            WHERE status IN ('aberto', 'abandonado') AND arquivo = ? AND cidade_filtro = ? AND backlog_filtro = ? AND fingerprint = ?
+            ORDER BY id DESC LIMIT 1
+        """, (arquivo, cidade_filtro, backlog_filtro, fingerprint))
+        existente = cursor.fetchone()
+        if existente:
+            cursor.execute("UPDATE fila_trabalhos SET status = 'aberto', atividade_em = ? WHERE id = ?", (time.time(), existente[0]))
+            return existente[0], 0, 0, 0
+
+        cursor.execute("""
+            INSERT INTO fila_trabalhos (criado_em, estacao, arquivo, cidade_filtro, backlog_filtro, fingerprint, atividade_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (db_manager._agora(), estacao, arquivo, cidade_filtro, backlog_filtro, fingerprint, time.time()))
+        trabalho_id = cursor.lastrowid
+
+        # Valores que já estão em outro trabalho aberto ficam de fora
+        cursor.execute("""
+            SELECT DISTINCT i.valor FROM fila_itens i JOIN fila_trabalhos t ON t.id = i.trabalho_id
+            WHERE t.status = 'aberto' AND t.id <> ?
+        """, (trabalho_id,))
+        em_aberto = {v for (v,) in cursor.fetchall()}
+        novos = [(trabalho_id, i, v) for i, v in itens if v not in em_aberto]
+        cursor.executemany("INSERT OR IGNORE INTO fila_itens (trabalho_id, indice, valor) VALUES (?, ?, ?)", novos)
+        inseridos = cursor.execute("SELECT COUNT(*) FROM fila_itens WHERE trabalho_id = ?", (trabalho_id,)).fetchone()[0]
+        cursor.execute("UPDATE fila_trabalhos SET total = ?, status = ? WHERE id = ?",
+                       (inseridos, 'aberto' if inseridos else 'concluido', trabalho_id))
+    return trabalho_id, inseridos, len(novos) - inseridos, len(itens) - len(novos)
+
+def acrescentar_itens(trabalho_id, valores):
+    """
+    Linhas novas da planilha acompanhada no fim do trabalho (índices depois
+    do último). Valores já no trabalho ou em outro trabalho aberto ficam de fora.
+    Retorna (inseridos, em_outro_trabalho).
+    """
+    with _transacao() as cursor:
+        _expirar_abandonados(cursor)
+        cursor.execute("""
+            SELECT DISTINCT i.valor FROM fila_itens i JOIN fila_trabalhos t ON t.id = i.trabalho_id
+            WHERE t.status = 'aberto' AND t.id <> ?
+        """, (trabalho_id,))
+        em_aberto = {v for (v,) in cursor.fetchall()}
+        proximo = cursor.execute("SELECT COALESCE(MAX(indice), -1) + 1 FROM fila_itens WHERE trabalho_id = ?", (trabalho_id,)).fetchone()[0]
+        novos = [v for v in valores if v not in em_aberto]
+        cursor.executemany("INSERT OR IGNORE INTO fila_itens (trabalho_id, indice, valor) VALUES (?, ?, ?)",
+                           [(trabalho_id, proximo + k, v) for k, v in enumerate(novos)])
+        inseridos = cursor.rowcount if novos else 0
+        cursor.execute("""UPDATE fila_trabalhos SET total = (SELECT COUNT(*) FROM fila_itens WHERE trabalho_id = ?),
+                          status = 'aberto', atividade_em = ? WHERE id = ?""", (trabalho_id, time.time(), trabalho_id))
+    return inseridos, len(valores) - len(novos)
+
+def marcar_acompanhamento(trabalho_id, ativo=True):
+    """Renova (ou encerra) o prazo em que a planilha deste trabalho está sendo acompanhada."""
+    with _transacao() as cursor:
+        if ativo:
+            cursor.execute("UPDATE fila_trabalhos SET acompanhado_ate = ?, atividade_em = ?, status = 'aberto' WHERE id = ?",
+                           (time.time() + PRAZO_ACOMPANHAMENTO, time.time(), trabalho_id))
+        else:
+            cursor.execute("UPDATE fila_trabalhos SET acompanhado_ate = 0 WHERE id = ?", (trabalho_id,))
+            _concluir_se_vazio(cursor, trabalho_id)
+
+def _expirar_abandonados(cursor):
+    """
+    Trabalhos abertos sem atividade há PRAZO_ABANDONO (e sem acompanhamento em dia)
+    viram 'abandonado'; o que ficou em 'enviando' neles vai para revisão.
+    """
+    agora = time.time()
+    abandonados = "SELECT id FROM fila_trabalhos WHERE status = 'aberto' AND atividade_em < ? AND acompanhado_ate < ?"
+    parametros = (agora - PRAZO_ABANDONO, agora)
+    cursor.execute(f"UPDATE fila_itens SET estado = 'revisao' WHERE estado = 'enviando' AND trabalho_id IN ({abandonados})", parametros)
+    cursor.execute(f"UPDATE fila_trabalhos SET status = 'abandonado' WHERE id IN ({abandonados})", parametros)
+
+def _concluir_se_vazio(cursor, trabalho_id):
+    """Conclui o trabalho se não restar item livre, reservado ou em envio (os de revisão ficam listados)."""
+    cursor.execute("""
+        UPDATE fila_trabalhos SET status = 'concluido' WHERE id = ? AND NOT EXISTS
+        (SELECT 1 FROM fila_itens WHERE trabalho_id = ? AND estado IN ('livre', 'reservado', 'enviando'))
+    """, (trabalho_id, trabalho_id))
+
+def itens_em_revisao(trabalho_id):
+    """(indice, valor, estacao) dos itens que uma estação colou e não confirmou antes de cair."""
+    return _conexao().execute("SELECT indice, valor, estacao FROM fila_itens WHERE trabalho_id = ? AND estado = 'revisao' ORDER BY indice",
+                              (trabalho_id,)).fetchall()
+
+def trabalho_acompanhado(trabalho_id):
+    """True enquanto alguma estação acompanha a planilha deste trabalho (prazo em dia)."""
+    row = _conexao().execute("SELECT acompanhado_ate FROM fila_trabalhos WHERE id = ?", (trabalho_id,)).fetchone()
+    return bool(row) and row[0] > time.time()
+
+def buscar_trabalho_aberto(trabalho_id=None):
+    """O trabalho indicado ou o aberto mais recente, como dicionário, ou None."""
+    colunas = ("id", "criado_em", "estacao", "arquivo", "cidade_filtro", "backlog_filtro", "total", "status")
+    conn = _conexao()
+    if trabalho_id:
+        row = conn.execute(f"SELECT {', '.join(colunas)} FROM fila_trabalhos WHERE id = ?", (trabalho_id,)).fetchone()
+    else:
+        row = conn.execute(f"SELECT {', '.join(colunas)} FROM fila_trabalhos WHERE status = 'aberto' ORDER BY id DESC LIMIT 1").fetchone()
+    return dict(zip(colunas, row)) if row else None
+
+def progresso_trabalho(trabalho_id):
+    """Contagem por estado: {'livre': n, 'reservado': n, 'enviando': n, 'feito': n, 'revisao': n}."""
+    conn = _conexao()
+    rows = conn.execute("SELECT estado, COUNT(*) FROM fila_itens WHERE trabalho_id = ? GROUP BY estado", (trabalho_id,)).fetchall()
+    contagem = {"livre": 0, "reservado": 0, "enviando": 0, "feito": 0, "revisao": 0}
+    contagem.update(dict(rows))
+    return contagem
+
+# --- ESTAÇÃO (RESERVA, RENOVAÇÃO E CONFIRMAÇÃO) ---
+
+class EstacaoFila:
+    """
+    Cliente da fila usado por um automacao_core. Reserva pedaços de
+    'tamanho_reserva' itens, entrega lotes ao motor e confirma o resultado.
+    A reserva fica viva enquanto a thread de renovação rodar (até encerrar()).
+    """
+    def __init__(self, trabalho_id, estacao=None, tamanho_reserva=TAMANHO_RESERVA, duracao_lease=DURACAO_LEASE):
+        self.trabalho_id = trabalho_id
+        self.estacao = estacao or nome_estacao()
+        self.tamanho_reserva = tamanho_reserva
+        self.duracao_lease = duracao_lease
+        self.total = 0
+        self.feitos_estacao = 0
+        self.retomados = 0          # Itens reservados de estações que pararam de renovar
+        self.revisao = []           # (indice, valor) que outra estação colou e não confirmou (vistos por esta)
+        self._reservados = []       # (indice, valor) ainda não entregues ao motor
+        self._em_maos = set()       # Índices reservados e não confirmados (inclui o lote em envio)
+        self._perdidos = set()      # Índices cujo prazo venceu antes da renovação
+        self._confirmacoes = []     # Resultados ainda não gravados (vão na próxima transação)
+        self._ultima_gravacao = time.time()
+        self._feitos_lidos = (0, 0, 0.0) # (feitos na fila, confirmados aqui até então, quando)
+        self._lock = threading.RLock()
+        self._parar = threading.Event()
+        self._renovador = None
+
+    def iniciar(self):
+        trabalho = buscar_trabalho_aberto(self.trabalho_id)
+        if not trabalho: raise ValueError(f"Trabalho #{self.trabalho_id} não encontrado na fila.")
+        self.total = trabalho["total"]
+        self._renovador = threading.Thread(target=self._renovar_periodicamente, name=f"lease-{self.estacao}", daemon=True)
+        self._renovador.start()
+        return trabalho
+
+    def _gravar_confirmacoes(self, cursor):
+        """Grava os resultados pendentes. Retorna quantos já não eram desta estação (prazo vencido)."""
+        pendentes, self._confirmacoes = self._confirmacoes, []
+        self._ultima_gravacao = time.time()
+        if not pendentes: return 0
+        # 'revisao': a confirmação chegou depois do prazo, mas ninguém colou de novo
+        cursor.executemany("""
+            UPDATE fila_itens SET estado = 'feito', resultado = ?, concluido_em = ?
+            WHERE trabalho_id = ? AND indice = ? AND estacao = ? AND estado IN ('enviando', 'revisao')
+        """, pendentes)
+        with self._lock:
+            self._em_maos.difference_update(p[3] for p in pendentes)
+        return len(pendentes) - cursor.rowcount
+
+    def _reservar(self, quantidade):
+        agora = time.time()
+        with _transacao() as cursor:
+            self._gravar_confirmacoes(cursor)
+            # Colados por uma estação que parou de renovar: conferência manual, nunca outra colagem
+            cursor.execute("SELECT indice, valor FROM fila_itens WHERE trabalho_id = ? AND estado = 'enviando' AND lease_ate < ?",
+                           (self.trabalho_id, agora))
+            vencidos = cursor.fetchall()
+            if vencidos:
+                cursor.executemany("UPDATE fila_itens SET estado = 'revisao' WHERE trabalho_id = ? AND indice = ?",
+                                   [(self.trabalho_id, i) for i, _ in vencidos])
+            cursor.execute("""
+                SELECT indice, valor, estado FROM fila_itens
+                WHERE trabalho_id = ? AND (estado = 'livre' OR (estado = 'reservado' AND lease_ate < ?))
+                ORDER BY indice LIMIT ?
+            """, (self.trabalho_id, agora, quantidade))
+            itens = cursor.fetchall()
+            cursor.executemany("""
+                UPDATE fila_itens SET estado = 'reservado', estacao = ?, lease_ate = ?, tentativas = tentativas + 1
+                WHERE trabalho_id = ? AND indice = ?
+            """, [(self.estacao, agora + self.duracao_lease, self.trabalho_id, i) for i, _, _ in itens])
+            cursor.execute("UPDATE fila_trabalhos SET atividade_em = ? WHERE id = ?", (agora, self.trabalho_id))
+        self.revisao += vencidos
+        self.retomados += sum(1 for _, _, estado in itens if estado == 'reservado')
+        self._em_maos.update(i for i, _, _ in itens)
+        return [(i, v) for i, v, _ in itens]
+
+    def _renovar_periodicamente(self):
+        while not self._parar.wait(min(INTERVALO_RENOVACAO, self.duracao_lease / 4)):
+            try: self.renovar()
+            except Exception as e: print(f"⚠️ [Fila] Falha ao renovar reservas: {e}")
+        fechar_conexao() # Conexão da thread de renovação
+
+    def renovar(self):
+        """Estende o prazo dos itens desta estação; os que outra estação já retomou são descartados."""
+        with self._lock:
+            pendentes = set(self._em_maos)
+        if not pendentes: return
+        with _transacao() as cursor:
+            cursor.execute("UPDATE fila_itens SET lease_ate = ? WHERE trabalho_id = ? AND estacao = ? AND estado IN ('reservado', 'enviando')",
+                           (time.time() + self.duracao_lease, self.trabalho_id, self.estacao))
+            renovados = cursor.rowcount
+            cursor.execute("UPDATE fila_trabalhos SET atividade_em = ? WHERE id = ?", (time.time(), self.trabalho_id))
+            if renovados >= len(pendentes): return
+            cursor.execute("SELECT indice FROM fila_itens WHERE trabalho_id = ? AND estacao = ? AND estado IN ('reservado', 'enviando')",
+                           (self.trabalho_id, self.estacao))
+            mantidos = {i for (i,) in cursor.fetchall()}
+        with self._lock:
+            self._perdidos |= pendentes - mantidos
+            self._em_maos -= pendentes - mantidos
+
+    def proximo_lote(self, tamanho, sessao, log_textbox=None):
+        """
+        Até 'tamanho' itens (indice, valor) reservados por esta estação.
+        Lista vazia: trabalho concluído, sessão cancelada ou pausada (o motor
+        trata a pausa). Enquanto só restarem itens de outras estações, ou a
+        planilha estiver sendo acompanhada, espera.
+        """
+        avisou = None
+        while not sessao.cancelado and not sessao.pausado:
+            with self._lock:
+                if self._perdidos:
+                    self._reservados = [(i, v) for i, v in self._reservados if i not in self._perdidos]
+                    self._perdidos.clear()
+                if len(self._reservados) < tamanho:
+                    vistos = len(self.revisao)
+                    self._reservados += self._reservar(max(self.tamanho_reserva, tamanho) - len(self._reservados))
+                    if log_textbox and len(self.revisao) > vistos: _avisar_revisao(log_textbox, self.trabalho_id, self.revisao[vistos:])
+                if self._reservados:
+                    lote, self._reservados = self._reservados[:tamanho], self._reservados[tamanho:]
+                    return lote
+
+            contagem = progresso_trabalho(self.trabalho_id)
+            self.total = sum(contagem.values())
+            com_outras = contagem["reservado"] + contagem["enviando"]
+            if com_outras:
+                motivo, espera = f"{com_outras} item(ns) com outras estações. Aguardando...", ESPERA_OUTRAS_ESTACOES
+            elif contagem["livre"]:
+                continue # Chegaram itens (planilha acompanhada) ou um prazo venceu
+            elif trabalho_acompanhado(self.trabalho_id):
+                motivo, espera = "Fila vazia. Aguardando linhas novas da planilha...", ESPERA_PLANILHA
+            else:
+                self._concluir_trabalho()
+                return []
+            if log_textbox and avisou != motivo:
+                log_textbox.insert("end", f"[{time.strftime('%H:%M:%S')}] ⏳ {motivo}\n")
+                avisou = motivo
+            sessao.esperar(espera)
+        return []
+
+    def enviando(self, itens):
+        """
+        Grava 'enviando' nos itens ANTES da colagem (junto com as confirmações
+        pendentes). Devolve só os que ainda eram desta estação: um item cujo
+        prazo venceu não é colado.
+        """
+        with _transacao() as cursor:
+            self._gravar_confirmacoes(cursor)
+            cursor.executemany("""
+                UPDATE fila_itens SET estado = 'enviando', lease_ate = ?
+                WHERE trabalho_id = ? AND indice = ? AND estacao = ? AND estado = 'reservado'
+            """, [(time.time() + self.duracao_lease, self.trabalho_id, i, self.estacao) for i, _ in itens])
+            if cursor.rowcount == len(itens): return itens
+            marcados = {i for (i,) in cursor.execute(
+                f"SELECT indice FROM fila_itens WHERE trabalho_id = ? AND estacao = ? AND estado = 'enviando' AND indice IN ({','.join('?' * len(itens))})",
+                (self.trabalho_id, self.estacao, *[i for i, _ in itens]))}
+        with self._lock:
+            self._em_maos -= {i for i, _ in itens} - marcados
+        return [(i, v) for i, v in itens if i in marcados]
+
+    def concluir(self, itens, resultado="ok"):
+        """
+        Marca os itens como feitos (gravados junto com a próxima reserva ou
+        após INTERVALO_CONFIRMACAO). Retorna quantas confirmações gravadas agora
+        não acharam o item desta estação em envio (não deveria acontecer).
+        """
+        agora = db_manager._agora()
+        self._confirmacoes += [(resultado, agora, self.trabalho_id, i, self.estacao) for i, _ in itens]
+        self.feitos_estacao += len(itens)
+        if time.time() - self._ultima_gravacao < INTERVALO_CONFIRMACAO: return 0
+        with _transacao() as cursor:
+            return self._gravar_confirmacoes(cursor)
+
+    def feitos(self):
+        """Itens feitos por todas as estações (lido da fila no máximo 1x/s; entre leituras soma os daqui)."""
+        lidos, meus, quando = self._feitos_lidos
+        if time.time() - quando >= INTERVALO_CONFIRMACAO:
+            contagem = progresso_trabalho(self.trabalho_id)
+            self.total = sum(contagem.values()) # Cresce com a planilha acompanhada
+            lidos, meus, quando = contagem["feito"] + contagem["revisao"], self.feitos_estacao, time.time()
+            self._feitos_lidos = (lidos, meus, quando)
+        return lidos + self.feitos_estacao - meus
+
+    def _concluir_trabalho(self):
+        with _transacao() as cursor:
+            _concluir_se_vazio(cursor, self.trabalho_id)
+
+    def encerrar(self):
+        """
+        Para a renovação e devolve à fila o que foi reservado e não enviado.
+        Um lote interrompido em 'enviando' (cancelado durante o envio) fica
+        como está: vencido o prazo, vai para revisão.
+        """
+        self._parar.set()
+        if self._renovador: self._renovador.join(timeout=5)
+        with self._lock:
+            devolver, self._reservados = self._reservados, []
+        try:
+            with _transacao() as cursor:
+                self._gravar_confirmacoes(cursor)
+                if devolver:
+                    cursor.executemany("""
+                        UPDATE fila_itens SET estado = 'livre', estacao = NULL, lease_ate = 0
+                        WHERE trabalho_id = ? AND indice = ? AND estacao = ? AND estado = 'reservado'
+                    """, [(self.trabalho_id, i, self.estacao) for i, _ in devolver])
+        finally:
+            with self._lock: self._em_maos.clear()
+            fechar_conexao()
+
+# --- EXECUÇÃO NO MODO FILA ---
+
+def _log(msg):
+    return f"[{time.strftime('%H:%M:%S')}] {msg}"
+
+def _avisar_revisao(log_textbox, trabalho_id, itens):
+    log_textbox.insert("end", _log(f"⚠️ Fila #{trabalho_id}: {len(itens)} item(ns) colado(s) por uma estação que parou antes de "
+                                   f"confirmar. Confira no site (não serão colados de novo):\n"))
+    for _, valor in itens: log_textbox.insert("end", f"   -> {valor}\n")
+
+def automacao_estacao(log_textbox, cidade_filtro, backlog_filtro, delay_inicial, safe_configure_buttons_cb, safe_update_gui_cb, backends, carregar=True, arquivo=None, sessao=None, progresso_cb=None, acompanhar_planilha=False, **opcoes):
+    """
+    Modo fila. 'carregar': lê e filtra a planilha e abre (ou reaproveita) o
+    trabalho; senão a estação entra no trabalho aberto mais recente. Depois
+    roda um automacao_core por backend, todos reservando da mesma fila.
+    'acompanhar_planilha' (só com 'carregar'): as linhas novas da planilha
+    entram no mesmo trabalho enquanto esta estação rodar.
+    """
+    import paralelo
+    import automation_logic
+    import acompanhamento
+
+    arquivo = arquivo or ingestao.ORIGEM
+    acompanhar_planilha = acompanhar_planilha and carregar
+    trabalho_id = None
+    acompanhador = None
+    try:
+        if carregar:
+            assinatura = ingestao.assinatura(arquivo)
+            dados, _, msg = utils.ler_e_filtrar_dados(arquivo, cidade_filtro, backlog_filtro, log_textbox)
+            log_textbox.insert("end", _log(f"{msg}\n"))
+            lista = preparacao.preparar_lista(dados)
+            preparacao.registrar_rejeitados(lista, log_textbox)
+            if len(lista) or acompanhar_planilha:
+                trabalho_id, inseridos, repetidos, fora = carregar_trabalho(
+                    lista.itens(), arquivo, cidade_filtro, backlog_filtro, lista.fingerprint(), nome_estacao())
+                if inseridos or repetidos or fora:
+                    log_textbox.insert("end", _log(f"🗂️ Fila #{trabalho_id}: {inseridos} itens carregados "
+                                                   f"({repetidos} repetidos, {fora} já em outro trabalho aberto).\n"))
+                else:
+                    log_textbox.insert("end", _log(f"🗂️ Mesmos registros da fila #{trabalho_id} (aberta): continuando nela.\n"))
+            if acompanhar_planilha:
+                marcar_acompanhamento(trabalho_id)
+                acompanhador = acompanhamento.AcompanhadorPlanilha(
+                    arquivo, cidade_filtro, backlog_filtro, lista.chaves,
+                    _acrescentar_na_fila(trabalho_id, log_textbox), log_textbox, assinatura=assinatura,
+                    a_cada_volta=lambda: _renovar_acompanhamento(trabalho_id)).iniciar()
+        else:
+            trabalho = buscar_trabalho_aberto()
+            if trabalho: trabalho_id = trabalho["id"]
+            else: log_textbox.insert("end", _log(f"🗂️ Nenhum trabalho aberto em {CAMINHO_FILA}.\n"))
+        if trabalho_id is not None:
+            revisao = itens_em_revisao(trabalho_id)
+            if revisao: _avisar_revisao(log_textbox, trabalho_id, [(i, v) for i, v, _ in revisao])
+    except Exception as e:
+        log_textbox.insert("end", _log(f"❌ ERRO na fila compartilhada ({CAMINHO_FILA}): {e}\n"))
+        if sessao: sessao.status = "Erro"
+        safe_update_gui_cb(status="Erro")
+        safe_configure_buttons_cb(iniciar_state="normal", continuar_state="disabled")
+        return
+    finally:
+        fechar_conexao()
+
+    if trabalho_id is None:
+        if sessao: sessao.status = "Finalizado"
+        safe_update_gui_cb(status="Finalizado")
+        safe_configure_buttons_cb(iniciar_state="normal", continuar_state="disabled")
+        return
+
+    try:
+        if len(backends) > 1:
+            paralelo.automacao_paralela(log_textbox, cidade_filtro, backlog_filtro, delay_inicial, safe_configure_buttons_cb, safe_update_gui_cb,
+                                        backends, sessao=sessao, arquivo=arquivo, progresso_cb=progresso_cb, trabalho_fila=trabalho_id, **opcoes)
+        else:
+            automation_logic.automacao_core(log_textbox, cidade_filtro, backlog_filtro, delay_inicial, safe_configure_buttons_cb, safe_update_gui_cb,
+                                            sessao=sessao, backend=backends[0], arquivo=arquivo, fila=EstacaoFila(trabalho_id), **opcoes)
+    finally:
+        if acompanhador:
+            # As outras estações concluem o trabalho assim que a fila esvaziar
+            acompanhador.parar()
+            try: marcar_acompanhamento(trabalho_id, False)
+            except Exception as e: log_textbox.insert("end", _log(f"⚠️ Falha ao encerrar o acompanhamento da fila #{trabalho_id}: {e}\n"))
+            finally: fechar_conexao()
+
+def _renovar_acompanhamento(trabalho_id):
+    """Roda na thread do acompanhamento (conexão aberta e fechada a cada volta)."""
+    try: marcar_acompanhamento(trabalho_id)
+    finally: fechar_conexao()
+
+def _acrescentar_na_fila(trabalho_id, log_textbox):
+    def acrescentar(valores, linhas, chaves):
+        try:
+            inseridos, fora = acrescentar_itens(trabalho_id, valores)
+        finally:
+            fechar_conexao()
+        log_textbox.insert("end", _log(f"➕ Fila #{trabalho_id}: {inseridos} item(ns) novo(s) da planilha"
+                                       f"{f' ({fora} já em outro trabalho aberto)' if fora else ''}.\n"))
+    return acrescentar
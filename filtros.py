@@ -0,0 +1,198 @@
+import re
+
+# ####################################################################
+# --- MOTOR DE FILTROS (ESPECIFICAÇÃO -> MÁSCARA ÚNICA) ---
+# ####################################################################
+#
+# Uma especificação de filtro é um dicionário simples:
+#
+#   {
+#       'scan_types': ["recebido no DS", "(recebido no DS)"],
+#       'cidades_incluir': ["CAMPINAS", "SANTOS"],
+#       'cidades_excluir': ["SAO PAULO"],
+#       'backlog': "1,2,>=7,10-12",
+#       'predicados': [{'coluna': 'Service Type', 'op': '==', 'valor': 'EXPRESSO'}],
+#   }
+#
+# Todas as chaves são opcionais. A especificação é compilada em uma
+# função que devolve UMA máscara booleana; cada coluna é normalizada
+# (strip/upper ou numérico) uma única vez por DataFrame. O Scan Type é
+# comparado só com strip, respeitando maiúsculas (como sempre foi); um
+# predicado numa coluna que a planilha não tem é erro, não filtro ignorado.
+
+SCAN_TYPES_PADRAO = ["(recebido no DS)", "recebido no DS"]
+IGNORAR_CIDADE = ["SELECIONE", "NENHUM FILTRO", ""]
+
+OPERADORES_TEXTO = {'==', '!=', 'in', 'not in', 'contains', 'startswith', 'regex', 'vazio', 'preenchido'}
+OPERADORES_NUMERICOS = {'>', '>=', '<', '<=', 'entre'}
+
+_RE_INTERVALO = re.compile(r'^(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)$')
+_RE_COMPARACAO = re.compile(r'^(>=|<=|>|<|==|=|!=)?\s*(-?\d+(?:\.\d+)?)$')
+
+# --- RESOLUÇÃO DE COLUNAS ---
+def coluna_scan(colunas):
+    return next((c for c in colunas if "scan type" in c.lower()), None)
+
+def coluna_cidade(colunas):
+    return 'Destination City' if 'Destination City' in colunas else ('Cidade' if 'Cidade' in colunas else None)
+
+def coluna_backlog(colunas):
+    return next((c for c in ['Backlog', 'Backlog time(Station)'] if c in colunas), None)
+
+# --- INTERPRETAÇÃO ---
+def interpretar_intervalos(texto):
+    """
+    Converte '1,2,>=7,10-12' em condições [('==', 1), ('==', 2), ('>=', 7), ('entre', (10, 12))].
+    Lança ValueError se algum termo for inválido.
+    """
+    condicoes = []
+    for termo in str(texto).replace(';', ',').split(','):
+        termo = termo.strip()
+        if not termo: continue
+        m = _RE_INTERVALO.match(termo)
+        if m:
+            a, b = float(m.group(1)), float(m.group(2))
+            condicoes.append(('entre', (min(a, b), max(a, b))))
+            continue
+        m = _RE_COMPARACAO.match(termo)
+        if not m:
+            raise ValueError(f"Termo de backlog inválido: '{termo}'")
+        op = m.group(1) or '=='
+        condicoes.append(('==' if op == '=' else op, float(m.group(2))))
+    return condicoes
+
+def montar_spec(cidade_filtro=None, backlog_filtro=None, base=None):
+    """
+    Monta a especificação a partir dos campos da tela.
+    Cidades com prefixo '!' são exclusões (ex: 'CAMPINAS,!SANTOS').
+    'base' traz opções adicionais (scan_types, predicados...) da configuração.
+    """
+    spec = {'scan_types': list(SCAN_TYPES_PADRAO), 'cidades_incluir': [], 'cidades_excluir': [],
+            'backlog': None, 'predicados': []}
+    for chave, valor in (base or {}).items():
+        spec[chave] = list(valor) if isinstance(valor, (list, tuple)) else valor
+
+    if cidade_filtro and cidade_filtro not in IGNORAR_CIDADE:
+        for c in str(cidade_filtro).split(','):
+            c = c.strip()
+            if not c or c.upper() in IGNORAR_CIDADE: continue
+            if c.startswith('!'): spec['cidades_excluir'].append(c[1:])
+            else: spec['cidades_incluir'].append(c)
+
+    if backlog_filtro is not None and str(backlog_filtro).strip():
+        spec['backlog'] = str(backlog_filtro).strip()
+    return spec
+
+def colunas_usadas(spec, colunas):
+    """Colunas da planilha que a especificação precisa ler (para leitura com projeção)."""
+    usadas = []
+    if spec.get('scan_types'): usadas.append(coluna_scan(colunas))
+    if spec.get('cidades_incluir') or spec.get('cidades_excluir'): usadas.append(coluna_cidade(colunas))
+    if spec.get('backlog'): usadas.append(coluna_backlog(colunas))
+    usadas += [p['coluna'] for p in spec.get('predicados', []) if p.get('coluna') in colunas]
+    return [c for c in dict.fromkeys(usadas) if c]
+
+# --- COMPILAÇÃO ---
+class _Normalizador:
+    """Guarda as colunas já normalizadas de um DataFrame (cada uma é calculada uma vez)."""
+    def __init__(self, df):
+        self.df = df
+        self._texto = {}
+        self._limpo = {}
+        self._numero = {}
+
+    def limpo(self, col):
+        """Texto sem bordas; célula vazia vira '' (o pandas 3 mantém NaN no astype(str))."""
+        if col not in self._limpo:
+            self._limpo[col] = self.df[col].fillna('').astype(str).str.strip()
+        return self._limpo[col]
+
+    def texto(self, col):
+        if col not in self._texto:
+            self._texto[col] = self.limpo(col).str.upper()
+        return self._texto[col]
+
+    def numero(self, col):
+        if col not in self._numero:
+            import pandas as pd
+            self._numero[col] = pd.to_numeric(self.df[col], errors='coerce')
+        return self._numero[col]
+
+def _mascara_numerica(serie, condicoes):
+    import pandas as pd
+    mascara = pd.Series(False, index=serie.index)
+    for op, v in condicoes:
+        if op == 'entre': mascara |= serie.between(v[0], v[1])
+        elif op == '==': mascara |= serie == v
+        elif op == '!=': mascara |= serie != v
+        elif op == '>': mascara |= serie > v
+        elif op == '>=': mascara |= serie >= v
+        elif op == '<': mascara |= serie < v
+        elif op == '<=': mascara |= serie <= v
+    return mascara
+
+def _normalizar_lista(valores):
+    if not isinstance(valores, (list, tuple, set)): valores = [valores]
+    return [str(v).strip().upper() for v in valores]
+
+def _mascara_predicado(norm, pred):
+    col, op, valor = pred['coluna'], pred.get('op', '=='), pred.get('valor')
+    if op in OPERADORES_NUMERICOS:
+        cond = [('entre', tuple(valor))] if op == 'entre' else [(op, float(valor))]
+        return _mascara_numerica(norm.numero(col), cond)
+
+    serie = norm.texto(col)
+    if op == '==': return serie == _normalizar_lista(valor)[0]
+    if op == '!=': return serie != _normalizar_lista(valor)[0]
+    if op == 'in': return serie.isin(_normalizar_lista(valor))
+    if op == 'not in': return ~serie.isin(_normalizar_lista(valor))
+    if op == 'contains': return serie.str.contains(_normalizar_lista(valor)[0], regex=False)
+    if op == 'startswith': return serie.str.startswith(_normalizar_lista(valor)[0])
+    if op == 'regex': return norm.limpo(col).str.contains(valor, regex=True, na=False)
+    if op == 'vazio': return serie.isin(['', 'NAN', 'NAT', 'NONE'])
+    if op == 'preenchido': return ~serie.isin(['', 'NAN', 'NAT', 'NONE'])
+    raise ValueError(f"Operador desconhecido: '{op}'")
+
+def compilar_filtro(spec):
+    """
+    Valida a especificação e devolve uma função df -> máscara booleana.
+    Erros de sintaxe (backlog/operadores) aparecem aqui, antes da leitura.
+    """
+    scan_types = [str(v).strip() for v in (spec.get('scan_types') or [])] # Sem upper: o Excel traz a grafia exata
+    incluir = _normalizar_lista(spec.get('cidades_incluir') or [])
+    excluir = _normalizar_lista(spec.get('cidades_excluir') or [])
+    backlog = interpretar_intervalos(spec['backlog']) if spec.get('backlog') else []
+    predicados = list(spec.get('predicados') or [])
+    for p in predicados:
+        if p.get('op', '==') not in OPERADORES_TEXTO | OPERADORES_NUMERICOS:
+            raise ValueError(f"Operador desconhecido: '{p.get('op')}'")
+
+    def mascara(df):
+        import pandas as pd
+        norm = _Normalizador(df)
+        m = pd.Series(True, index=df.index)
+        colunas = df.columns
+
+        col = coluna_scan(colunas)
+        if scan_types and col: m &= norm.limpo(col).isin(scan_types)
+
+        col = coluna_cidade(colunas)
+        if col and incluir: m &= norm.texto(col).isin(incluir)
+        if col and excluir: m &= ~norm.texto(col).isin(excluir)
+
+        col = coluna_backlog(colunas)
+        if col and backlog: m &= _mascara_numerica(norm.numero(col), backlog)
+
+        for p in predicados:
+            if p['coluna'] not in colunas:
+                raise ValueError(f"Coluna do predicado não encontrada na planilha: '{p['coluna']}'")
+            m &= _mascara_predicado(norm, p)
+        return m
+
+    return mascara
+
+def aplicar_spec(df, spec_ou_mascara):
+    """Filtra o DataFrame com uma especificação (ou uma máscara já compilada)."""
+    if df.empty: return df
+    mascara = spec_ou_mascara if callable(spec_ou_mascara) else compilar_filtro(spec_ou_mascara)
+    return df[mascara(df)]
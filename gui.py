@@ -1,27 +1,50 @@
 import customtkinter as ctk
+import tkinter as tk
 import threading
 import utils
-import pyautogui
+from delay_adaptativo import interpretar_faixa_delay
+from sessao import SessaoAutomacao
+from log_execucao import FilaLog, MAX_LINHAS_TELA, INTERVALO_DRENAGEM_MS
+from indice_cidades import IndiceCidades
 import json
 import os
 import time
 from CTkMessagebox import CTkMessagebox
-from automation_logic import automacao_core
 from db_manager import (
     setup_database,
     adicionar_cidade,
-    buscar_nomes_cidades,
-    listar_cidades,
+    adicionar_cidades_em_lote,
+    obter_cidades,
     excluir_cidade,
     adicionar_usuario,
     verificar_credenciais,
     buscar_nome_cidade_por_id,
     listar_usuarios,
-    excluir_usuario
+    excluir_usuario,
+    buscar_execucao_pendente,
+    descartar_execucao
 )
 
 # --- CONSTANTES DE CONFIGURAÇÃO E ESTILO ---
 CONFIG_LOGIN_FILE = "login_config.json"
+ARQUIVO_LOG_EXECUCAO = os.path.join("logs", "execucao.log")
+
+# Modos de entrada (rótulo na tela -> backend do módulo 'entrada')
+MODOS_ENTRADA = {
+    "Navegador": ("pyautogui", {}),
+    "Injeção direta": ("injecao", {}),
+    "Simulação": ("simulado", {"taxa_erro": 0.02, "latencia": 0.1}),
+}
+
+# Quantidade de janelas de navegador no modo paralelo (1 = modo normal)
+JANELAS_PARALELAS = ["1", "2", "3", "4", "6", "8"]
+
+# Fila compartilhada entre estações (rótulo -> carregar a planilha na fila?)
+MODOS_FILA = {
+    "Local": None,              # Só esta estação, com diário próprio
+    "Carregar fila": True,      # Lê/filtra a planilha, publica na fila e trabalha nela
+    "Entrar na fila": False,    # Trabalha no último trabalho aberto (sem planilha/cidades)
+}
 
 # Dimensões
 BTN_HEIGHT_DEFAULT = 35
@@ -67,6 +90,191 @@ class ReadOnlyTextbox(ctk.CTkTextbox):
         super().delete(index1, index2)
         self.configure(state="disabled")
 
+    def inserir_lote(self, texto, limpar=False, max_linhas=None):
+        """Aplica um lote inteiro com uma única troca de estado e corta as linhas mais antigas."""
+        self.configure(state="normal")
+        if limpar: super().delete("1.0", "end")
+        if texto: super().insert("end", texto)
+        if max_linhas:
+            linhas = int(self.index("end-1c").split(".")[0])
+            if linhas > max_linhas: super().delete("1.0", f"{linhas - max_linhas + 1}.0")
+        self.configure(state="disabled")
+
+class SeletorCidade(ctk.CTkFrame):
+    """
+    Campo de cidade com busca ao digitar. As sugestões vêm do índice de
+    prefixos (sem acentos) e excluem as cidades já escolhidas nos outros campos.
+    ↑/↓ navegam, ENTER/TAB confirmam, ESC desfaz. Texto que não corresponde
+    a uma cidade cadastrada volta ao último valor confirmado.
+    """
+    LINHAS_VISIVEIS = 8
+
+    def __init__(self, master, obter_indice, obter_excluidas, ao_mudar=None, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.obter_indice = obter_indice          # () -> IndiceCidades atual
+        self.obter_excluidas = obter_excluidas    # (seletor) -> conjunto de nomes dos outros campos
+        self.ao_mudar = ao_mudar
+        self.valor = ""
+        self.lista = None
+
+        self.entry = ctk.CTkEntry(self, placeholder_text="Digite para buscar...")
+        self.entry.pack(fill="x", expand=True)
+        self.entry.bind("<KeyRelease>", self._ao_digitar)
+        self.entry.bind("<Down>", lambda e: self._mover(1))
+        self.entry.bind("<Up>", lambda e: self._mover(-1))
+        self.entry.bind("<Return>", lambda e: self._confirmar_destacada())
+        self.entry.bind("<Tab>", lambda e: self._confirmar_destacada())
+        self.entry.bind("<Escape>", lambda e: self._desfazer())
+        self.entry.bind("<FocusOut>", lambda e: self.after(150, self._ao_sair))
+
+    def get(self):
+        return self.valor
+
+    def set(self, nome):
+        self.valor = nome or ""
+        self.entry.delete(0, "end")
+        if self.valor: self.entry.insert(0, self.valor)
+        self._esconder()
+
+    # --- Sugestões ---
+
+    def _garantir_lista(self):
+        if self.lista is None:
+            self.lista = tk.Listbox(
+                self.winfo_toplevel(), height=self.LINHAS_VISIVEIS, activestyle="none", exportselection=False,
+                bg="#343638", fg="white", selectbackground=COLOR_SUCCESS, highlightthickness=1,
+                highlightcolor="#565B5E", borderwidth=0, font=("Arial", 11)
+            )
+            self.lista.bind("<ButtonRelease-1>", lambda e: self._confirmar_destacada())
+        return self.lista
+
+    def _mostrar(self, nomes):
+        if not nomes:
+            self._esconder()
+            return
+        lista = self._garantir_lista()
+        lista.delete(0, "end")
+        lista.insert("end", *nomes)
+        lista.configure(height=min(len(nomes), self.LINHAS_VISIVEIS))
+        lista.selection_set(0)
+        lista.place(in_=self.entry, x=0, rely=1.0, relwidth=1.0)
+        lista.lift()
+
+    def _esconder(self):
+        if self.lista is not None: self.lista.place_forget()
+
+    def _visivel(self):
+        return self.lista is not None and self.lista.winfo_ismapped()
+
+    def _ao_digitar(self, event):
+        if event.keysym not in ("Up", "Down", "Return", "Tab", "Escape"): self._sugerir()
+
+    def _sugerir(self):
+        self._mostrar(self.obter_indice().buscar(self.entry.get(), self.obter_excluidas(self)))
+
+    def _mover(self, passo):
+        if not self._visivel():
+            self._sugerir()
+            return "break"
+        atual = self.lista.curselection()
+        novo = max(0, min(self.lista.size() - 1, (atual[0] if atual else -1) + passo))
+        self.lista.selection_clear(0, "end")
+        self.lista.selection_set(novo)
+        self.lista.see(novo)
+        return "break"
+
+    # --- Confirmação ---
+
+    def _confirmar(self, nome):
+        mudou = nome != self.valor
+        self.set(nome)
+        if mudou and self.ao_mudar: self.ao_mudar(self)
+
+    def _confirmar_destacada(self):
+        if self._visivel() and self.lista.curselection():
+            self._confirmar(self.lista.get(self.lista.curselection()[0]))
+        else:
+            self._ao_sair()
+
+    def _desfazer(self):
+        self.set(self.valor)
+
+    def _ao_sair(self):
+        """Aceita o texto se for uma cidade cadastrada (e livre); vazio limpa o campo."""
+        if self.focus_get() is self.lista: return
+        texto = self.entry.get().strip()
+        if not texto:
+            self._confirmar("")
+            return
+        nome = self.obter_indice().resolver(texto)
+        if nome and nome not in self.obter_excluidas(self): self._confirmar(nome)
+        else: self._desfazer()
+
+class DialogoImportacaoCidades(ctk.CTkToplevel):
+    """
+    Janela de importação em lote: lista editável (colada ou vinda da planilha)
+    e um único INSERT em lote ao confirmar.
+    """
+    def __init__(self, master, ao_importar):
+        super().__init__(master)
+        self.ao_importar = ao_importar
+        self.title("Importar Cidades")
+        self.geometry("420x460")
+        self.transient(master)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(
+            self, text="Uma cidade por linha (ou cole um CSV com a coluna 'Destination City'/'Cidade').",
+            wraplength=380, justify="left"
+        ).grid(row=0, column=0, padx=15, pady=(15, 5), sticky="w")
+
+        self.texto = ctk.CTkTextbox(self)
+        self.texto.grid(row=1, column=0, padx=15, pady=5, sticky="nsew")
+
+        self.info_lbl = ctk.CTkLabel(self, text="", text_color="gray")
+        self.info_lbl.grid(row=2, column=0, padx=15, pady=2, sticky="w")
+
+        btns = ctk.CTkFrame(self, fg_color="transparent")
+        btns.grid(row=3, column=0, padx=10, pady=(5, 15), sticky="ew")
+        self.btn_planilha = ctk.CTkButton(
+            btns, text="Da Planilha", width=110, height=BTN_HEIGHT_DEFAULT,
+            fg_color=COLOR_NEUTRAL, hover_color=COLOR_NEUTRAL_HOVER, command=self.carregar_da_planilha
+        )
+        self.btn_planilha.pack(side="left", padx=5)
+        ctk.CTkButton(
+            btns, text="Importar", width=110, height=BTN_HEIGHT_DEFAULT,
+            fg_color=COLOR_SUCCESS, hover_color=COLOR_SUCCESS_HOVER, command=self.importar
+        ).pack(side="right", padx=5)
+
+        self.after(100, self.grab_set)
+
+    def carregar_da_planilha(self):
+        """Lê a planilha fora da thread da interface (cache frio = leitura completa do Excel)."""
+        self.btn_planilha.configure(state="disabled")
+        self.info_lbl.configure(text="Lendo a planilha...")
+        def ler():
+            nomes, msg = utils.extrair_cidades_planilha()
+            try: self.after(0, lambda: self._mostrar_cidades(nomes, msg))
+            except (RuntimeError, tk.TclError): pass # Janela fechada durante a leitura
+        threading.Thread(target=ler, daemon=True).start()
+
+    def _mostrar_cidades(self, nomes, msg):
+        if not self.winfo_exists(): return
+        self.btn_planilha.configure(state="normal")
+        self.info_lbl.configure(text=msg)
+        if nomes:
+            self.texto.delete("1.0", "end")
+            self.texto.insert("1.0", "\n".join(nomes))
+
+    def importar(self):
+        nomes = utils.interpretar_lista_cidades(self.texto.get("1.0", "end"))
+        if not nomes:
+            self.info_lbl.configure(text="Nenhum nome para importar.")
+            return
+        self.ao_importar(nomes)
+        self.destroy()
+
 # ####################################################################
 # --- FUNÇÕES AUXILIARES DE POPUP ---
 # ####################################################################
@@ -191,7 +399,9 @@ class App(ctk.CTk):
         self.status_color = ctk.StringVar(value="gray")
         self.total_de_ciclos_var = ctk.IntVar(value=0)
         self.monitor_thread_started = False
-        self.todas_cidades = []
+        self.sessao = None # Sessão da execução atual (pausa/cancelamento/progresso)
+        self.indice_cidades = IndiceCidades()
+        self.seletores_cidade = [] # Campos de cidade da aba Automação (sempre um vazio no fim)
 
         # Inicia pela tela de Login
         self.construir_tela_login()
@@ -294,10 +504,49 @@ class App(ctk.CTk):
         # Carrega dados iniciais
         self.carregar_cidades_db()
 
-    def limpar_combobox_cidade(self, combobox_instance):
-        """Define o valor do combobox para 'NENHUM FILTRO' e atualiza exclusivas."""
-        combobox_instance.set("NENHUM FILTRO")
-        self.atualizar_listas_exclusivas()
+    # --- CAMPOS DE CIDADE (QUANTIDADE LIVRE) ---
+
+    def adicionar_campo_cidade(self, valor=""):
+        seletor = SeletorCidade(self.cidades_frame, lambda: self.indice_cidades,
+                                self.cidades_escolhidas_exceto, self._cidade_alterada)
+        seletor.rotulo = ctk.CTkLabel(self.cidades_frame)
+        seletor.btn_limpar = ctk.CTkButton(
+            self.cidades_frame, text="X", width=25, height=25,
+            fg_color=COLOR_CLEAR, hover_color=COLOR_CLEAR_HOVER,
+            command=lambda s=seletor: self.remover_campo_cidade(s)
+        )
+        if valor: seletor.set(valor)
+        self.seletores_cidade.append(seletor)
+        self._organizar_campos_cidade()
+        return seletor
+
+    def remover_campo_cidade(self, seletor):
+        """O último campo (o vazio) só é limpo; os outros saem da tela."""
+        if seletor is self.seletores_cidade[-1]:
+            seletor.set("")
+            return
+        self.seletores_cidade.remove(seletor)
+        for w in (seletor.rotulo, seletor.btn_limpar, seletor): w.destroy()
+        self._organizar_campos_cidade()
+
+    def _organizar_campos_cidade(self):
+        for i, s in enumerate(self.seletores_cidade):
+            s.rotulo.configure(text="Cidade Principal:" if i == 0 else f"Cidade {i + 1} (Opc):")
+            s.rotulo.grid(row=i, column=0, padx=5, pady=5, sticky="e")
+            s.grid(row=i, column=1, padx=(5, 0), pady=5, sticky="ew")
+            s.btn_limpar.grid(row=i, column=2, padx=(5, 10), pady=5, sticky="w")
+
+    def _cidade_alterada(self, seletor):
+        # Sempre sobra um campo vazio no fim para a próxima cidade
+        if self.seletores_cidade[-1].get(): self.adicionar_campo_cidade()
+
+    def cidades_escolhidas_exceto(self, seletor=None):
+        """Conjunto das cidades escolhidas nos outros campos (exclusividade entre eles)."""
+        return {s.get() for s in self.seletores_cidade if s is not seletor and s.get()}
+
+    def cidades_escolhidas(self):
+        """Cidades na ordem dos campos (a primeira é a principal)."""
+        return [s.get() for s in self.seletores_cidade if s.get()]
 
     # --- ABA: AUTOMAÇÃO ---
     def setup_tab_automacao(self):
@@ -311,28 +560,11 @@ class App(ctk.CTk):
         # Colunas: 0 (Label), 1 (ComboBox), 2 (Botão Limpar), 3 (Label), 4 (Valor)
         ctrl_frame.columnconfigure((1, 4), weight=1)
 
-        # Função auxiliar para criar Combo + Botão Limpar
-        def create_city_input(frame, row, label_text):
-            ctk.CTkLabel(frame, text=label_text).grid(row=row, column=0, padx=5, pady=5, sticky="e")
-            combo = ctk.CTkComboBox(frame, width=180, command=self.atualizar_listas_exclusivas)
-            combo.grid(row=row, column=1, padx=(5, 0), pady=5, sticky="ew")
-            
-            # Botão Limpar
-            btn_clear = ctk.CTkButton(
-                frame, text="X", width=25, height=25,
-                fg_color=COLOR_CLEAR, hover_color=COLOR_CLEAR_HOVER,
-                command=lambda cb=combo: self.limpar_combobox_cidade(cb)
-            )
-            btn_clear.grid(row=row, column=2, padx=(5, 10), pady=5, sticky="w")
-            
-            return combo
-
-        # Cidades (Linhas 0 a 4)
-        self.cidades_combobox_1 = create_city_input(ctrl_frame, 0, "Cidade Principal:")
-        self.cidades_combobox_2 = create_city_input(ctrl_frame, 1, "Cidade 2 (Opc):")
-        self.cidades_combobox_3 = create_city_input(ctrl_frame, 2, "Cidade 3 (Opc):")
-        self.cidades_combobox_4 = create_city_input(ctrl_frame, 3, "Cidade 4 (Opc):")
-        self.cidades_combobox_5 = create_city_input(ctrl_frame, 4, "Cidade 5 (Opc):")
+        # Cidades (colunas 0 a 2): busca ao digitar, um campo novo aparece a cada cidade escolhida
+        self.cidades_frame = ctk.CTkScrollableFrame(ctrl_frame, fg_color="transparent", height=200)
+        self.cidades_frame.grid(row=0, column=0, rowspan=9, columnspan=3, padx=0, pady=0, sticky="nsew")
+        self.cidades_frame.columnconfigure(1, weight=1)
+        self.adicionar_campo_cidade()
 
         # Controles (Colunas 3 e 4)
 
@@ -349,12 +581,53 @@ class App(ctk.CTk):
         self.status_color.trace_add("write", lambda *args: self.status_lbl.configure(fg_color=self.status_color.get()))
         self.status_color.set("gray")
 
-        # Backlog
+        # Backlog (aceita listas e faixas: "1,2", "10-12", ">=7")
         ctk.CTkLabel(ctrl_frame, text="Backlog:").grid(row=2, column=3, padx=5, pady=5, sticky="e")
-        self.backlog_combobox = ctk.CTkComboBox(ctrl_frame, values=["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "12", "14", "18", "26"], width=80)
+        self.backlog_combobox = ctk.CTkComboBox(ctrl_frame, values=["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "12", "14", "18", "26", "1,2", "1-3", ">=7"], width=80)
         self.backlog_combobox.set("1")
         self.backlog_combobox.grid(row=2, column=4, padx=10, pady=5, sticky="ew")
 
+        # Lote (registros por colagem; 1 = modo unitário)
+        ctk.CTkLabel(ctrl_frame, text="Lote:").grid(row=3, column=3, padx=5, pady=5, sticky="e")
+        self.lote_combobox = ctk.CTkComboBox(ctrl_frame, values=["1", "5", "10", "20", "50"], width=80)
+        self.lote_combobox.set("1")
+        self.lote_combobox.grid(row=3, column=4, padx=10, pady=5, sticky="ew")
+
+        # Delay automático (faixa mín-máx definida pelo operador)
+        self.delay_auto_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            ctrl_frame, text="Delay auto:", variable=self.delay_auto_var,
+            checkbox_width=16, checkbox_height=16, border_width=1
+        ).grid(row=4, column=3, padx=5, pady=5, sticky="e")
+        self.faixa_delay_entry = ctk.CTkEntry(ctrl_frame, width=80)
+        self.faixa_delay_entry.insert(0, "0.05-1.0")
+        self.faixa_delay_entry.grid(row=4, column=4, padx=10, pady=5, sticky="ew")
+
+        # Entrada (Simulação = dry-run: nada é digitado e o diário não é gravado)
+        ctk.CTkLabel(ctrl_frame, text="Entrada:").grid(row=5, column=3, padx=5, pady=5, sticky="e")
+        self.modo_entrada_combobox = ctk.CTkComboBox(ctrl_frame, values=list(MODOS_ENTRADA), width=80, state="readonly")
+        self.modo_entrada_combobox.set("Navegador")
+        self.modo_entrada_combobox.grid(row=5, column=4, padx=10, pady=5, sticky="ew")
+
+        # Janelas (modo paralelo: uma fatia dos registros por janela de navegador)
+        ctk.CTkLabel(ctrl_frame, text="Janelas:").grid(row=6, column=3, padx=5, pady=5, sticky="e")
+        self.janelas_combobox = ctk.CTkComboBox(ctrl_frame, values=JANELAS_PARALELAS, width=80, state="readonly")
+        self.janelas_combobox.set("1")
+        self.janelas_combobox.grid(row=6, column=4, padx=10, pady=5, sticky="ew")
+
+        # Fila (várias estações dividindo o mesmo trabalho, sem repetir registros)
+        ctk.CTkLabel(ctrl_frame, text="Fila:").grid(row=7, column=3, padx=5, pady=5, sticky="e")
+        self.modo_fila_combobox = ctk.CTkComboBox(ctrl_frame, values=list(MODOS_FILA), width=80, state="readonly")
+        self.modo_fila_combobox.set("Local")
+        self.modo_fila_combobox.grid(row=7, column=4, padx=10, pady=5, sticky="ew")
+
+        # Acompanhar planilha (linhas novas da exportação entram sem reiniciar; termina com ESC + PARAR)
+        self.acompanhar_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            ctrl_frame, text="Acompanhar planilha", variable=self.acompanhar_var,
+            checkbox_width=16, checkbox_height=16, border_width=1
+        ).grid(row=8, column=3, columnspan=2, padx=5, pady=5, sticky="e")
+
         # Linhas vazias para manter o espaçamento uniforme
         # Removido (Não necessário com o grid unificado)
 
@@ -383,6 +656,11 @@ class App(ctk.CTk):
         # Barra de Progresso
         prog_frame = ctk.CTkFrame(tab, fg_color="transparent")
         prog_frame.grid(row=2, column=0, padx=10, pady=5, sticky="ew")
+
+        # Barras por trabalhador (modo paralelo); empacotada antes para ficar embaixo
+        self.barras_frame = ctk.CTkFrame(prog_frame, fg_color="transparent")
+        self.barras_frame.pack(side="bottom", fill="x")
+        self.barras_trabalhadores = []
         
         self.progresso_bar = ctk.CTkProgressBar(prog_frame)
         self.progresso_bar.pack(side="left", fill="x", expand=True, padx=(5, 10))
@@ -391,11 +669,22 @@ class App(ctk.CTk):
         self.progresso_contador = ctk.CTkLabel(prog_frame, text="0/0", font=("Arial", 12, "bold"))
         self.progresso_contador.pack(side="right", padx=5)
 
+        self.delay_atual_lbl = ctk.CTkLabel(prog_frame, text="", font=("Arial", 11), text_color="gray")
+        self.delay_atual_lbl.pack(side="right", padx=5)
+
+        # Vazão, percentis do ciclo e ETA (atualizados pelo core)
+        self.metricas_lbl = ctk.CTkLabel(tab, text="", font=("Arial", 11), text_color="gray", anchor="e")
+        self.metricas_lbl.grid(row=3, column=0, padx=15, pady=(5, 0), sticky="ne")
+
         # Log
         ctk.CTkLabel(tab, text="Log de Execução:", anchor="w").grid(row=3, column=0, padx=10, pady=(5, 0), sticky="nw")
         self.log_textbox = ReadOnlyTextbox(tab)
         self.log_textbox.grid(row=4, column=0, padx=10, pady=(0, 10), sticky="nsew") # Linha 4 na aba automação
 
+        # Threads escrevem na fila; a GUI desenha em lotes e o arquivo guarda o log completo
+        self.log = FilaLog(utils.get_external_path(ARQUIVO_LOG_EXECUCAO))
+        self.after(INTERVALO_DRENAGEM_MS, self._drenar_log)
+
     # --- ABA: CADASTRO ---
     def setup_tab_cadastro(self):
         tab = self.tabview.tab("Cadastro")
@@ -409,6 +698,12 @@ class App(ctk.CTk):
         self.nova_cidade_entry = ctk.CTkEntry(add_frame, placeholder_text="Nome da Cidade", height=BTN_HEIGHT_DEFAULT)
         self.nova_cidade_entry.pack(side="left", fill="x", expand=True, padx=10, pady=10)
         
+        ctk.CTkButton(
+            add_frame, text="Importar...", width=100, height=BTN_HEIGHT_DEFAULT,
+            fg_color=COLOR_NEUTRAL, hover_color=COLOR_NEUTRAL_HOVER,
+            command=self.abrir_importacao_cidades
+        ).pack(side="right", padx=(0, 10))
+
         ctk.CTkButton(
             add_frame, text="Adicionar", width=100, height=BTN_HEIGHT_DEFAULT,
             fg_color=COLOR_SUCCESS, hover_color=COLOR_SUCCESS_HOVER,
@@ -487,13 +782,19 @@ class App(ctk.CTk):
     # --- MÉTODOS DE LÓGICA DA INTERFACE ---
     # #################################################################
 
-    def _safe_update_gui(self, status=None, total_ciclos=None, ciclo_atual=None):
+    def _safe_update_gui(self, status=None, total_ciclos=None, ciclo_atual=None, delay_atual=None, metricas=None):
         """Atualiza a GUI de forma segura a partir de threads."""
         def update():
+            if metricas is not None:
+                self.metricas_lbl.configure(text=metricas)
+            if delay_atual is not None:
+                self.delay_atual_lbl.configure(text=f"Delay: {delay_atual}s" if delay_atual else "")
+
             if status:
                 self.status_text.set(status.upper())
                 # Adicionado "Parado" com cor vermelha
-                colors = {"Rodando": "blue", "Pausado": "orange", "Erro": "red", "Finalizado": "green", "Parado": "red"}
+                colors = {"Rodando": "blue", "Pausado": "orange", "Erro": "red", "Finalizado": "green", "Parado": "red",
+                          "Aguardando": "purple"}
                 self.status_color.set(colors.get(status, "gray"))
             
             if total_ciclos is not None:
@@ -509,6 +810,40 @@ class App(ctk.CTk):
                     self.progresso_bar.set(0)
         self.after(0, update)
 
+    def _montar_barras_trabalhadores(self, quantidade):
+        """Uma barra por trabalhador do modo paralelo (nenhuma no modo normal)."""
+        for w in self.barras_frame.winfo_children(): w.destroy()
+        self.barras_trabalhadores = []
+        for k in range(quantidade):
+            linha = ctk.CTkFrame(self.barras_frame, fg_color="transparent")
+            linha.pack(fill="x", pady=(2, 0))
+            ctk.CTkLabel(linha, text=f"J{k + 1}", width=25, font=("Arial", 11)).pack(side="left", padx=(5, 5))
+            barra = ctk.CTkProgressBar(linha, height=8)
+            barra.pack(side="left", fill="x", expand=True, padx=(0, 10))
+            barra.set(0)
+            contador = ctk.CTkLabel(linha, text="0/0", font=("Arial", 11), text_color="gray")
+            contador.pack(side="right", padx=5)
+            self.barras_trabalhadores.append((barra, contador))
+
+    def _safe_progresso_trabalhador(self, k, atual, total):
+        def update():
+            if k >= len(self.barras_trabalhadores): return
+            barra, contador = self.barras_trabalhadores[k]
+            barra.set(atual / total if total else 0)
+            contador.configure(text=f"{atual}/{total}")
+        self.after(0, update)
+
+    def _drenar_log(self):
+        """Roda na thread da GUI: aplica o que as threads enfileiraram e reagenda."""
+        try:
+            limpar, texto, ver = self.log.drenar()
+            if limpar or texto:
+                self.log_textbox.inserir_lote(texto, limpar=limpar, max_linhas=MAX_LINHAS_TELA)
+            if ver: self.log_textbox.see("end")
+        except Exception: pass
+        finally:
+            self.after(INTERVALO_DRENAGEM_MS, self._drenar_log)
+
     def _safe_configure_buttons(self, iniciar_state, continuar_state):
         self.after(0, lambda: self._unsafe_btns(iniciar_state, continuar_state))
 
@@ -529,100 +864,160 @@ class App(ctk.CTk):
 
     def parar_automacao(self):
         """Função chamada pelo botão PARAR (Vermelho)."""
-        self.log_textbox.insert("end", f"[{time.strftime('%H:%M:%S')}] 🛑 Solicitando parada forçada...\n")
-        utils.CANCELAR_AUTOMACAO = True
-        utils.PARAR_AUTOMACAO = False # Destrava o loop de pausa para permitir o cancelamento
+        self.log.insert("end", f"[{time.strftime('%H:%M:%S')}] 🛑 Solicitando parada forçada...\n")
+        if self.sessao: self.sessao.cancelar() # Também destrava a pausa para permitir o cancelamento
         self.iniciar_btn.configure(state="disabled") # Evita clique duplo enquanto processa o cancelamento
 
     def iniciar_automacao(self):
+        # Motor, pandas e backends de entrada só carregam no primeiro INICIAR:
+        # o login e as abas de cadastro abrem sem eles (ver bench/bench_inicio.py)
+        from automation_logic import automacao_core
+        from entrada import criar_backend
+        import ingestao
         try:
-            # Verifica Planilha Aberta
-            nome_busca = utils.NOME_ARQUIVO_ALVO.split('.')[0] 
-            janelas = pyautogui.getWindowsWithTitle(nome_busca)
-            if not any(nome_busca.lower() in str(j.title).lower() for j in janelas):
-                 exibir_popup("Erro", f"A planilha '{utils.NOME_ARQUIVO_ALVO}' precisa estar aberta.", "cancel")
-                 return
+            nome_backend, opcoes_backend = MODOS_ENTRADA.get(self.modo_entrada_combobox.get(), MODOS_ENTRADA["Navegador"])
+            backend = criar_backend(nome_backend, **opcoes_backend)
+            carregar_fila = MODOS_FILA.get(self.modo_fila_combobox.get())
+            entrar_na_fila = carregar_fila is False
+            acompanhar = self.acompanhar_var.get()
+            if acompanhar and entrar_na_fila:
+                exibir_popup("Acompanhar Planilha", "Quem entra na fila não lê a planilha: marque esta opção na estação que carrega a fila.", "warning")
+                return
+
+            # Verifica Planilha Aberta (a simulação só lê o arquivo; quem entra na fila não lê;
+            # pasta/glob/abas: as exportações são lidas direto do disco)
+            if not backend.simulado and not entrar_na_fila and not ingestao.varias_planilhas(ingestao.ORIGEM):
+                import pyautogui
+                nome_arquivo = os.path.basename(ingestao.ORIGEM)
+                nome_busca = nome_arquivo.split('.')[0] 
+                janelas = pyautogui.getWindowsWithTitle(nome_busca)
+                if not any(nome_busca.lower() in str(j.title).lower() for j in janelas):
+                     exibir_popup("Erro", f"A planilha '{nome_arquivo}' precisa estar aberta.", "cancel")
+                     return
 
             # Coleta Cidades
-            cidades = []
-            for cb in [self.cidades_combobox_1, self.cidades_combobox_2, self.cidades_combobox_3,
-                       self.cidades_combobox_4, self.cidades_combobox_5]:
-                val = cb.get()
-                if val and val not in ["NENHUM FILTRO", "SELECIONE", ""]:
-                    cidades.append(val)
-            
-            if not cidades:
+            cidades = self.cidades_escolhidas()
+            if not cidades and not entrar_na_fila:
                 exibir_popup("Aviso", "Selecione pelo menos a Cidade Principal.", "warning")
                 return 
 
             cidade_final = ",".join(cidades)
             backlog = self.backlog_combobox.get()
             delay = utils.validar_e_obter_delay(self.delay_combobox.get())
+            tamanho_lote = utils.validar_e_obter_lote(self.lote_combobox.get())
+            faixa_delay = interpretar_faixa_delay(self.faixa_delay_entry.get()) if self.delay_auto_var.get() else None
+
+            # Modo paralelo: um backend por janela (cada fatia retoma o próprio diário)
+            qtd_janelas = int(self.janelas_combobox.get() or 1)
+            backends = None
+            if qtd_janelas > 1:
+                if acompanhar and carregar_fila is None:
+                    exibir_popup("Acompanhar Planilha", "Com várias janelas, acompanhe a planilha pela fila: escolha 'Carregar fila'.", "warning")
+                    return
+                from paralelo import criar_backends
+                try:
+                    backends = criar_backends(nome_backend, qtd_janelas, opcoes_backend)
+                except ValueError as e:
+                    exibir_popup("Modo Paralelo", str(e), "cancel")
+                    return
+
+            # Execução inacabada com os mesmos filtros? Oferece retomada.
+            pendente = None
+            if not backend.simulado and not backends and carregar_fila is None:
+                pendente = buscar_execucao_pendente(ingestao.ORIGEM, cidade_final, backlog)
+            if pendente:
+                resp = exibir_confirmacao(
+                    "Execução Inacabada",
+                    f"A execução #{pendente['id']} ({pendente['atualizada_em']}) parou em "
+                    f"{pendente['ultimo_indice'] + 1}/{pendente['total']}.\n"
+                    f"Retomar a partir do registro {pendente['ultimo_indice'] + 2}?",
+                    "question", option_ok="Retomar", option_cancel="Do Zero"
+                )
+                if resp is None: return
+                if resp != "Retomar":
+                    descartar_execucao(pendente['id'])
+                    pendente = None
             
-            # Configura Variáveis Globais
-            utils.DELAY_ATUAL = delay 
-            utils.INDICE_ATUAL_DO_CICLO = 0
-            utils.PARAR_AUTOMACAO = False
-            utils.CANCELAR_AUTOMACAO = False # Reseta flag de cancelamento
+            # Nova sessão (estado limpo para esta execução)
+            self.sessao = SessaoAutomacao(delay)
             
             # Reseta UI
-            self.log_textbox.delete("1.0", "end")
-            self._safe_update_gui(status="Rodando", total_ciclos=0, ciclo_atual=0)
+            self.log.delete("1.0", "end")
+            self._safe_update_gui(status="Rodando", total_ciclos=0, ciclo_atual=0, delay_atual="", metricas="")
             self._safe_configure_buttons("disabled", "disabled")
+            self._montar_barras_trabalhadores(len(backends) if backends else 0)
             
-            self.log_textbox.insert("end", f"[{time.strftime('%H:%M:%S')}] Iniciando para: {cidade_final}\n")
+            self.log.insert("end", f"[{time.strftime('%H:%M:%S')}] Iniciando para: {cidade_final or 'fila compartilhada'}\n")
             
             # Inicia Monitoramento ESC
             if not self.monitor_thread_started:
-                t = threading.Thread(target=utils.monitorar_tecla_escape, args=(self.log_textbox,), daemon=True)
+                t = threading.Thread(target=utils.monitorar_tecla_escape, args=(self.log, lambda: self.sessao), daemon=True)
                 t.start()
                 self.monitor_thread_started = True
             
             # Inicia Thread Principal
-            t_core = threading.Thread(
-                target=automacao_core, 
-                args=(self.log_textbox, cidade_final, backlog, delay, self._safe_configure_buttons, self._safe_update_gui)
-            )
+            if carregar_fila is not None:
+                from fila_trabalho import automacao_estacao
+                t_core = threading.Thread(
+                    target=automacao_estacao,
+                    args=(self.log, cidade_final, backlog, delay, self._safe_configure_buttons, self._safe_update_gui, backends or [backend]),
+                    kwargs={"carregar": carregar_fila, "tamanho_lote": tamanho_lote, "faixa_delay_auto": faixa_delay,
+                            "sessao": self.sessao, "progresso_cb": self._safe_progresso_trabalhador, "acompanhar_planilha": acompanhar}
+                )
+            elif backends:
+                from paralelo import automacao_paralela
+                t_core = threading.Thread(
+                    target=automacao_paralela,
+                    args=(self.log, cidade_final, backlog, delay, self._safe_configure_buttons, self._safe_update_gui, backends),
+                    kwargs={"tamanho_lote": tamanho_lote, "faixa_delay_auto": faixa_delay, "sessao": self.sessao,
+                            "progresso_cb": self._safe_progresso_trabalhador}
+                )
+            else:
+                t_core = threading.Thread(
+                    target=automacao_core, 
+                    args=(self.log, cidade_final, backlog, delay, self._safe_configure_buttons, self._safe_update_gui),
+                    kwargs={"execucao_pendente": pendente, "tamanho_lote": tamanho_lote,
+                            "faixa_delay_auto": faixa_delay, "sessao": self.sessao, "backend": backend,
+                            "acompanhar_planilha": acompanhar}
+                )
             t_core.start()
             
         except Exception as e:
-            self.log_textbox.insert("end", f"❌ Erro ao iniciar: {e}\n")
+            self.log.insert("end", f"❌ Erro ao iniciar: {e}\n")
             self._safe_update_gui(status="Erro")
             self._safe_configure_buttons("normal", "disabled")
 
     def continuar_automacao(self):
-        if not utils.PARAR_AUTOMACAO: return
+        if not self.sessao or not self.sessao.pausado: return
         try:
-            novo_delay = utils.validar_e_obter_delay(self.delay_combobox.get())
-            utils.DELAY_ATUAL = novo_delay 
-            utils.PARAR_AUTOMACAO = False
+            # No modo automático o delay é do controlador; o combobox só vale no início
+            novo_delay = None
+            if not self.delay_auto_var.get():
+                novo_delay = utils.validar_e_obter_delay(self.delay_combobox.get())
+            self.sessao.retomar(novo_delay)
             
             self._safe_update_gui(status="Rodando")
             self._safe_configure_buttons("disabled", "disabled")
-            self.log_textbox.insert("end", f"[{time.strftime('%H:%M:%S')}] ▶ Retomando...\n")
+            self.log.insert("end", f"[{time.strftime('%H:%M:%S')}] ▶ Retomando...\n")
         except Exception as e:
-            self.log_textbox.insert("end", f"❌ Erro ao continuar: {e}\n")
+            self.log.insert("end", f"❌ Erro ao continuar: {e}\n")
 
     # --- CRUD e Outros ---
 
     def carregar_cidades_db(self):
-        self.todas_cidades = buscar_nomes_cidades()
-        opcoes = ["NENHUM FILTRO"] + self.todas_cidades
-        
-        # Atualiza todos os comboboxes
-        for cb in [self.cidades_combobox_1, self.cidades_combobox_2, self.cidades_combobox_3, 
-                   self.cidades_combobox_4, self.cidades_combobox_5]:
-            cb.configure(values=opcoes)
-            if cb.get() not in opcoes: cb.set("NENHUM FILTRO")
+        cidades = obter_cidades() # Uma leitura só (em memória depois da primeira carga)
+        self.indice_cidades = IndiceCidades(cidades)
+
+        # Campos com cidades que deixaram de existir são limpos
+        for s in self.seletores_cidade:
+            if s.get() and self.indice_cidades.resolver(s.get()) != s.get(): s.set("")
             
         # Atualiza listagem
-        lista = listar_cidades()
         self.lista_cidades_txt.delete("0.0", "end")
-        if not lista:
+        if not cidades:
             self.lista_cidades_txt.insert("end", "Nenhuma cidade cadastrada.\n")
         else:
-            for id_c, nome in lista:
-                self.lista_cidades_txt.insert("end", f"[{id_c}] {nome}\n")
+            self.lista_cidades_txt.insert("end", "".join(f"[{id_c}] {nome}\n" for id_c, nome, _ in cidades))
 
     def carregar_lista_usuarios(self):
         users = listar_usuarios()
@@ -634,22 +1029,6 @@ class App(ctk.CTk):
                 icon = "👑 " if u == "admin" else "👤 "
                 self.lista_usuarios_txt.insert("end", f"{icon}{u}\n")
 
-    def atualizar_listas_exclusivas(self, choice=None):
-        """Impede selecionar a mesma cidade em múltiplos campos."""
-        combos = [self.cidades_combobox_1, self.cidades_combobox_2, self.cidades_combobox_3,
-                  self.cidades_combobox_4, self.cidades_combobox_5]
-        selecoes = [cb.get() for cb in combos]
-        ignorar = ["NENHUM FILTRO", "SELECIONE", "", None]
-        
-        for i, cb in enumerate(combos):
-            atual = cb.get()
-            outras_sel = [s for j, s in enumerate(selecoes) if j != i and s not in ignorar]
-            opcoes_disp = ["NENHUM FILTRO"] + [c for c in self.todas_cidades if c not in outras_sel]
-            cb.configure(values=opcoes_disp)
-            # Restaura a seleção se ela ainda for válida, senão reseta
-            if atual in opcoes_disp: cb.set(atual)
-            else: cb.set("NENHUM FILTRO")
-
     def add_cidade_ui(self):
         msg, ok = adicionar_cidade(self.nova_cidade_entry.get())
         if ok: 
@@ -657,6 +1036,14 @@ class App(ctk.CTk):
             self.carregar_cidades_db()
         exibir_popup("Cadastro", msg, "check" if ok else "cancel")
 
+    def abrir_importacao_cidades(self):
+        DialogoImportacaoCidades(self, self.importar_cidades_ui)
+
+    def importar_cidades_ui(self, nomes):
+        msg, ok = adicionar_cidades_em_lote(nomes)
+        if ok: self.carregar_cidades_db()
+        exibir_popup("Importação", msg, "check" if ok else "cancel")
+
     def del_cidade_ui(self):
         id_str = self.del_id_entry.get().strip()
         if not id_str: return
@@ -693,5 +1080,6 @@ class App(ctk.CTk):
             exibir_popup("Resultado", msg, "check" if ok else "cancel")
 
     def abrir_excel(self):
-        ok, msg = utils.abrir_planilha_alvo()
-        self.log_textbox.insert("end", f"[{time.strftime('%H:%M:%S')}] {msg}\n")
\ No newline at end of file
+        import ingestao
+        ok, msg = utils.abrir_planilha_alvo(ingestao.caminho_para_abrir(ingestao.ORIGEM))
+        self.log.insert("end", f"[{time.strftime('%H:%M:%S')}] {msg}\n")
\ No newline at end of file
@@ -0,0 +1,71 @@
+from bisect import bisect_left
+from db_manager import normalizar_nome
+
+# ####################################################################
+# --- ÍNDICE DE PREFIXOS DAS CIDADES (BUSCA AO DIGITAR) ---
+# ####################################################################
+#
+# Duas listas ordenadas de chaves normalizadas (maiúsculas, sem acentos):
+#   - nome inteiro:          "SAO JOSE DOS CAMPOS"
+#   - a partir de cada palavra: "JOSE DOS CAMPOS", "DOS CAMPOS", "CAMPOS"
+# Uma busca é um bisect na primeira lista (quem começa com o texto vem antes)
+# e, se faltar resultado, na segunda. O custo depende do limite de
+# sugestões, não do número de cidades cadastradas.
+
+LIMITE_SUGESTOES = 50
+
+def _chave(texto):
+    """Normaliza e colapsa espaços internos ('são  paulo' -> 'SAO PAULO')."""
+    return " ".join(normalizar_nome(texto).split())
+
+class IndiceCidades:
+    def __init__(self, cidades=()):
+        """'cidades': tuplas (id, nome, normalizado) de db_manager.obter_cidades()."""
+        inicio, palavras = [], []
+        self.nomes = []
+        self._por_chave = {}
+        for _, nome, normalizado in cidades:
+            chave = " ".join((normalizado or _chave(nome)).split())
+            self.nomes.append(nome)
+            self._por_chave.setdefault(chave, nome)
+            inicio.append((chave, nome))
+            partes = chave.split(" ")
+            palavras.extend((" ".join(partes[i:]), nome) for i in range(1, len(partes)))
+        inicio.sort()
+        palavras.sort()
+        self._inicio = ([c for c, _ in inicio], [n for _, n in inicio])
+        self._palavras = ([c for c, _ in palavras], [n for _, n in palavras])
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def resolver(self, texto):
+        """Nome cadastrado que corresponde exatamente ao texto (ignorando acentos/caixa) ou None."""
+        return self._por_chave.get(_chave(texto))
+
+    @staticmethod
+    def _varrer(lista, prefixo, excluir, vistos, saida, limite):
+        chaves, nomes = lista
+        i = bisect_left(chaves, prefixo)
+        while i < len(chaves) and len(saida) < limite and chaves[i].startswith(prefixo):
+            nome = nomes[i]
+            if nome not in excluir and nome not in vistos:
+                vistos.add(nome)
+                saida.append(nome)
+            i += 1
+
+    def buscar(self, texto="", excluir=frozenset(), limite=LIMITE_SUGESTOES):
+        """
+        Até 'limite' nomes que começam com o texto (ou têm uma palavra que começa
+        com ele), fora os de 'excluir' (conjunto dos já escolhidos em outros campos).
+        """
+        prefixo = _chave(texto)
+        saida, vistos = [], set()
+        if not prefixo:
+            for nome in self.nomes:
+                if len(saida) >= limite: break
+                if nome not in excluir: saida.append(nome)
+            return saida
+        self._varrer(self._inicio, prefixo, excluir, vistos, saida, limite)
+        self._varrer(self._palavras, prefixo, excluir, vistos, saida, limite)
+        return saida
@@ -0,0 +1,201 @@
+import os
+import glob
+import json
+import time
+from collections import Counter
+import utils
+import db_manager
+
+# ####################################################################
+# --- INGESTÃO DE VÁRIAS PLANILHAS (PASTA OU GLOB, VÁRIAS ABAS) ---
+# ####################################################################
+#
+# A origem é um texto 'caminho|abas':
+#   - caminho: um arquivo, uma pasta (todas as planilhas dela) ou um glob
+#     ('exportacoes/rota_*.xlsx');
+#   - abas (opcional): '*' para todas, ou nomes/posições separados por vírgula
+#     ('Rota 1,Rota 2', '2'). Sem abas, só a primeira (como sempre foi).
+# O '|' não existe em nomes de arquivo do Windows, então a separação é segura.
+#
+# Cada aba de cada arquivo é lida num processo (ProcessPoolExecutor, um por
+# núcleo) com os mesmos filtros; o resultado volta já filtrado e é juntado na
+# ordem dos arquivos e abas, então a lista e o fingerprint não dependem de
+# quem terminou primeiro. Com 1 núcleo ou menos de MIN_TAREFAS_PROCESSOS abas,
+# a leitura é sequencial: a partida de cada processo (spawn, importando o
+# pandas) custa mais do que o parse que ele dividiria. Todas as abas precisam
+# ter a mesma coluna-chave; a que diferir fica de fora, com erro no log. A
+# repetição entre arquivos sai na preparação (preparacao.preparar_lista), que
+# aponta 'arquivo[aba]:linha' de cada rejeitado.
+
+CHAVE_CONFIG_PLANILHAS = 'planilhas'    # Caminho, pasta ou glob em config_cliente.json
+CHAVE_CONFIG_ABAS = 'abas'              # Seleção de abas em config_cliente.json
+SEPARADOR_ABAS = '|'
+TODAS_AS_ABAS = '*'
+EXTENSOES = ('.xlsx', '.xlsm', '.xls')
+COLUNA_ORIGEM = '_origem'               # 'arquivo[aba]' de cada linha quando há várias planilhas
+MIN_TAREFAS_PROCESSOS = 3               # Abas a ler a partir das quais o pool de processos compensa
+
+def obter_origem():
+    """Origem configurada ('planilhas' e 'abas' em config_cliente.json) ou o atribuicao.xlsx."""
+    if os.path.exists(db_manager.CONFIG_FILE):
+        try:
+            with open(db_manager.CONFIG_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            caminho = str(data.get(CHAVE_CONFIG_PLANILHAS, '')).strip()
+            abas = str(data.get(CHAVE_CONFIG_ABAS, '')).strip()
+            if caminho or abas:
+                caminho = caminho or utils.NOME_ARQUIVO_ALVO
+                return f"{caminho}{SEPARADOR_ABAS}{abas}" if abas else caminho
+        except Exception:
+            pass
+    return utils.NOME_ARQUIVO_ALVO
+
+ORIGEM = obter_origem()
+
+def separar(origem):
+    """'caminho|abas' -> (caminho, abas): abas é None (primeira), '*' ou uma lista de nomes/posições."""
+    caminho, _, abas = str(origem).partition(SEPARADOR_ABAS)
+    abas = abas.strip()
+    if not abas: return caminho.strip(), None
+    if abas == TODAS_AS_ABAS: return caminho.strip(), TODAS_AS_ABAS
+    return caminho.strip(), [a.strip() for a in abas.split(',') if a.strip()]
+
+def listar_arquivos(caminho):
+    """Planilhas da origem, em ordem de nome (os '~$...' de arquivos abertos no Excel ficam de fora)."""
+    path = utils.get_external_path(caminho)
+    if os.path.isdir(path):
+        candidatos = [os.path.join(path, nome) for nome in os.listdir(path)]
+    elif glob.has_magic(path):
+        candidatos = glob.glob(path)
+    else:
+        return [path]
+    return sorted(p for p in candidatos
+                  if os.path.isfile(p) and p.lower().endswith(EXTENSOES) and not os.path.basename(p).startswith('~$'))
+
+def varias_planilhas(origem):
+    """True se a origem for uma pasta, um glob ou tiver seleção de abas."""
+    caminho, abas = separar(origem)
+    path = utils.get_external_path(caminho)
+    return abas is not None or os.path.isdir(path) or glob.has_magic(path)
+
+def assinatura(origem):
+    """(arquivo, tamanho, mtime) de cada planilha: arquivo novo, removido ou regravado muda a assinatura."""
+    caminho, _ = separar(origem)
+    itens = []
+    for path in listar_arquivos(caminho):
+        try:
+            st = os.stat(path)
+            itens.append((path, st.st_size, st.st_mtime))
+        except OSError:
+            return None # No meio de uma regravação
+    return tuple(itens) or None
+
+def caminho_para_abrir(origem):
+    """O que o botão ABRIR EXCEL abre: o arquivo, ou a pasta de uma pasta/glob."""
+    caminho, _ = separar(origem)
+    path = utils.get_external_path(caminho)
+    return os.path.dirname(path) if glob.has_magic(path) else path
+
+# --- LEITURA (UMA ABA POR PROCESSO) ---
+
+def _abas_do_arquivo(path, abas):
+    """Nomes das abas escolhidas que existem neste arquivo ([None] = primeira aba)."""
+    if abas is None: return [None]
+    import pandas as pd
+    with pd.ExcelFile(path) as xls:
+        nomes = list(xls.sheet_names)
+    if abas == TODAS_AS_ABAS: return nomes
+    escolhidas = []
+    for aba in abas:
+        if aba in nomes: escolhidas.append(aba)
+        elif aba.isdigit() and 1 <= int(aba) <= len(nomes): escolhidas.append(nomes[int(aba) - 1])
+    return list(dict.fromkeys(escolhidas))
+
+def ler_aba(path, aba, spec, motor=None):
+    """
+    Lê e filtra uma aba (None = a primeira) de um arquivo; roda num processo do pool.
+    Retorna (rotulo, df, segundos, erro).
+    """
+    inicio = time.perf_counter()
+    rotulo = os.path.basename(path) + (f"[{aba}]" if aba is not None else "")
+    try:
+        df = utils.ler_aba_filtrada(path, spec, aba=aba, motor=motor)
+        if not df.empty:
+            df = df.copy()
+            df[COLUNA_ORIGEM] = rotulo
+        return rotulo, df, time.perf_counter() - inicio, None
+    except Exception as e:
+        return rotulo, None, time.perf_counter() - inicio, str(e)
+
+def _log(msg):
+    return f"[{time.strftime('%H:%M:%S')}] {msg}"
+
+def _numero_processos(tarefas, processos=None):
+    """Processos da leitura: os pedidos ou, sem pedido, um por núcleo (sequencial com 1 núcleo ou poucas abas)."""
+    if not processos:
+        nucleos = os.cpu_count() or 1
+        processos = 1 if nucleos == 1 or tarefas < MIN_TAREFAS_PROCESSOS else nucleos
+    return max(1, min(tarefas, processos))
+
+def ler_origem(origem, spec, log_textbox, motor=None, processos=None):
+    """
+    Lê todas as planilhas da origem com a especificação 'spec' e junta o
+    resultado filtrado. Tempo e erro de cada arquivo/aba vão para o log.
+    Retorna (DataFrame, mensagem); o que deu erro fica de fora.
+    """
+    import pandas as pd
+    caminho, abas = separar(origem)
+    arquivos = listar_arquivos(caminho)
+    if not arquivos:
+        return pd.DataFrame(), f"Planilha não encontrada: nenhuma planilha em {utils.get_external_path(caminho)}"
+
+    # Uma tarefa por aba: um arquivo com uma aba por rota também se divide entre os núcleos
+    inicio = time.perf_counter()
+    tarefas, erros = [], []
+    for path in arquivos:
+        try:
+            escolhidas = _abas_do_arquivo(path, abas)
+            if not escolhidas: raise ValueError(f"nenhuma das abas {', '.join(abas)}")
+            tarefas += [(path, aba) for aba in escolhidas]
+        except Exception as e:
+            erros.append(os.path.basename(path))
+            if log_textbox: log_textbox.insert("end", _log(f"❌ {os.path.basename(path)}: {e}\n"))
+
+    processos = _numero_processos(len(tarefas), processos)
+    argumentos = ([p for p, _ in tarefas], [a for _, a in tarefas], [spec] * len(tarefas), [motor] * len(tarefas))
+    if processos == 1:
+        resultados = list(map(ler_aba, *argumentos))
+    else:
+        # spawn: processos limpos (igual ao Windows), sem herdar as threads da GUI
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn")) as pool:
+            resultados = list(pool.map(ler_aba, *argumentos)) # Na ordem das tarefas, não na de conclusão
+
+    partes = []
+    for rotulo, df, segundos, erro in resultados:
+        if erro:
+            erros.append(rotulo)
+            if log_textbox: log_textbox.insert("end", _log(f"❌ {rotulo}: {erro} ({segundos:.2f}s)\n"))
+            continue
+        if log_textbox: log_textbox.insert("end", _log(f"📄 {rotulo}: {len(df)} registro(s) filtrado(s) ({segundos:.2f}s)\n"))
+        if not df.empty: partes.append((rotulo, df))
+
+    # Mesma coluna-chave em todas: com nomes diferentes o concat deixaria a chave vazia (NaN) nas linhas de uma delas
+    chaves = {rotulo: utils.coluna_chave([c for c in df.columns if c != COLUNA_ORIGEM]) for rotulo, df in partes}
+    if len(set(chaves.values())) > 1:
+        referencia = Counter(chaves.values()).most_common(1)[0][0] # Empate: a da primeira planilha
+        for rotulo, chave in chaves.items():
+            if chave == referencia: continue
+            erros.append(rotulo)
+            if log_textbox: log_textbox.insert("end", _log(f"❌ {rotulo}: coluna-chave '{chave}' diferente de '{referencia}' "
+                                                           f"das demais planilhas (fora da leitura)\n"))
+        partes = [(rotulo, df) for rotulo, df in partes if chaves[rotulo] == referencia]
+
+    duracao = time.perf_counter() - inicio
+    resumo = (f"{len(arquivos)} planilha(s), {len(tarefas)} aba(s) em {duracao:.1f}s com {processos} processo(s)"
+              f"{f', {len(erros)} com erro' if erros else ''}")
+    if log_textbox: log_textbox.insert("end", _log(f"📚 {resumo}.\n"))
+    if not partes and erros:
+        return pd.DataFrame(), f"Erro leitura: {resumo}"
+    return (pd.concat([df for _, df in partes]) if partes else pd.DataFrame()), resumo
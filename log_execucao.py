@@ -0,0 +1,71 @@
+import os
+import queue
+import logging
+import logging.handlers
+
+# ####################################################################
+# --- PIPELINE DE LOG (FILA -> GUI EM LOTES + ARQUIVO ROTATIVO) ---
+# ####################################################################
+
+MAX_LINHAS_TELA = 2000          # Linhas mantidas no widget de log
+INTERVALO_DRENAGEM_MS = 100     # Período da drenagem feita pela thread da GUI
+MAX_ITENS_POR_DRENAGEM = 1000
+ARQUIVO_LOG_MAX_BYTES = 5 * 1024 * 1024
+ARQUIVO_LOG_BACKUPS = 5
+
+class FilaLog:
+    """
+    Substituto do textbox para as threads de trabalho: mesma API (insert/see/delete),
+    mas só enfileira. Nenhuma chamada toca o Tk; quem desenha é a GUI, em lotes.
+    """
+    def __init__(self, caminho_arquivo=None):
+        self.fila = queue.SimpleQueue()
+        self.logger = None
+        if caminho_arquivo:
+            try:
+                os.makedirs(os.path.dirname(caminho_arquivo), exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    caminho_arquivo, maxBytes=ARQUIVO_LOG_MAX_BYTES, backupCount=ARQUIVO_LOG_BACKUPS, encoding='utf-8'
+                )
+                handler.terminator = "" # O texto já traz as quebras de linha
+                self.logger = logging.getLogger(f"atribuidor.execucao.{id(self)}")
+                self.logger.propagate = False
+                self.logger.setLevel(logging.INFO)
+                self.logger.addHandler(handler)
+            except Exception:
+                self.logger = None
+
+    # --- API compatível com o textbox ---
+    def insert(self, index, text, tags=None):
+        self.fila.put(("texto", text))
+
+    def see(self, index):
+        self.fila.put(("ver", None))
+
+    def delete(self, index1, index2=None):
+        self.fila.put(("limpar", None))
+
+    # --- Consumo (thread da GUI) ---
+    def drenar(self, max_itens=MAX_ITENS_POR_DRENAGEM):
+        """
+        Retira até 'max_itens' eventos e os resume em (limpar, texto, ver).
+        'limpar' indica que o widget deve ser esvaziado antes de inserir 'texto'.
+        O texto drenado também é gravado no arquivo de log (um write por lote).
+        """
+        limpar, ver, partes, arquivo = False, False, [], []
+        for _ in range(max_itens):
+            try:
+                tipo, valor = self.fila.get_nowait()
+            except queue.Empty:
+                break
+            if tipo == "texto":
+                partes.append(valor)
+                arquivo.append(valor)
+            elif tipo == "ver": ver = True
+            elif tipo == "limpar":
+                limpar, partes = True, [] # Só a tela é limpa; o arquivo mantém tudo
+
+        if arquivo and self.logger:
+            try: self.logger.info("".join(arquivo))
+            except Exception: pass
+        return limpar, "".join(partes), ver
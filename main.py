@@ -1,18 +1,47 @@
+import os
+import time
+import multiprocessing
+_INICIO = time.perf_counter() # Antes dos imports pesados (medição do tempo até o login)
+
 import customtkinter as ctk
 from gui import App
 
 # Configuração Global de Tema
 # Modos: "System" (Padrão do OS), "Dark" (Escuro), "Light" (Claro)
-ctk.set_appearance_mode("Dark") 
+ctk.set_appearance_mode("Dark")
 # Temas de Cor: "blue" (Padrão), "green", "dark-blue"
 ctk.set_default_color_theme("green")
 
+# Com ATRIBUIDOR_MEDIR_INICIO=<arquivo> o app grava o marcador nesse arquivo
+# assim que a janela de login é desenhada e fecha (bench/bench_inicio.py e build.py)
+MARCADOR_LOGIN = "JANELA_LOGIN_PRONTA"
+
+def _reportar_inicio(app, arquivo):
+    app.update_idletasks()
+    with open(arquivo, "w", encoding="utf-8") as f:
+        f.write(f"{MARCADOR_LOGIN} {time.perf_counter() - _INICIO:.4f}")
+    app.destroy()
+
+def _fechar_splash():
+    """Fecha a imagem de abertura do executável (build com --splash), se houver."""
+    try:
+        import pyi_splash
+        pyi_splash.close()
+    except Exception: pass
+
 if __name__ == "__main__":
+    # No executável, os processos da leitura em paralelo (ingestao.py) entram por aqui
+    multiprocessing.freeze_support()
+
     # Inicializa a Aplicação Unificada
     app = App()
-    
+    app.after_idle(_fechar_splash)
+    arquivo_marcador = os.environ.get("ATRIBUIDOR_MEDIR_INICIO")
+    if arquivo_marcador:
+        app.after_idle(lambda: _reportar_inicio(app, arquivo_marcador))
+
     # Previne fechamento acidental de threads ao fechar a janela principal
     try:
         app.mainloop()
     except KeyboardInterrupt:
-        print("Aplicação encerrada via terminal.")
\ No newline at end of file
+        print("Aplicação encerrada via terminal.")
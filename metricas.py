@@ -0,0 +1,129 @@
+import os
+import csv
+import json
+import time
+from array import array
+from contextlib import contextmanager
+
+# ####################################################################
+# --- MÉTRICAS POR CICLO (BUFFER CIRCULAR + VAZÃO/ETA + EXPORTAÇÃO) ---
+# ####################################################################
+
+FASES = ("clipboard", "colar", "delay", "enter", "radar", "pausa", "foco")
+COLUNAS = ("inicio", "itens", "total") + FASES
+
+CAPACIDADE_PADRAO = 20000   # Ciclos guardados (os mais antigos são sobrescritos)
+JANELA_AO_VIVO = 500        # Ciclos usados para vazão/percentis na tela
+
+class Cronometro:
+    """Acumula o tempo de cada fase de UM ciclo (envio de um registro ou lote)."""
+    def __init__(self):
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        self.fases = dict.fromkeys(FASES, 0.0)
+
+    @contextmanager
+    def fase(self, nome):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nome] += time.perf_counter() - t
+
+    def total(self):
+        return time.perf_counter() - self._t0
+
+class BufferCircular:
+    """Linhas de floats de largura fixa em um único array('d') pré-alocado."""
+    def __init__(self, capacidade, largura):
+        self.capacidade = capacidade
+        self.largura = largura
+        self.dados = array('d', bytes(8 * capacidade * largura))
+        self.tamanho = 0
+        self.proximo = 0
+
+    def adicionar(self, valores):
+        base = self.proximo * self.largura
+        self.dados[base:base + self.largura] = array('d', valores)
+        self.proximo = (self.proximo + 1) % self.capacidade
+        self.tamanho = min(self.tamanho + 1, self.capacidade)
+
+    def linhas(self, ultimas=None):
+        """Linhas da mais antiga para a mais nova (ou só as 'ultimas' N)."""
+        n = self.tamanho if ultimas is None else min(ultimas, self.tamanho)
+        inicio = (self.proximo - n) % self.capacidade
+        for k in range(n):
+            base = ((inicio + k) % self.capacidade) * self.largura
+            yield tuple(self.dados[base:base + self.largura])
+
+def _percentil(ordenados, p):
+    if not ordenados: return 0.0
+    idx = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+def _formatar_duracao(segundos):
+    segundos = int(segundos)
+    h, resto = divmod(segundos, 3600)
+    m, s = divmod(resto, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+class MetricasExecucao:
+    """Tempos por fase de cada ciclo de uma execução."""
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        self.buffer = BufferCircular(capacidade, len(COLUNAS))
+        self.total_ciclos = 0
+        self.total_itens = 0
+
+    def novo_ciclo(self):
+        return Cronometro()
+
+    def registrar(self, cronometro, itens=1):
+        """'itens'=0: ciclo sem entrega (lote rejeitado); o tempo entra na vazão, os itens não."""
+        self.buffer.adicionar([cronometro.inicio, itens, cronometro.total()] + [cronometro.fases[f] for f in FASES])
+        self.total_ciclos += 1
+        self.total_itens += itens
+
+    def resumo(self, restantes=0, janela=JANELA_AO_VIVO):
+        """Vazão (itens/min), p50/p95 do ciclo (s) e ETA (s) nos últimos ciclos."""
+        linhas = list(self.buffer.linhas(janela))
+        if not linhas: return None
+        itens = sum(l[1] for l in linhas)
+        duracao = sum(l[2] for l in linhas)
+        por_minuto = itens / duracao * 60 if duracao > 0 else 0.0
+        tempos = sorted(l[2] for l in linhas)
+        return {
+            "itens_por_minuto": por_minuto,
+            "p50": _percentil(tempos, 50),
+            "p95": _percentil(tempos, 95),
+            "eta": restantes / por_minuto * 60 if por_minuto > 0 else None,
+        }
+
+    def texto_resumo(self, restantes=0):
+        r = self.resumo(restantes)
+        if not r: return ""
+        eta = _formatar_duracao(r["eta"]) if r["eta"] is not None else "--"
+        return f"{r['itens_por_minuto']:.0f} itens/min | p50 {r['p50']:.2f}s p95 {r['p95']:.2f}s | ETA {eta}"
+
+    def exportar(self, caminho_base, extra=None):
+        """Grava '<caminho_base>.csv' (um ciclo por linha) e '<caminho_base>.json' (resumo + ciclos)."""
+        os.makedirs(os.path.dirname(caminho_base) or ".", exist_ok=True)
+        linhas = list(self.buffer.linhas())
+
+        with open(caminho_base + ".csv", "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, delimiter=";")
+            w.writerow(COLUNAS)
+            for l in linhas: w.writerow([f"{v:.6f}" if i != 1 else int(v) for i, v in enumerate(l)])
+
+        medias = {fase: (sum(l[3 + i] for l in linhas) / len(linhas) if linhas else 0.0) for i, fase in enumerate(FASES)}
+        dados = {
+            "ciclos": self.total_ciclos,
+            "itens": self.total_itens,
+            "ciclos_exportados": len(linhas),
+            "resumo": self.resumo(janela=None if not linhas else len(linhas)),
+            "media_por_fase": medias,
+            "extra": extra or {},
+            "linhas": [dict(zip(COLUNAS, l)) for l in linhas],
+        }
+        with open(caminho_base + ".json", "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=1)
+        return caminho_base + ".csv", caminho_base + ".json"
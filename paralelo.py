@@ -0,0 +1,195 @@
+import time
+import threading
+import utils
+import db_manager
+import entrada
+import automation_logic
+import fila_trabalho
+import preparacao
+import ingestao
+from sessao import SessaoAutomacao
+
+# ####################################################################
+# --- MODO PARALELO (VÁRIAS JANELAS / DISPLAYS AO MESMO TEMPO) ---
+# ####################################################################
+#
+# A planilha é lida, filtrada e preparada (preparacao.ListaTrabalho) uma vez
+# e a lista de chaves é dividida em N fatias contíguas.
+# Cada trabalhador roda o automacao_core na sua fatia, com o seu backend
+# (janela ou display), o seu radar e a sua barra de progresso. Pausa e
+# cancelamento são da sessão principal (sub-sessões ligadas a ela).
+#
+# Na área de trabalho real o teclado é um só: foco+colar+ENTER passam pela
+# entrada.TravaTeclado, e a espera pelo site (a maior parte do ciclo) corre
+# em paralelo. No Xvfb cada trabalhador tem o próprio display e nada é
+# compartilhado. Cada fatia tem o seu diário ('<arquivo>#k/N'): repetir a
+# execução com os mesmos filtros e o mesmo N retoma cada fatia de onde parou.
+# Com 'trabalho_fila' não há fatias: cada trabalhador é uma estação da fila
+# compartilhada (fila_trabalho) e reserva os próprios pedaços.
+
+MAX_TRABALHADORES = 8
+
+def _log(msg):
+    return f"[{time.strftime('%H:%M:%S')}] {msg}"
+
+class LogTrabalhador:
+    """Mesma API do textbox/FilaLog, com o prefixo do trabalhador ('[J2] ') em cada mensagem."""
+    def __init__(self, log_textbox, prefixo):
+        self.log_textbox = log_textbox
+        self.prefixo = prefixo
+
+    def insert(self, index, text, tags=None):
+        self.log_textbox.insert(index, self.prefixo + text)
+
+    def see(self, index):
+        self.log_textbox.see(index)
+
+    def delete(self, index1, index2=None):
+        pass # Só a GUI limpa o log
+
+def fatias(total, n):
+    """Divide [0, total) em até n intervalos contíguos (início, fim) de tamanhos quase iguais."""
+    n = max(1, min(n, total))
+    return [(total * k // n, total * (k + 1) // n) for k in range(n)]
+
+def criar_backends(modo, quantidade, opcoes=None, displays=None, organizar=True):
+    """
+    Um backend por trabalhador:
+      - 'pyautogui'/'injecao': as primeiras 'quantidade' janelas de navegador,
+        lado a lado (organizar=True), com uma trava de teclado compartilhada;
+      - 'xdotool': um display por trabalhador ('displays', ex. de DisplaysVirtuais);
+      - 'simulado': alvos independentes (sementes diferentes).
+    """
+    opcoes = dict(opcoes or {})
+    if modo == "simulado":
+        semente = opcoes.pop("semente", None) or 0
+        return [entrada.BackendSimulado(semente=semente + k, **opcoes) for k in range(quantidade)]
+    if modo == "xdotool":
+        displays = list(displays or [])
+        if len(displays) < quantidade:
+            raise ValueError(f"{quantidade} trabalhadores pedidos, {len(displays)} display(s) informado(s).")
+        return [entrada.BackendXdotool(d, **opcoes) for d in displays[:quantidade]]
+
+    janelas = entrada.janelas_navegador()
+    if len(janelas) < quantidade:
+        raise ValueError(f"{quantidade} janelas pedidas, {len(janelas)} janela(s) de navegador aberta(s).")
+    janelas = janelas[:quantidade]
+    if organizar: entrada.organizar_janelas(janelas)
+    trava = entrada.TravaTeclado()
+    return [entrada.criar_backend(modo, janela_alvo=j, trava=trava, **opcoes) for j in janelas]
+
+def _texto_vazao(feitos, total, inicio, trabalhadores):
+    decorrido = time.perf_counter() - inicio
+    if not feitos or decorrido <= 0: return ""
+    por_segundo = feitos / decorrido
+    restante = (total - feitos) / por_segundo
+    return f"{por_segundo * 60:.0f} itens/min | {trabalhadores} janelas | ETA {int(restante // 60)}m{int(restante % 60):02d}s"
+
+def automacao_paralela(log_textbox, cidade_filtro, backlog_filtro, delay_inicial, safe_configure_buttons_cb, safe_update_gui_cb, backends, tamanho_lote=1, faixa_delay_auto=None, sessao=None, arquivo=None, progresso_cb=None, retomar_pendentes=True, trabalho_fila=None):
+    """
+    Lê e filtra uma vez, divide entre os backends e espera todos terminarem.
+    'progresso_cb(k, atual, total)' atualiza a barra do trabalhador k.
+    'trabalho_fila': ID de um trabalho da fila compartilhada (dispensa a leitura).
+    """
+    sessao = sessao or SessaoAutomacao(delay_inicial)
+    arquivo = arquivo or ingestao.ORIGEM
+    status_final = "Erro"
+    try:
+        filas = None
+        if trabalho_fila:
+            dados, total = None, fila_trabalho.buscar_trabalho_aberto(trabalho_fila)["total"]
+            filas = [fila_trabalho.EstacaoFila(trabalho_fila) for _ in backends]
+        else:
+            dados, _, msg = utils.ler_e_filtrar_dados(arquivo, cidade_filtro, backlog_filtro, log_textbox)
+            log_textbox.insert("end", _log(f"{msg}\n"))
+            dados = preparacao.preparar_lista(dados)
+            preparacao.registrar_rejeitados(dados, log_textbox)
+            total = len(dados)
+        if total == 0 and not filas: # Fila vazia: cada estação espera (planilha acompanhada) ou conclui
+            status_final = "Finalizado"
+            return
+
+        partes = [(0, total)] * len(backends) if filas else fatias(total, len(backends))
+        n = len(partes)
+        feitos = [a for a, _ in partes]   # Posição absoluta alcançada por trabalhador
+        trava = threading.Lock()
+        painel = {"ultimo": 0.0, "total": total} # Na fila o total cresce com a planilha acompanhada
+        inicio = time.perf_counter()
+        sessao.total = total
+        safe_update_gui_cb(status="Rodando", total_ciclos=total, ciclo_atual=0)
+        if filas:
+            log_textbox.insert("end", _log(f"🧵 Modo paralelo: {n} trabalhadores ({backends[0].nome}) na fila #{trabalho_fila}.\n"))
+        else:
+            log_textbox.insert("end", _log(f"🧵 Modo paralelo: {n} trabalhadores ({backends[0].nome}), ~{total // n} registros cada.\n"))
+
+        def gui_trabalhador(k):
+            a, b = partes[k]
+            def atualizar(status=None, total_ciclos=None, ciclo_atual=None, delay_atual=None, metricas=None):
+                if total_ciclos is not None and filas:
+                    with trava:
+                        cresceu = total_ciclos > painel["total"]
+                        if cresceu: painel["total"] = sessao.total = total_ciclos
+                    if cresceu: safe_update_gui_cb(total_ciclos=total_ciclos)
+                if ciclo_atual is not None and filas:
+                    # Na fila o core já informa o progresso de todas as estações
+                    with trava:
+                        publicar = time.time() - painel["ultimo"] >= 1.0
+                        if publicar: painel["ultimo"] = time.time()
+                    sessao.indice = ciclo_atual - 1
+                    if progresso_cb: progresso_cb(k, filas[k].feitos_estacao, painel["total"])
+                    safe_update_gui_cb(ciclo_atual=ciclo_atual,
+                                       metricas=_texto_vazao(ciclo_atual, painel["total"], inicio, n) if publicar else None)
+                elif ciclo_atual is not None:
+                    with trava:
+                        feitos[k] = a + ciclo_atual
+                        concluidos = sum(f - p[0] for f, p in zip(feitos, partes))
+                        publicar = time.time() - painel["ultimo"] >= 1.0
+                        if publicar: painel["ultimo"] = time.time()
+                    sessao.indice = concluidos - 1
+                    if progresso_cb: progresso_cb(k, ciclo_atual, b - a)
+                    safe_update_gui_cb(ciclo_atual=concluidos,
+                                       metricas=_texto_vazao(concluidos, total, inicio, n) if publicar else None)
+                if status in ("Pausado", "Rodando", "Aguardando"): safe_update_gui_cb(status=status)
+                if delay_atual: safe_update_gui_cb(delay_atual=f"J{k + 1} {delay_atual}")
+            return atualizar
+
+        def botoes_trabalhador(iniciar_state, continuar_state):
+            # Pausa/retomada passam; o fim de cada trabalhador não reabilita o INICIAR
+            if iniciar_state != "normal": safe_configure_buttons_cb(iniciar_state=iniciar_state, continuar_state=continuar_state)
+
+        sub_sessoes, threads = [], []
+        for k, ((a, b), backend) in enumerate(zip(partes, backends)):
+            chave = f"{arquivo}#{k + 1}/{n}"
+            pendente = None
+            if retomar_pendentes and not backend.simulado and not filas:
+                pendente = db_manager.buscar_execucao_pendente(chave, cidade_filtro, backlog_filtro)
+            sub = sessao.sub_sessao(delay_inicial)
+            sub_sessoes.append(sub)
+            threads.append(threading.Thread(
+                target=automation_logic.automacao_core, name=f"trabalhador-{k + 1}", daemon=True,
+                args=(LogTrabalhador(log_textbox, f"[J{k + 1}] "), cidade_filtro, backlog_filtro, delay_inicial,
+                      botoes_trabalhador, gui_trabalhador(k)),
+                kwargs={"execucao_pendente": pendente, "tamanho_lote": tamanho_lote, "faixa_delay_auto": faixa_delay_auto,
+                        "sessao": sub, "backend": backend, "arquivo": arquivo,
+                        "dados": None if filas else dados.fatia(a, b), "chave_diario": chave,
+                        "fila": filas[k] if filas else None},
+            ))
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        duracao = time.perf_counter() - inicio
+        concluidos = sum(f.feitos_estacao for f in filas) if filas else sum(f - p[0] for f, p in zip(feitos, partes))
+        log_textbox.insert("end", _log(f"🧵 {concluidos} registros em {duracao:.1f}s "
+                                       f"({concluidos / duracao * 60 if duracao else 0:.0f} itens/min, {n} trabalhadores).\n"))
+        if sessao.cancelado: status_final = "Parado"
+        elif any(s.status == "Erro" for s in sub_sessoes): status_final = "Erro"
+        else: status_final = "Finalizado"
+
+    except Exception as e:
+        log_textbox.insert("end", _log(f"❌ ERRO CRÍTICO (paralelo): {e}\n"))
+    finally:
+        db_manager.fechar_conexao()
+        fila_trabalho.fechar_conexao()
+        sessao.status = status_final
+        safe_update_gui_cb(status=status_final)
+        safe_configure_buttons_cb(iniciar_state="normal", continuar_state="disabled")
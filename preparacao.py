@@ -0,0 +1,153 @@
+import os
+import re
+import csv
+import time
+import hashlib
+import utils
+import ingestao
+
+# ####################################################################
+# --- LISTA DE TRABALHO (CHAVES VALIDADAS E SEM REPETIÇÃO) ---
+# ####################################################################
+#
+# Uma passada vetorizada sobre o DataFrame filtrado:
+#   1. escolhe a coluna-chave uma vez (Waybill No > Motorista ID > primeira);
+#   2. normaliza uma cópia (sem espaços, maiúsculas, '123.0' -> '123'), usada
+#      só para comparar: o que vai para o site é o valor original sem as
+#      bordas em branco, como sempre foi;
+#   3. rejeita vazios, repetidos (pela chave normalizada) e, se 'padrao_chave'
+#      estiver no filtros_config.json, os malformados (fora do padrão),
+#      guardando a linha de origem no Excel (índice + 2: cabeçalho na linha 1);
+#      com várias planilhas (ingestao) a origem é 'arquivo[aba]:linha'.
+# O motor itera só sobre a lista de strings resultante.
+
+CHAVE_CONFIG_PADRAO = 'padrao_chave'        # Regex opcional em filtros_config.json
+PADRAO_CHAVE_PADRAO = None                  # Sem padrão configurado, nenhuma chave é rejeitada por formato
+VAZIOS = ('', 'NAN', 'NAT', 'NONE')
+PASTA_REJEITADOS = 'logs'
+
+class ListaTrabalho:
+    """Chaves prontas para envio e o relatório do que ficou de fora."""
+    def __init__(self, valores, linhas, rejeitados, coluna=None, chaves=None):
+        self.valores = valores          # [str] valor original (sem bordas em branco) na ordem da planilha: o que é colado
+        self.linhas = linhas            # [int] linha de origem de cada valor no Excel ('arquivo[aba]:linha' com várias planilhas)
+        self.rejeitados = rejeitados    # [(linha, valor original, motivo)]
+        self.coluna = coluna
+        self.chaves = list(valores) if chaves is None else chaves # [str] chave normalizada de cada valor (comparação)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def fatia(self, inicio, fim):
+        """Sub-lista (modo paralelo); o relatório de rejeitados fica com a lista inteira."""
+        return ListaTrabalho(self.valores[inicio:fim], self.linhas[inicio:fim], [], self.coluna, self.chaves[inicio:fim])
+
+    def acrescentar(self, valores, linhas, chaves):
+        """
+        Chaves novas no fim (modo acompanhamento). As listas são estendidas no
+        lugar: quem itera por posição (o motor) enxerga o novo tamanho.
+        """
+        self.chaves.extend(chaves)
+        self.linhas.extend(linhas)
+        self.valores.extend(valores)
+
+    def sem(self, excluir):
+        """Cópia sem os valores de 'excluir' (já confirmados numa execução anterior)."""
+        manter = [p for p, v in enumerate(self.valores) if v not in excluir]
+        return ListaTrabalho([self.valores[p] for p in manter], [self.linhas[p] for p in manter], self.rejeitados, self.coluna,
+                             [self.chaves[p] for p in manter])
+
+    def retomar(self, base, acrescentados):
+        """
+        Lista de uma execução que cresceu (planilha acompanhada): as 'base' primeiras
+        chaves, os 'acrescentados' já enviados (na ordem do diário) e o resto.
+        None se algum deles não estiver mais na planilha (as posições não fecham).
+        """
+        posicao = {v: p for p, v in enumerate(self.valores)}
+        if any(posicao.get(v, -1) < base for v in acrescentados): return None
+        ja_enviados = set(acrescentados)
+        ordem = (list(range(base)) + [posicao[v] for v in acrescentados]
+                 + [p for p in range(base, len(self.valores)) if self.valores[p] not in ja_enviados])
+        return ListaTrabalho([self.valores[p] for p in ordem], [self.linhas[p] for p in ordem], self.rejeitados, self.coluna,
+                             [self.chaves[p] for p in ordem])
+
+    def itens(self):
+        """(posição, valor) de cada chave."""
+        return list(enumerate(self.valores))
+
+    def fingerprint(self, n=None):
+        """Mesmas chaves na mesma ordem = mesmo hash (retomada e fila compartilhada). 'n': só as n primeiras."""
+        valores = self.valores[:n]
+        h = hashlib.sha1(str(len(valores)).encode())
+        h.update("\n".join(valores).encode("utf-8"))
+        return h.hexdigest()
+
+    def contagem_rejeitados(self):
+        contagem = {"vazio": 0, "malformado": 0, "repetido": 0}
+        for _, _, motivo in self.rejeitados: contagem[motivo] += 1
+        return contagem
+
+    def resumo(self):
+        c = self.contagem_rejeitados()
+        return (f"{len(self.valores)} chaves válidas em '{self.coluna or '-'}' "
+                f"({c['vazio']} vazias, {c['malformado']} malformadas, {c['repetido']} repetidas).")
+
+def padrao_configurado():
+    """Regex da chave: 'padrao_chave' do filtros_config.json, PADRAO_CHAVE_PADRAO ou None (sem validação de formato)."""
+    padrao = utils.carregar_config_filtros().get(CHAVE_CONFIG_PADRAO) or PADRAO_CHAVE_PADRAO
+    return str(padrao) if padrao else None
+
+def preparar_lista(df, padrao=None):
+    """DataFrame filtrado -> ListaTrabalho. Lança ValueError se o padrão for uma regex inválida."""
+    if df is None or df.empty: return ListaTrabalho([], [], [])
+    padrao = padrao or padrao_configurado()
+    if padrao:
+        try: re.compile(padrao)
+        except re.error as e: raise ValueError(f"Padrão da chave inválido ('{padrao}'): {e}")
+
+    coluna = utils.coluna_chave(df.columns)
+    original = df[coluna]
+    texto = original.fillna("").astype(str)
+    chaves = (texto.str.replace(r"\s+", "", regex=True).str.upper()
+                   .str.replace(r"^(\d+)\.0+$", r"\1", regex=True))
+
+    vazio = chaves.isin(VAZIOS)
+    if padrao: malformado = ~vazio & ~chaves.str.fullmatch(padrao).fillna(False).astype(bool)
+    else: malformado = vazio & False
+    valido = ~vazio & ~malformado
+    repetido = valido & chaves.duplicated(keep="first")
+    aceito = valido & ~repetido
+
+    try: linhas = (df.index.astype("int64") + 2).tolist()
+    except (TypeError, ValueError): linhas = list(range(2, len(df) + 2))
+    if ingestao.COLUNA_ORIGEM in df.columns:
+        linhas = [f"{o}:{n}" for o, n in zip(df[ingestao.COLUNA_ORIGEM].tolist(), linhas)]
+
+    rejeitados = []
+    for motivo, mascara in (("vazio", vazio), ("malformado", malformado), ("repetido", repetido)):
+        rejeitados += [(p, motivo) for p in mascara.to_numpy().nonzero()[0]]
+    rejeitados = [(linhas[p], texto.iat[p], motivo) for p, motivo in sorted(rejeitados)] # Na ordem das planilhas
+
+    posicoes = aceito.to_numpy().nonzero()[0]
+    return ListaTrabalho(texto.iloc[posicoes].str.strip().tolist(), [linhas[p] for p in posicoes], rejeitados, coluna,
+                         chaves.to_numpy()[posicoes].tolist())
+
+def registrar_rejeitados(lista, log_textbox, max_linhas_log=5):
+    """Resumo no log e, havendo rejeitados, o relatório completo em logs/rejeitados_*.csv."""
+    log_textbox.insert("end", f"[{time.strftime('%H:%M:%S')}] 🧹 {lista.resumo()}\n")
+    if not lista.rejeitados: return None
+    for linha, valor, motivo in lista.rejeitados[:max_linhas_log]:
+        log_textbox.insert("end", f"   -> Linha {linha}: '{valor}' ({motivo})\n")
+    try:
+        pasta = utils.get_external_path(PASTA_REJEITADOS)
+        os.makedirs(pasta, exist_ok=True)
+        caminho = os.path.join(pasta, f"rejeitados_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        with open(caminho, "w", newline="", encoding="utf-8-sig") as f:
+            escritor = csv.writer(f, delimiter=";")
+            escritor.writerow(["linha", lista.coluna, "motivo"])
+            escritor.writerows(lista.rejeitados)
+        log_textbox.insert("end", f"   -> Relatório: {os.path.basename(caminho)} ({len(lista.rejeitados)} linhas)\n")
+        return caminho
+    except Exception as e:
+        log_textbox.insert("end", f"   -> ⚠️ Falha ao gravar relatório de rejeitados: {e}\n")
+        return None
@@ -0,0 +1,363 @@
+import os
+import json
+import time
+import utils
+
+# ####################################################################
+# --- RADAR VISUAL: CAPTURA ÚNICA + REGIÃO DE INTERESSE ---
+# ####################################################################
+#
+# Cada varredura tira UM screenshot (opcionalmente só da região de
+# interesse), converte para tons de cinza uma vez e compara todos os
+# templates do banco contra esse mesmo buffer.
+
+CONFIG_RADAR_FILE = 'radar_config.json'
+CONFIANCA_PADRAO = 0.8
+
+# Pirâmide: busca grossa em resolução reduzida, confirmação em resolução cheia
+NIVEIS_PIRAMIDE = 2
+TAMANHO_MIN_NIVEL = 8      # Menor lado (px) aceitável do template no nível reduzido
+MARGEM_GROSSA = 0.15       # Tolerância extra na busca grossa (a redução perde detalhes)
+MAX_CANDIDATOS = 5
+BORDA_GROSSA = 1           # Pixels descartados em cada lado do template reduzido (a borda borrada depende do fundo da tela)
+INTERVALO_RECARGA = 2.0    # Segundos entre verificações de novos arquivos em assets/
+
+# Banco de templates em memória (criado por carregar_banco)
+BANCO = None
+
+# Região de interesse: None = tela inteira, ou (left, top, width, height)
+REGIAO_RADAR = None
+
+# Portão de mudança: só busca templates onde a tela mudou desde a última busca
+PORTAO_ATIVO = True
+PORTAO_ESCALA = 8          # Redução da tela antes de comparar (8 = 1/64 dos pixels)
+PORTAO_BLOCO = 8           # Lado do bloco (px) na imagem reduzida
+PORTAO_LIMIAR = 10.0       # Diferença de cinza (0-255) na miniatura para o bloco contar como alterado
+_REFERENCIA_PORTAO = None  # Miniatura da última tela em que a busca rodou
+
+# Contadores por varredura (para medir o custo do radar)
+ESTATISTICAS = {"varreduras": 0, "tempo_captura": 0.0, "tempo_busca": 0.0, "buscas": 0, "puladas": 0}
+
+class EstadoRadar:
+    """
+    Região, referência do portão e contadores de UM alvo. Os trabalhadores
+    paralelos têm cada um o seu (cada janela tem a sua tela); sem estado, as
+    funções usam os globais do módulo (execução com uma janela só).
+    'capturar' troca a captura padrão (ex.: display virtual do Xvfb).
+    """
+    def __init__(self, regiao=None, capturar=None):
+        self.regiao = regiao
+        self.capturar = capturar
+        self.referencia = None
+        self.estatisticas = dict.fromkeys(ESTATISTICAS, 0)
+
+def carregar_config_radar():
+    """
+    Lê 'radar_config.json' (opcional, ao lado do executável):
+      {"regiao": [left, top, width, height]}  -> retângulo calibrado
+      {"regiao": "navegador"}                 -> janela do navegador em foco
+      {"confiancas": {"arquivo.png": 0.85}}   -> confiança por template
+    """
+    caminho = utils.get_external_path(CONFIG_RADAR_FILE)
+    if not os.path.exists(caminho): return {}
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+def definir_regiao(regiao):
+    """Define a região de interesse (None = tela inteira)."""
+    global REGIAO_RADAR
+    if regiao and len(regiao) == 4 and regiao[2] > 0 and regiao[3] > 0:
+        REGIAO_RADAR = tuple(int(v) for v in regiao)
+    else:
+        REGIAO_RADAR = None
+
+def regiao_da_janela(janela):
+    """Retângulo (left, top, width, height) de uma janela do pygetwindow."""
+    try:
+        return (max(0, janela.left), max(0, janela.top), janela.width, janela.height)
+    except Exception:
+        return None
+
+def aplicar_config_regiao(janela_navegador=None, estado=None):
+    """Aplica a região configurada; 'navegador' usa o retângulo da janela focada."""
+    if estado is not None:
+        # Trabalhador paralelo: cada um vigia só a própria janela
+        estado.regiao = regiao_da_janela(janela_navegador) if janela_navegador else None
+        return
+    regiao = carregar_config_radar().get("regiao")
+    if regiao == "navegador":
+        definir_regiao(regiao_da_janela(janela_navegador) if janela_navegador else None)
+    elif isinstance(regiao, (list, tuple)):
+        definir_regiao(regiao)
+    else:
+        definir_regiao(None)
+
+def capturar_tela(regiao=None):
+    """Um único screenshot (da região ou da tela inteira) já em tons de cinza (numpy)."""
+    import numpy as np
+    import pyautogui
+    imagem = pyautogui.screenshot(region=regiao) if regiao else pyautogui.screenshot()
+    return np.array(imagem.convert('L'))
+
+# ####################################################################
+# --- BANCO DE TEMPLATES (PRÉ-PROCESSADOS EM MEMÓRIA) ---
+# ####################################################################
+
+def _ler_cinza(caminho):
+    """Decodifica o PNG direto em tons de cinza (uma vez por arquivo)."""
+    import cv2
+    import numpy as np
+    img = cv2.imread(caminho, cv2.IMREAD_GRAYSCALE)
+    if img is None: # Caminhos com acentos no Windows: decodifica a partir dos bytes
+        with open(caminho, 'rb') as f:
+            img = cv2.imdecode(np.frombuffer(f.read(), np.uint8), cv2.IMREAD_GRAYSCALE)
+    return img
+
+def _piramide(img, niveis):
+    import cv2
+    niveis_img = [img]
+    for _ in range(niveis): niveis_img.append(cv2.pyrDown(niveis_img[-1]))
+    return niveis_img
+
+class Template:
+    """Template pré-convertido para cinza, com os níveis reduzidos já calculados."""
+    def __init__(self, nome, caminho, confianca):
+        self.nome = nome
+        self.caminho = caminho
+        self.mtime = os.path.getmtime(caminho)
+        self.confianca = confianca
+        img = _ler_cinza(caminho)
+        if img is None: raise ValueError(f"Imagem inválida: {caminho}")
+
+        niveis = 0
+        while niveis < NIVEIS_PIRAMIDE and min(img.shape) // (2 ** (niveis + 1)) - 2 * BORDA_GROSSA >= TAMANHO_MIN_NIVEL:
+            niveis += 1
+        self.niveis = _piramide(img, niveis)
+        # Nos níveis reduzidos só o miolo é comparado: a borda mistura o template com o
+        # que está em volta dele na tela e derrubava a correlação abaixo da margem
+        b = BORDA_GROSSA
+        self.niveis[1:] = [n[b:-b, b:-b] if b else n for n in self.niveis[1:]]
+
+class BancoTemplates:
+    """
+    Carrega todos os PNGs das pastas de assets uma única vez e recarrega
+    automaticamente quando arquivos são adicionados, alterados ou removidos.
+    Confianças por template vêm de radar_config.json: {"confiancas": {"erro_baixada.png": 0.85}}.
+    """
+    def __init__(self, pastas):
+        self.pastas = [p for p in dict.fromkeys(pastas) if p]
+        self.templates = {}
+        self.ultima_verificacao = 0.0
+        self.recarregar()
+
+    def _arquivos(self):
+        """{nome: caminho}. Pastas posteriores (externas) sobrescrevem as internas."""
+        arquivos = {}
+        for pasta in self.pastas:
+            if not os.path.isdir(pasta): continue
+            for f in os.listdir(pasta):
+                if f.lower().endswith(".png"): arquivos[f] = os.path.join(pasta, f)
+        return arquivos
+
+    def recarregar(self):
+        """Sincroniza o banco com o disco. Retorna a lista de templates (re)carregados."""
+        self.ultima_verificacao = time.time()
+        confiancas = carregar_config_radar().get("confiancas", {})
+        arquivos = self._arquivos()
+        alterados = []
+
+        for nome in list(self.templates):
+            if nome not in arquivos: del self.templates[nome]
+
+        for nome, caminho in arquivos.items():
+            atual = self.templates.get(nome)
+            confianca = float(confiancas.get(nome, CONFIANCA_PADRAO))
+            try:
+                if atual and atual.caminho == caminho and atual.mtime == os.path.getmtime(caminho):
+                    atual.confianca = confianca
+                    continue
+                self.templates[nome] = Template(nome, caminho, confianca)
+                alterados.append(nome)
+            except Exception:
+                self.templates.pop(nome, None)
+        return alterados
+
+    def recarregar_se_necessario(self):
+        if time.time() - self.ultima_verificacao >= INTERVALO_RECARGA:
+            return self.recarregar()
+        return []
+
+    def maior_template(self):
+        """(altura, largura) do maior template, para a margem das regiões alteradas."""
+        if not self.templates: return (0, 0)
+        return (max(t.niveis[0].shape[0] for t in self.templates.values()),
+                max(t.niveis[0].shape[1] for t in self.templates.values()))
+
+    def localizar(self, tela_cinza):
+        """Busca grosso-para-fino de todos os templates no mesmo buffer. Retorna o nome ou None."""
+        import cv2
+        import numpy as np
+
+        self.recarregar_se_necessario()
+        piramide_tela = [tela_cinza]
+
+        for tpl in list(self.templates.values()):
+            nivel = len(tpl.niveis) - 1
+            while len(piramide_tela) <= nivel:
+                piramide_tela.append(cv2.pyrDown(piramide_tela[-1]))
+
+            tela_n, tpl_n = piramide_tela[nivel], tpl.niveis[nivel]
+            if tela_n.shape[0] < tpl_n.shape[0] or tela_n.shape[1] < tpl_n.shape[1]: continue
+            res = cv2.matchTemplate(tela_n, tpl_n, cv2.TM_CCOEFF_NORMED)
+
+            if nivel == 0:
+                if np.nanmax(res) >= tpl.confianca: return tpl.nome
+                continue
+
+            # Candidatos da busca grossa, do melhor para o pior
+            ys, xs = np.where(res >= tpl.confianca - MARGEM_GROSSA)
+            if not len(ys): continue
+            ordem = np.argsort(res[ys, xs])[::-1][:MAX_CANDIDATOS]
+
+            # Confirmação em resolução cheia, só ao redor de cada candidato
+            escala = 2 ** nivel
+            th, tw = tpl.niveis[0].shape
+            for k in ordem:
+                y, x = ys[k] - BORDA_GROSSA, xs[k] - BORDA_GROSSA # Canto do template (o miolo começa 1 borda para dentro)
+                x0 = max(0, x * escala - escala - 2)
+                y0 = max(0, y * escala - escala - 2)
+                janela = tela_cinza[y0:max(0, y * escala + th + escala + 2), x0:max(0, x * escala + tw + escala + 2)]
+                if janela.shape[0] < th or janela.shape[1] < tw: continue
+                if np.nanmax(cv2.matchTemplate(janela, tpl.niveis[0], cv2.TM_CCOEFF_NORMED)) >= tpl.confianca:
+                    return tpl.nome
+        return None
+
+def carregar_banco():
+    """Cria o banco a partir de assets/ interno (EXE) e assets/ ao lado do executável."""
+    global BANCO
+    if BANCO is None:
+        BANCO = BancoTemplates([utils.resource_path("assets"), utils.get_external_path("assets")])
+    return BANCO
+
+# ####################################################################
+# --- PORTÃO DE MUDANÇA (DIFERENÇA ENTRE QUADROS) ---
+# ####################################################################
+
+def reiniciar_portao(estado=None):
+    """Esquece a referência: a próxima varredura faz a busca completa."""
+    global _REFERENCIA_PORTAO
+    if estado is not None: estado.referencia = None
+    else: _REFERENCIA_PORTAO = None
+
+def regiao_alterada(tela_cinza, estado=None):
+    """
+    Compara uma miniatura da tela com a referência (a da última busca), bloco a bloco.
+    Retorna None (nada mudou), a tela inteira (sem referência) ou o
+    retângulo (y0, y1, x0, x1) que engloba os blocos alterados.
+    A referência só é trocada quando há busca: um popup que surge aos poucos
+    acumula diferença contra ela até passar do limiar.
+    """
+    import cv2
+    global _REFERENCIA_PORTAO
+
+    altura, largura = tela_cinza.shape
+    mini = cv2.resize(tela_cinza, (max(1, largura // PORTAO_ESCALA), max(1, altura // PORTAO_ESCALA)), interpolation=cv2.INTER_AREA)
+    referencia = estado.referencia if estado is not None else _REFERENCIA_PORTAO
+    area = _comparar_miniaturas(mini, referencia, altura, largura)
+    if area is not None:
+        if estado is not None: estado.referencia = mini
+        else: _REFERENCIA_PORTAO = mini
+    return area
+
+def _comparar_miniaturas(mini, referencia, altura, largura):
+    import cv2
+    import numpy as np
+    if referencia is None or referencia.shape != mini.shape:
+        return (0, altura, 0, largura)
+
+    # Maior diferença por bloco (a miniatura já suaviza ruído; a média diluiria popups pequenos)
+    diff = cv2.absdiff(mini, referencia)
+    bh, bw = diff.shape[0] // PORTAO_BLOCO, diff.shape[1] // PORTAO_BLOCO
+    if bh == 0 or bw == 0:
+        return (0, altura, 0, largura) if diff.max() > PORTAO_LIMIAR else None
+    blocos = diff[:bh * PORTAO_BLOCO, :bw * PORTAO_BLOCO].reshape(bh, PORTAO_BLOCO, bw, PORTAO_BLOCO).max(axis=(1, 3))
+
+    ys, xs = np.nonzero(blocos > PORTAO_LIMIAR)
+    if not len(ys):
+        # Sobras das bordas (fora dos blocos inteiros) também contam
+        for sobra in (diff[bh * PORTAO_BLOCO:, :], diff[:, bw * PORTAO_BLOCO:]):
+            if sobra.size and sobra.max() > PORTAO_LIMIAR: return (0, altura, 0, largura)
+        return None
+
+    passo = PORTAO_BLOCO * PORTAO_ESCALA
+    y0, y1 = ys.min() * passo, (ys.max() + 1) * passo
+    x0, x1 = xs.min() * passo, (xs.max() + 1) * passo
+    if ys.max() == bh - 1: y1 = altura
+    if xs.max() == bw - 1: x1 = largura
+    return (y0, y1, x0, x1)
+
+def varrer_imagem(tela_cinza, banco=None, estado=None):
+    """
+    Passa o portão e, se a tela mudou, busca os templates só na área alterada
+    (expandida pelo tamanho do maior template). Retorna o nome encontrado ou None.
+    """
+    banco = banco or carregar_banco()
+    estatisticas = estado.estatisticas if estado is not None else ESTATISTICAS
+    if not PORTAO_ATIVO:
+        estatisticas["buscas"] += 1
+        return banco.localizar(tela_cinza)
+
+    area = regiao_alterada(tela_cinza, estado)
+    if area is None:
+        estatisticas["puladas"] += 1
+        return None
+
+    estatisticas["buscas"] += 1
+    th, tw = banco.maior_template()
+    y0, y1, x0, x1 = area
+    altura, largura = tela_cinza.shape
+    recorte = tela_cinza[max(0, y0 - th):min(altura, y1 + th), max(0, x0 - tw):min(largura, x1 + tw)]
+    return banco.localizar(recorte)
+
+def varrer(estado=None):
+    """Uma varredura completa do radar (captura + portão + busca), com medição de tempo."""
+    banco = carregar_banco()
+    if not banco.templates and not banco.recarregar_se_necessario(): return None
+    if estado is not None:
+        estatisticas, regiao = estado.estatisticas, estado.regiao
+        capturar = estado.capturar or capturar_tela
+    else:
+        estatisticas, regiao, capturar = ESTATISTICAS, REGIAO_RADAR, capturar_tela
+    inicio = time.perf_counter()
+    tela = capturar(regiao)
+    meio = time.perf_counter()
+    encontrado = varrer_imagem(tela, banco, estado)
+    fim = time.perf_counter()
+
+    estatisticas["varreduras"] += 1
+    estatisticas["tempo_captura"] += meio - inicio
+    estatisticas["tempo_busca"] += fim - meio
+    return encontrado
+
+def zerar_estatisticas(estado=None):
+    estatisticas = estado.estatisticas if estado is not None else ESTATISTICAS
+    for chave in estatisticas: estatisticas[chave] = 0.0 if chave.startswith("tempo") else 0
+
+def resumo_estatisticas(estado=None):
+    """Texto com a média por varredura (ms), para o log do fim da execução."""
+    estatisticas = estado.estatisticas if estado is not None else ESTATISTICAS
+    regiao = estado.regiao if estado is not None else REGIAO_RADAR
+    n = estatisticas["varreduras"]
+    if not n: return "Radar: nenhuma varredura."
+    cap = estatisticas["tempo_captura"] / n * 1000
+    busca = estatisticas["tempo_busca"] / n * 1000
+    regiao = "tela inteira" if not regiao else "x".join(str(v) for v in regiao[2:])
+    resumo = f"Radar: {n} varreduras, média {cap + busca:.1f} ms (captura {cap:.1f} ms, busca {busca:.1f} ms, {regiao})."
+    if PORTAO_ATIVO:
+        puladas = estatisticas["puladas"]
+        resumo += f" Portão: {estatisticas['buscas']} buscas, {puladas} puladas ({puladas / n * 100:.0f}%)."
+    return resumo
@@ -0,0 +1,125 @@
+import threading
+
+# ####################################################################
+# --- SESSÃO DE AUTOMAÇÃO (ESTADO + PAUSA/CANCELAMENTO) ---
+# ####################################################################
+
+class _Controle:
+    """Pausa/cancelamento e a Condition que os protege (compartilháveis entre sessões)."""
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.pausado = False
+        self.cancelado = False
+        self.sessoes = []   # Todas as sessões ligadas (o novo delay do CONTINUAR vale para todas)
+
+class SessaoAutomacao:
+    """
+    Dono do estado de uma execução (pausa, cancelamento, índice, delay).
+    Pausa, retomada e cancelamento usam uma Condition: quem espera é acordado
+    na hora, sem polling. Cada execução tem a sua sessão, então várias podem
+    coexistir no mesmo processo. As sub-sessões (trabalhadores paralelos) têm
+    progresso e delay próprios e a mesma pausa/cancelamento da principal.
+    """
+    def __init__(self, delay, indice_inicial=0, controle=None):
+        self._controle = controle or _Controle()
+        self._cond = self._controle.cond
+        self._controle.sessoes.append(self)
+        self._indice = indice_inicial
+        self._total = 0
+        self._delay = delay
+        self._status = "Rodando"
+
+    def sub_sessao(self, delay=None):
+        """Sessão de um trabalhador: pausa/cancelamento ligados a esta."""
+        return SessaoAutomacao(self._delay if delay is None else delay, controle=self._controle)
+
+    # --- CONTROLE ---
+    def pausar(self):
+        """Solicita pausa. Retorna False se já estava pausada."""
+        c = self._controle
+        with self._cond:
+            if c.pausado: return False
+            c.pausado = True
+            self._cond.notify_all()
+            return True
+
+    def retomar(self, novo_delay=None):
+        """Libera a pausa (opcionalmente com um novo delay)."""
+        with self._cond:
+            if novo_delay is not None:
+                for sessao in self._controle.sessoes: sessao._delay = novo_delay
+            self._controle.pausado = False
+            self._cond.notify_all()
+
+    def cancelar(self):
+        """Cancela a execução e destrava quem estiver aguardando a retomada."""
+        c = self._controle
+        with self._cond:
+            c.cancelado = True
+            c.pausado = False
+            self._cond.notify_all()
+
+    def aguardar_retomada(self):
+        """Bloqueia enquanto pausada. Retorna False se a sessão foi cancelada."""
+        c = self._controle
+        with self._cond:
+            self._cond.wait_for(lambda: not c.pausado or c.cancelado)
+            return not c.cancelado
+
+    def esperar(self, segundos):
+        """
+        Dorme até 'segundos', acordando na hora se houver pausa ou cancelamento.
+        Retorna True se foi interrompida.
+        """
+        c = self._controle
+        with self._cond:
+            return self._cond.wait_for(lambda: c.pausado or c.cancelado, timeout=segundos)
+
+    # --- ESTADO ---
+    @property
+    def pausado(self):
+        return self._controle.pausado
+
+    @property
+    def cancelado(self):
+        return self._controle.cancelado
+
+    @property
+    def indice(self):
+        return self._indice
+
+    @indice.setter
+    def indice(self, valor):
+        with self._cond: self._indice = valor
+
+    @property
+    def total(self):
+        return self._total
+
+    @total.setter
+    def total(self, valor):
+        with self._cond: self._total = valor
+
+    @property
+    def delay(self):
+        return self._delay
+
+    @delay.setter
+    def delay(self, valor):
+        with self._cond: self._delay = valor
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, valor):
+        with self._cond: self._status = valor
+
+    def snapshot(self):
+        """Cópia consistente do progresso (lida sob o mesmo lock das escritas)."""
+        with self._cond:
+            return {
+                "indice": self._indice, "total": self._total, "delay": self._delay,
+                "status": self._status, "pausado": self._controle.pausado, "cancelado": self._controle.cancelado,
+            }
@@ -1,20 +1,26 @@
 import sys
 import os
-import keyboard
 import time
-import pandas as pd
-import subprocess
+import hashlib
+import json
+import filtros
+
+# pandas, openpyxl e keyboard são importados dentro das funções que os usam:
+# o login e o cadastro abrem sem carregá-los (ver bench/bench_inicio.py).
 
 # --- CONSTANTES ---
 NOME_ARQUIVO_ALVO = 'atribuicao.xlsx' 
+CONFIG_FILTROS_FILE = 'filtros_config.json'
 DEFAULT_DELAY_SECONDS = 0.2
 VERSAO_SISTEMA = 'v3.9 (Silent & Robust)' 
 
-# Estado Global
-PARAR_AUTOMACAO = False 
-CANCELAR_AUTOMACAO = False 
-INDICE_ATUAL_DO_CICLO = 0
-DELAY_ATUAL = DEFAULT_DELAY_SECONDS
+# Cache colunar da planilha (gerado ao lado do Excel)
+PASTA_CACHE = '.cache_planilha'
+CACHE_MAX_IDADE_DIAS = 7
+
+# Motor de leitura: 'cache' (pandas + cache colunar) ou 'streaming' (openpyxl linha a linha)
+MOTOR_LEITURA = 'cache'
+TAMANHO_BLOCO_STREAMING = 5000
 
 # --- CAMINHOS ---
 def resource_path(relative_path):
@@ -34,8 +40,9 @@ def get_external_path(relative_path):
     return os.path.join(app_path, relative_path)
 
 # --- SISTEMA ---
-def abrir_planilha_alvo():
-    caminho = get_external_path(NOME_ARQUIVO_ALVO)
+def abrir_planilha_alvo(caminho=None):
+    """Abre a planilha (ou a pasta das planilhas) no programa padrão do Windows."""
+    caminho = caminho or get_external_path(NOME_ARQUIVO_ALVO)
     if not os.path.exists(caminho):
         return False, f"Arquivo não encontrado: {caminho}"
     try:
@@ -44,12 +51,14 @@ def abrir_planilha_alvo():
     except Exception as e:
         return False, str(e)
 
-def monitorar_tecla_escape(log_textbox):
+def monitorar_tecla_escape(log_textbox, obter_sessao):
+    """ESC pausa a sessão ativa ('obter_sessao' devolve a sessão da execução atual)."""
+    import keyboard
     while True: 
         try:
             keyboard.wait('esc')
-            if not globals()['PARAR_AUTOMACAO']: 
-                globals()['PARAR_AUTOMACAO'] = True 
+            sessao = obter_sessao()
+            if sessao and not sessao.cancelado and sessao.pausar(): 
                 log_textbox.insert("end", "\n[ESC] Pausa solicitada.\n")
                 log_textbox.see("end")
             time.sleep(0.5)
@@ -62,36 +71,254 @@ def validar_e_obter_delay(delay_input):
         return val if val >= 0 else DEFAULT_DELAY_SECONDS
     except: return DEFAULT_DELAY_SECONDS
 
+def validar_e_obter_lote(lote_input):
+    try:
+        val = int(str(lote_input).strip())
+        return val if val >= 1 else 1
+    except: return 1
+
+# --- CACHE DA PLANILHA ---
+def _log_cache(log_textbox, msg):
+    if log_textbox is None: return
+    try: log_textbox.insert("end", f"[{time.strftime('%H:%M:%S')}] {msg}\n")
+    except: pass
+
+def calcular_hash_arquivo(path, bloco=1024 * 1024):
+    """SHA1 do conteúdo do arquivo (lido em blocos para não carregar tudo na memória)."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(bloco), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _extensao_cache():
+    """Feather (colunar) se o pyarrow estiver disponível; senão pickle do pandas."""
+    try:
+        import pyarrow  # noqa: F401
+        return '.feather'
+    except ImportError:
+        return '.pkl'
+
+def _salvar_cache(df, caminho):
+    if caminho.endswith('.feather'): df.reset_index(drop=True).to_feather(caminho)
+    else: df.to_pickle(caminho)
+
+def _ler_cache(caminho):
+    import pandas as pd
+    if caminho.endswith('.feather'): return pd.read_feather(caminho)
+    return pd.read_pickle(caminho)
+
+def _remover_caches_obsoletos(pasta, prefixo, manter):
+    """
+    Remove versões antigas da mesma planilha e caches sem uso há muito tempo.
+    O HIT renova o mtime do cache e do .json juntos: o par envelhece (e sai) junto.
+    """
+    limite = time.time() - CACHE_MAX_IDADE_DIAS * 86400
+    for nome in os.listdir(pasta):
+        caminho = os.path.join(pasta, nome)
+        if caminho in manter: continue
+        try:
+            antigo = os.path.getmtime(caminho) < limite
+            if (nome.startswith(prefixo + '_') or antigo) and os.path.isfile(caminho):
+                os.remove(caminho)
+        except OSError: pass
+
+def carregar_planilha_cache(path, log_textbox=None, aba=None):
+    """
+    Lê a planilha usando um cache colunar em disco.
+    A chave é o caminho (+ aba) + tamanho + mtime + hash do conteúdo: se o Excel mudar,
+    o cache é reconstruído automaticamente. 'aba': nome da aba (None = a primeira).
+    """
+    import pandas as pd
+    pasta = os.path.join(os.path.dirname(path), PASTA_CACHE)
+    chave = os.path.abspath(path).lower() + (f"#{aba}" if aba is not None else "")
+    prefixo = hashlib.sha1(chave.encode()).hexdigest()[:12]
+    meta_path = os.path.join(pasta, f"{prefixo}.json")
+    st = os.stat(path)
+
+    meta = None
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f: meta = json.load(f)
+        except Exception: meta = None
+
+    # 1. Tenta HIT (tamanho/mtime iguais, ou mtime mudou mas o conteúdo não)
+    if meta and os.path.exists(os.path.join(pasta, meta.get('arquivo_cache', ''))):
+        valido = meta.get('tamanho') == st.st_size and meta.get('mtime') == st.st_mtime
+        if not valido and meta.get('tamanho') == st.st_size:
+            valido = calcular_hash_arquivo(path) == meta.get('sha1')
+            if valido:
+                meta['mtime'] = st.st_mtime
+                with open(meta_path, 'w', encoding='utf-8') as f: json.dump(meta, f)
+        if valido:
+            caminho_cache = os.path.join(pasta, meta['arquivo_cache'])
+            try:
+                inicio = time.perf_counter()
+                df = _ler_cache(caminho_cache)
+                for vivo in (caminho_cache, meta_path): os.utime(vivo, None) # Mantém o par "vivo" para a limpeza por idade
+                _log_cache(log_textbox, f"📦 Cache HIT ({len(df)} linhas em {time.perf_counter() - inicio:.2f}s).")
+                return df
+            except Exception as e:
+                _log_cache(log_textbox, f"⚠️ Cache inválido ({e}). Reconstruindo...")
+
+    # 2. REBUILD: lê o Excel completo e grava o cache
+    inicio = time.perf_counter()
+    df = pd.read_excel(path, sheet_name=aba if aba is not None else 0, dtype=str)
+    df.columns = df.columns.str.strip()
+
+    sha1 = calcular_hash_arquivo(path)
+    nome_cache = f"{prefixo}_{sha1[:16]}{_extensao_cache()}"
+    caminho_cache = os.path.join(pasta, nome_cache)
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        _salvar_cache(df, caminho_cache)
+        meta = {'path': os.path.abspath(path), 'tamanho': st.st_size, 'mtime': st.st_mtime,
+                'sha1': sha1, 'arquivo_cache': nome_cache}
+        with open(meta_path, 'w', encoding='utf-8') as f: json.dump(meta, f)
+        _remover_caches_obsoletos(pasta, prefixo, {caminho_cache, meta_path})
+        _log_cache(log_textbox, f"📦 Cache REBUILD ({len(df)} linhas em {time.perf_counter() - inicio:.2f}s).")
+    except Exception as e:
+        _log_cache(log_textbox, f"⚠️ Falha ao gravar cache: {e}")
+    return df
+
 # --- LEITURA EXCEL ---
-def ler_e_filtrar_dados(arquivo, cidade_filtro, backlog_filtro, log_textbox):
+def coluna_chave(colunas):
+    if 'Waybill No' in colunas: return 'Waybill No'
+    if 'Motorista ID' in colunas: return 'Motorista ID'
+    return colunas[0] if len(colunas) else None
+
+def carregar_config_filtros():
+    """
+    Lê 'filtros_config.json' (opcional, ao lado do executável) com opções extras
+    da especificação: scan_types, cidades_excluir, predicados...
+    """
+    caminho = get_external_path(CONFIG_FILTROS_FILE)
+    if not os.path.exists(caminho): return {}
     try:
-        path = get_external_path(arquivo)
-        if not os.path.exists(path):
-             return pd.DataFrame(), 0, f"Planilha não encontrada: {path}"
-
-        df = pd.read_excel(path, dtype=str)
-        df.columns = df.columns.str.strip()
-        
-        # Filtro 1: Scan Type (Recebido no DS)
-        col_scan = next((c for c in df.columns if "scan type" in c.lower()), None)
-        if col_scan:
-            df = df[df[col_scan].str.strip().isin(["(recebido no DS)", "recebido no DS"])]
-        
-        # Filtro 2: Cidade
-        if cidade_filtro and cidade_filtro not in ["SELECIONE", "NENHUM FILTRO", ""]:
-            col = 'Destination City' if 'Destination City' in df.columns else 'Cidade'
-            if col in df.columns:
-                lista = [c.strip().upper() for c in cidade_filtro.split(',') if c.strip()]
-                df = df[df[col].astype(str).str.strip().str.upper().isin(lista)]
-
-        # Filtro 3: Backlog
-        if backlog_filtro and str(backlog_filtro).strip():
-            col_bk = next((c for c in ['Backlog', 'Backlog time(Station)'] if c in df.columns), None)
-            if col_bk:
-                df = df[pd.to_numeric(df[col_bk], errors='coerce') == int(backlog_filtro)]
+        with open(caminho, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+def montar_spec_filtro(cidade_filtro, backlog_filtro):
+    """Especificação de filtro da tela (cidades/backlog) + configuração do cliente."""
+    return filtros.montar_spec(cidade_filtro, backlog_filtro, base=carregar_config_filtros())
+
+def _valor_celula(v):
+    """Converte a célula do openpyxl no mesmo texto que o pandas geraria com dtype=str."""
+    if v is None: return float('nan')
+    if isinstance(v, float) and v.is_integer(): return str(int(v))
+    return str(v)
+
+def ler_planilha_streaming(path, spec, aba=None):
+    """
+    Leitura em streaming (openpyxl read-only): carrega só as colunas usadas
+    pela especificação e pela chave, e descarta as linhas reprovadas bloco a bloco.
+    O pico de memória acompanha o resultado filtrado, não a planilha inteira.
+    'aba': nome da aba (None = a primeira).
+    """
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    mascara = filtros.compilar_filtro(spec)
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        linhas = (wb[aba] if aba is not None else wb.worksheets[0]).iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if not cabecalho: return pd.DataFrame()
+
+        colunas = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(cabecalho)]
+        necessarias = list(dict.fromkeys([coluna_chave(colunas)] + filtros.colunas_usadas(spec, colunas)))
+        indices = [colunas.index(c) for c in necessarias]
+
+        partes, bloco, posicoes = [], [], []
+        for pos, linha in enumerate(linhas):
+            bloco.append([_valor_celula(linha[i]) if i < len(linha) else float('nan') for i in indices])
+            posicoes.append(pos)
+            if len(bloco) >= TAMANHO_BLOCO_STREAMING:
+                partes.append(filtros.aplicar_spec(pd.DataFrame(bloco, columns=necessarias, index=posicoes, dtype=object), mascara))
+                bloco, posicoes = [], []
+        if bloco:
+            partes.append(filtros.aplicar_spec(pd.DataFrame(bloco, columns=necessarias, index=posicoes, dtype=object), mascara))
+    finally:
+        wb.close()
+
+    partes = [p for p in partes if not p.empty]
+    return pd.concat(partes) if partes else pd.DataFrame()
+
+def ler_aba_filtrada(path, spec, aba=None, motor=None, log_textbox=None):
+    """Uma aba (None = a primeira) lida pelo motor configurado e já filtrada pela especificação."""
+    if (motor or MOTOR_LEITURA) == 'streaming':
+        return ler_planilha_streaming(path, spec, aba)
+    return filtros.aplicar_spec(carregar_planilha_cache(path, log_textbox, aba), spec)
+
+def ler_e_filtrar_dados(arquivo, cidade_filtro, backlog_filtro, log_textbox, motor=None):
+    """
+    'arquivo' é uma origem do ingestao: um arquivo ou, com pasta/glob/abas,
+    várias planilhas lidas em paralelo e juntadas.
+    """
+    import pandas as pd
+    import ingestao
+    try:
+        # Valida a especificação antes de ler (erro de sintaxe não custa a leitura do Excel)
+        spec = montar_spec_filtro(cidade_filtro, backlog_filtro)
+        filtros.compilar_filtro(spec)
+
+        if ingestao.varias_planilhas(arquivo):
+            df, msg = ingestao.ler_origem(arquivo, spec, log_textbox, motor)
+            if msg.startswith("Erro leitura") or msg.startswith("Planilha não encontrada"):
+                return pd.DataFrame(), 0, msg
+        else:
+            path = get_external_path(arquivo)
+            if not os.path.exists(path):
+                 return pd.DataFrame(), 0, f"Planilha não encontrada: {path}"
+            df = ler_aba_filtrada(path, spec, motor=motor, log_textbox=log_textbox)
 
         if df.empty: return pd.DataFrame(), 0, "Nenhum dado após filtros."
         return df, len(df), f"{len(df)} registros carregados."
 
     except Exception as e:
-        return pd.DataFrame(), 0, f"Erro leitura: {e}"
\ No newline at end of file
+        return pd.DataFrame(), 0, f"Erro leitura: {e}"
+
+# --- IMPORTAÇÃO DE CIDADES ---
+def extrair_cidades_planilha(arquivo=NOME_ARQUIVO_ALVO, log_textbox=None):
+    """
+    Valores distintos de 'Destination City'/'Cidade' da planilha (ordem alfabética).
+    Retorna (lista, mensagem).
+    """
+    try:
+        path = get_external_path(arquivo)
+        if not os.path.exists(path):
+            return [], f"Planilha não encontrada: {path}"
+        df = carregar_planilha_cache(path, log_textbox)
+        coluna = filtros.coluna_cidade(df.columns)
+        if not coluna:
+            return [], "A planilha não tem a coluna 'Destination City' nem 'Cidade'."
+        nomes = df[coluna].dropna().astype(str).str.strip().str.upper()
+        nomes = sorted(set(nomes[nomes != ""]))
+        return nomes, f"{len(nomes)} cidade(s) distinta(s) na coluna '{coluna}'."
+    except Exception as e:
+        return [], f"Erro leitura: {e}"
+
+def interpretar_lista_cidades(texto):
+    """
+    Nomes de uma lista colada: um por linha ou separados por ';', tab ou ','.
+    Se a primeira linha for um cabeçalho CSV com 'Destination City'/'Cidade',
+    só essa coluna é usada.
+    """
+    import csv
+    linhas = [l for l in str(texto).splitlines() if l.strip()]
+    if not linhas: return []
+
+    delimitador = next((d for d in (';', '\t', ',') if d in linhas[0]), None)
+    if not delimitador:
+        return [l.strip() for l in linhas]
+
+    registros = list(csv.reader(linhas, delimiter=delimitador))
+    cabecalho = [c.strip() for c in registros[0]]
+    coluna = filtros.coluna_cidade(cabecalho)
+    if coluna:
+        idx = cabecalho.index(coluna)
+        return [r[idx].strip() for r in registros[1:] if idx < len(r) and r[idx].strip()]
+    return [c.strip() for r in registros for c in r if c.strip()]